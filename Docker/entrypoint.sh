@@ -10,4 +10,5 @@ echo "Database started!"
 
 python manage.py migrate
 python manage.py collectstatic --noinput
-python manage.py runserver 0.0.0.0:8000
+python manage.py generate_openapi
+exec "$@"
@@ -0,0 +1,14 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def closed_broker_circuit():
+    """
+    The publish circuit breaker is process-wide: a test whose publishes failed
+    must not leave it open and make the next tests spool their messages.
+    """
+    from projects.publisher import breaker
+
+    breaker.reset()
+    yield
+    breaker.reset()
@@ -73,6 +73,15 @@ class EmployeeAPITestCase(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertGreaterEqual(len(response.data), 1)
 
+    def test_employee_export_streams_csv(self):
+        url = reverse("employee:employee-export")
+        response = self.client.get(url, {"department": self.department.id})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertIn("admin@example.com", lines[1])
+
     def test_employee_create(self):
         url = reverse("employee:employee-list")
         data = {
@@ -0,0 +1,117 @@
+# employee/tests/test_directory.py
+from unittest.mock import patch
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from employee.models import Department, Employee, WorkingHour
+from employee.serializers import DepartmentSerializer, DepartmentWorkingHoursSerializer
+from projects.models import Project
+
+User = get_user_model()
+
+
+def directory_queries(queries):
+    return [query["sql"] for query in queries if "employee_department" in query["sql"] or "employee_workinghour" in query["sql"]]
+
+
+@patch("projects.tasks.send_task_created_email.delay")
+class DepartmentDirectoryTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.it = Department.objects.create(name="IT")
+        self.qa = Department.objects.create(name="QA", working_start_time="22:00", working_end_time="04:00")
+        self.ops = Department.objects.create(name="Ops")
+        WorkingHour.objects.create(department=self.it, start_time="09:00", end_time="13:00")
+        WorkingHour.objects.create(department=self.it, start_time="14:00", end_time="17:00", days_of_week=["saturday"])
+        self.hr = self.create_employee("hr", Employee.HR, "9812345601", self.it)
+        self.dev = self.create_employee("dev", Employee.EMPLOYEE, "9812345602", self.it)
+        project = Project.objects.create(name="Audit", department=self.qa, created_by=self.hr)
+        project.members.add(self.dev)
+        self.client = APIClient()
+
+    def create_employee(self, username, role, phone, department):
+        user = User.objects.create_user(username=username, email=f"{username}@example.com", password="securepass123")
+        return Employee.objects.create(user=user, role=role, phone=phone, department=department, date_of_joining=timezone.now())
+
+    def get(self, url_name, employee):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(employee.user).access_token}")
+        response = self.client.get(reverse(url_name))
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def expected(self, serializer_class, queryset):
+        return serializer_class(queryset.order_by("id"), many=True).data
+
+    def test_lists_match_the_database(self, _):
+        departments = self.get("employee:department-list", self.hr)
+        self.assertEqual(departments["count"], 3)
+        self.assertEqual(departments["results"], self.expected(DepartmentSerializer, Department.objects.all()))
+
+        hours = self.get("employee:department-working-hours-list", self.hr)
+        self.assertEqual(hours["results"], self.expected(DepartmentWorkingHoursSerializer, Department.objects.all()))
+        self.assertEqual(len(hours["results"][0]["working_hours"]), 2)
+        self.assertEqual(hours["results"][2]["working_hours"], [])
+
+        # employees: departments of their projects / their own department's hours
+        self.assertEqual([row["name"] for row in self.get("employee:department-list", self.dev)["results"]], ["QA"])
+        self.assertEqual([row["id"] for row in self.get("employee:department-working-hours-list", self.dev)["results"]], [self.it.pk])
+
+    def test_warm_directory_needs_no_department_queries(self, _):
+        self.get("employee:department-working-hours-list", self.hr)
+        self.get("employee:department-list", self.dev)
+        with CaptureQueriesContext(connection) as queries:
+            self.get("employee:department-working-hours-list", self.hr)
+            self.get("employee:department-list", self.hr)
+            self.get("employee:department-list", self.dev)
+        self.assertEqual(directory_queries(queries.captured_queries), [])
+        self.assertFalse([query for query in queries.captured_queries if "projects_project" in query["sql"]])
+
+    def test_saves_replace_the_cached_directory(self, _):
+        self.get("employee:department-working-hours-list", self.hr)
+        with self.captureOnCommitCallbacks(execute=True):
+            WorkingHour.objects.create(department=self.ops, start_time="10:00", end_time="12:00")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.qa.description = "Quality"
+            self.qa.save()
+        hours = self.get("employee:department-working-hours-list", self.hr)["results"]
+        self.assertEqual(len(hours[2]["working_hours"]), 1)
+        departments = self.get("employee:department-list", self.hr)["results"]
+        self.assertEqual(departments[1]["description"], "Quality")
+
+    def test_only_project_department_changes_refresh_the_directory(self, _):
+        project = Project.objects.get(name="Audit")
+        with patch("employee.directory.invalidate") as invalidate:
+            project.description = "Yearly"
+            project.save()
+            invalidate.assert_not_called()
+
+            project.department = self.ops
+            project.save()
+            self.assertEqual(invalidate.call_count, 1)
+
+            project.delete()
+            self.assertEqual(invalidate.call_count, 2)
+
+    def test_project_moves_refresh_the_employee_departments(self, _):
+        self.get("employee:department-list", self.dev)
+        project = Project.objects.get(name="Audit")
+        with self.captureOnCommitCallbacks(execute=True):
+            project.department = self.ops
+            project.save()
+        self.assertEqual([row["name"] for row in self.get("employee:department-list", self.dev)["results"]], ["Ops"])
+
+    def test_membership_changes_refresh_the_employee_departments(self, _):
+        self.assertEqual(len(self.get("employee:department-list", self.dev)["results"]), 1)
+        other = Project.objects.create(name="Infra", department=self.ops, created_by=self.hr)
+        with self.captureOnCommitCallbacks(execute=True):
+            other.members.add(self.dev)
+        self.assertEqual([row["name"] for row in self.get("employee:department-list", self.dev)["results"]], ["QA", "Ops"])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.dev.assigned_to.clear()
+        self.assertEqual(self.get("employee:department-list", self.dev)["results"], [])
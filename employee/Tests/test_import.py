@@ -0,0 +1,159 @@
+# employee/tests/test_import.py
+import io
+import tempfile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from django.contrib.auth import get_user_model
+from employee.importer import EmployeeImporter, ImportFileError, read_rows
+from employee.models import Department, Employee, EmployeeProfile, EmployeeSchedule
+
+User = get_user_model()
+
+HEADER = "email,first_name,last_name,phone,department,dob,gender,address,role,password\n"
+
+
+def csv_file(*lines):
+    return io.BytesIO((HEADER + "".join(line + "\n" for line in lines)).encode())
+
+
+def employee_line(i, department="IT", **overrides):
+    values = {
+        "email": f"new{i}@example.com", "first_name": f"New{i}", "last_name": "Hire",
+        "phone": f"98000{i:05d}", "department": department, "dob": "1995-02-03",
+        "gender": "F", "address": "Lalitpur", "role": "Employee", "password": "",
+    }
+    values.update(overrides)
+    return ",".join(str(values[col]) for col in HEADER.strip().split(","))
+
+
+class EmployeeImporterTest(TestCase):
+    def setUp(self):
+        self.department = Department.objects.create(name="IT")
+        user = User.objects.create_user(
+            username="taken@example.com", email="taken@example.com", password="securepass123",
+            first_name="Old", last_name="Timer",
+        )
+        Employee.objects.create(
+            user=user, phone="9812345670", department=self.department,
+            date_of_joining=timezone.now(), status=Employee.STATUS_ACTIVE,
+        )
+
+    def run_import(self, *lines, **kwargs):
+        return EmployeeImporter(**kwargs).run(read_rows(csv_file(*lines), "staff.csv"))
+
+    def test_imports_users_employees_profiles_and_schedules(self):
+        report = self.run_import(*(employee_line(i) for i in range(30)), chunk_size=10)
+
+        self.assertEqual((report["total"], report["created"], report["failed"]), (30, 30, 0))
+        imported = Employee.objects.filter(user__email__startswith="new")
+        self.assertEqual(imported.count(), 30)
+        self.assertEqual(EmployeeProfile.objects.filter(employee__in=imported).count(), 30)
+        self.assertEqual(EmployeeSchedule.objects.filter(employee__in=imported).count(), 30)
+        codes = set(imported.values_list("employee_code", flat=True))
+        self.assertEqual(len(codes), 30)
+        self.assertTrue(all(code.startswith("IT-") for code in codes))
+        self.assertEqual(len(report["invites"]), 30)
+        self.assertFalse(User.objects.get(email="new0@example.com").has_usable_password())
+
+    def test_query_count_does_not_grow_with_rows(self):
+        with CaptureQueriesContext(connection) as small:
+            self.run_import(*(employee_line(i) for i in range(2)))
+        with CaptureQueriesContext(connection) as large:
+            self.run_import(*(employee_line(i) for i in range(100, 160)))
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+    def test_reports_row_errors_and_imports_the_rest(self):
+        report = self.run_import(
+            employee_line(1),
+            employee_line(2, email="taken@example.com"),
+            employee_line(3, phone="9812345670"),
+            employee_line(4, email="new1@example.com", phone="9800000099"),
+            employee_line(5, department="Nowhere"),
+            employee_line(6, first_name="Old", last_name="Timer"),
+            employee_line(7, password="short"),
+        )
+        errors = {error["row"]: error["errors"] for error in report["errors"]}
+        self.assertEqual(report["created"], 1)
+        self.assertIn("email", errors[3])
+        self.assertIn("phone", errors[4])
+        self.assertIn("email", errors[5])
+        self.assertIn("department", errors[6])
+        self.assertIn("name", errors[7])
+        self.assertIn("password", errors[8])
+
+    def test_passwords_are_hashed_when_given(self):
+        self.run_import(employee_line(1, password="longenough1"), employee_line(2, password="longenough2"))
+        self.assertTrue(User.objects.get(email="new1@example.com").check_password("longenough1"))
+
+    def test_imported_passwords_are_upgraded_on_login(self):
+        self.run_import(employee_line(1, password="longenough1"))
+        user = User.objects.get(email="new1@example.com")
+        self.assertTrue(user.password.startswith("pbkdf2_sha256_import$"))
+
+        self.assertTrue(user.check_password("longenough1"))
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith("pbkdf2_sha256$"))
+        self.assertTrue(user.check_password("longenough1"))
+
+    def test_dry_run_writes_nothing(self):
+        report = self.run_import(employee_line(1), dry_run=True)
+        self.assertEqual((report["valid"], report["created"]), (1, 0))
+        self.assertFalse(User.objects.filter(email="new1@example.com").exists())
+
+    def test_missing_columns_reject_the_file(self):
+        with self.assertRaises(ImportFileError):
+            list(read_rows(io.BytesIO(b"email,phone\n"), "staff.csv"))
+
+    def test_xlsx_file(self):
+        from openpyxl import Workbook
+
+        workbook = Workbook()
+        for line in (HEADER.strip(), employee_line(1), employee_line(2)):
+            workbook.active.append(line.split(","))
+        fileobj = io.BytesIO()
+        workbook.save(fileobj)
+        fileobj.seek(0)
+
+        report = EmployeeImporter().run(read_rows(fileobj, "staff.xlsx"))
+        self.assertEqual((report["total"], report["created"], report["failed"]), (2, 2, 0))
+
+    def test_management_command(self):
+        out = io.StringIO()
+        with tempfile.NamedTemporaryFile(suffix=".csv") as fileobj:
+            fileobj.write(csv_file(employee_line(1)).getvalue())
+            fileobj.flush()
+            call_command("import_employees", fileobj.name, stdout=out)
+        self.assertIn("1 created", out.getvalue())
+
+
+class EmployeeImportAPITest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.department = Department.objects.create(name="IT")
+        hr = User.objects.create_user(username="hr@example.com", email="hr@example.com", password="securepass123")
+        Employee.objects.create(
+            user=hr, phone="9812345670", department=self.department, role=Employee.HR,
+            date_of_joining=timezone.now(), status=Employee.STATUS_ACTIVE,
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(hr).access_token}")
+        self.url = reverse("employee:employee-import-employees")
+
+    def upload(self, *lines):
+        return SimpleUploadedFile("staff.csv", csv_file(*lines).getvalue(), content_type="text/csv")
+
+    def test_upload_returns_report(self):
+        response = self.client.post(self.url, {"file": self.upload(employee_line(1), employee_line(2, phone="1"))})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["created"], 1)
+        self.assertEqual(response.data["errors"][0]["row"], 3)
+
+    def test_missing_file(self):
+        response = self.client.post(self.url, {})
+        self.assertEqual(response.status_code, 400)
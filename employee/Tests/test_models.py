@@ -4,7 +4,9 @@ from django.contrib.auth import get_user_model
 from django.utils import timezone
 from employee.models import Department, Employee, Leave, WorkingHour, EmployeeSchedule
 from django.core.exceptions import ValidationError
-from datetime import timedelta
+from datetime import time, timedelta
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from unittest.mock import patch
 
 User = get_user_model()
@@ -20,6 +22,15 @@ class DepartmentModelTest(TestCase):
         dept2 = Department.objects.create(name="Finance2")
         self.assertNotEqual(dept1.department_code, dept2.department_code)
 
+    def test_tracks_name_changes(self):
+        dept = Department.objects.create(name="Tracked")
+        dept = Department.objects.get(pk=dept.pk)
+        self.assertFalse(dept.has_changed("name"))
+        dept.name = "Renamed"
+        self.assertEqual(dept.get_tracked_changes(), {"name": "Tracked"})
+        dept.save()
+        self.assertFalse(dept.has_changed("name"))
+
     def test_clean_rejects_equal_start_end_time(self):
         dept = Department(name="Test", working_start_time="09:00", working_end_time="09:00")
         with self.assertRaises(ValidationError) as cm:
@@ -261,4 +272,64 @@ class EmployeeScheduleModelTest(TestCase):
 
         self.schedule.update_availability()
         self.schedule.refresh_from_db()
-        self.assertEqual(self.schedule.availability, "on_leave")
\ No newline at end of file
+        self.assertEqual(self.schedule.availability, "on_leave")
+
+class DepartmentPropagationTest(TestCase):
+    def setUp(self):
+        self.dept = Department.objects.create(name="Operations", working_start_time="09:00", working_end_time="17:00")
+        for i in range(3):
+            Employee.objects.create(
+                phone=f"98123400{i:02d}", department=self.dept,
+                date_of_joining=timezone.now(), status=Employee.STATUS_ACTIVE,
+            )
+        self.dept = Department.objects.get(pk=self.dept.pk)
+
+    def employee_updates(self, queries):
+        return [q for q in queries if q["sql"].startswith('UPDATE "employee_employee"')]
+
+    def test_description_change_does_not_touch_employees(self):
+        self.dept.description = "Keeps the lights on"
+        with CaptureQueriesContext(connection) as ctx:
+            self.dept.save()
+        self.assertEqual(self.employee_updates(ctx.captured_queries), [])
+
+    def test_hours_change_is_copied_and_reported(self):
+        self.dept.working_start_time = "10:00"
+        self.dept.working_end_time = "18:00"
+        with self.assertLogs("employee.signals", level="INFO") as logs:
+            self.dept.save()
+        self.assertIn("copied to 3 employee(s)", logs.output[0])
+        self.assertEqual(
+            set(self.dept.employees.values_list("working_start_time", flat=True)),
+            {time(10, 0)},
+        )
+
+    def test_hours_change_refreshes_availability(self):
+        for emp in Employee.objects.filter(department=self.dept)[:2]:
+            EmployeeSchedule.objects.create(employee=emp)
+        self.dept.working_start_time = "10:00"
+        self.dept.working_end_time = "18:00"
+        with patch.object(EmployeeSchedule, "update_availability") as refresh:
+            with self.assertLogs("employee.signals", level="INFO") as logs:
+                self.dept.save()
+        self.assertEqual(refresh.call_count, 2)
+        self.assertIn("2 schedule(s) refreshed", logs.output[0])
+
+    def test_moving_department_takes_new_hours_and_refreshes_availability(self):
+        night = Department.objects.create(name="Night", working_start_time="22:00", working_end_time="06:00")
+        emp = Employee.objects.filter(department=self.dept).first()
+        EmployeeSchedule.objects.create(employee=emp)
+        emp.department = night
+        with patch.object(EmployeeSchedule, "update_availability") as refresh:
+            emp.save()
+        emp.refresh_from_db()
+        self.assertEqual(emp.working_start_time, time(22, 0))
+        refresh.assert_called_once()
+
+    def test_unrelated_employee_change_skips_availability(self):
+        emp = Employee.objects.filter(department=self.dept).first()
+        EmployeeSchedule.objects.create(employee=emp)
+        emp.position = "Operator"
+        with patch.object(EmployeeSchedule, "update_availability") as refresh:
+            emp.save()
+        refresh.assert_not_called()
@@ -0,0 +1,80 @@
+# employee/tests/test_sequences.py
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from employee.models import CodeSequence, Department, Employee
+from employee.sequences import allocate, allocate_employee_codes
+
+
+class AllocateTest(TestCase):
+    def test_new_key_starts_after_seed(self):
+        self.assertEqual(allocate("test:a"), 1)
+        self.assertEqual(allocate("test:b", seed=41), 42)
+        self.assertEqual(allocate("test:b", seed=lambda: 1000), 43)
+
+    def test_bulk_allocation_reserves_a_block(self):
+        self.assertEqual(allocate("test:bulk", count=1000), 1)
+        self.assertEqual(allocate("test:bulk"), 1001)
+        self.assertEqual(CodeSequence.objects.get(key="test:bulk").last_value, 1001)
+
+    def test_bulk_allocation_cost_does_not_grow_with_count(self):
+        allocate("test:cost")
+        with CaptureQueriesContext(connection) as one:
+            allocate("test:cost", count=1)
+        with CaptureQueriesContext(connection) as many:
+            allocate("test:cost", count=1000)
+        self.assertEqual(len(one.captured_queries), len(many.captured_queries))
+
+    def test_rejects_empty_allocation(self):
+        with self.assertRaises(ValueError):
+            allocate("test:zero", count=0)
+
+
+class EmployeeCodeAllocationTest(TestCase):
+    def setUp(self):
+        self.dept = Department.objects.create(name="Engineering")
+        self.joined = timezone.now()
+
+    def create_employee(self, phone, **kwargs):
+        return Employee.objects.create(
+            phone=phone, department=self.dept, date_of_joining=self.joined,
+            status=Employee.STATUS_ACTIVE, **kwargs
+        )
+
+    def test_bulk_codes_are_consecutive(self):
+        date_part = self.joined.strftime("%Y%m")
+        codes = allocate_employee_codes(self.dept, self.joined, count=3)
+        self.assertEqual(codes, [f"ENG-{date_part}-001", f"ENG-{date_part}-002", f"ENG-{date_part}-003"])
+        emp = self.create_employee("9812345601")
+        self.assertEqual(emp.employee_code, f"ENG-{date_part}-004")
+
+    def test_sequence_continues_from_existing_codes(self):
+        date_part = self.joined.strftime("%Y%m")
+        self.create_employee("9812345601", employee_code=f"ENG-{date_part}-007")
+        emp = self.create_employee("9812345602")
+        self.assertEqual(emp.employee_code, f"ENG-{date_part}-008")
+
+    def test_deleting_an_employee_does_not_reuse_its_code(self):
+        first = self.create_employee("9812345601")
+        second = self.create_employee("9812345602")
+        code = second.employee_code
+        second.delete()
+        third = self.create_employee("9812345603")
+        self.assertNotEqual(third.employee_code, code)
+        self.assertNotEqual(third.employee_code, first.employee_code)
+
+
+class DepartmentCodeAllocationTest(TestCase):
+    def test_codes_continue_after_existing_departments(self):
+        Department.objects.create(name="Legacy", department_code="LEG041")
+        dept = Department.objects.create(name="Finance")
+        self.assertEqual(dept.department_code, "FIN042")
+
+    def test_create_does_not_lock_or_scan_departments(self):
+        Department.objects.create(name="Warmup")
+        with CaptureQueriesContext(connection) as ctx:
+            Department.objects.create(name="Support")
+        sql = " ".join(q["sql"] for q in ctx.captured_queries).upper()
+        self.assertNotIn("FOR UPDATE", sql)
+        self.assertNotIn('"EMPLOYEE_DEPARTMENT"."NAME" =', sql)
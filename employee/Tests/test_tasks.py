@@ -0,0 +1,58 @@
+# employee/tests/test_tasks.py
+from unittest.mock import patch
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from employee.models import Department, Employee
+from employee.tasks import recode_department_employees
+
+
+class DepartmentRenameTest(TestCase):
+    def setUp(self):
+        self.dept = Department.objects.create(name="Engineering", department_code="ENG007")
+        self.joined = timezone.now()
+        self.date_part = self.joined.strftime("%Y%m")
+        self.employees = [
+            Employee.objects.create(
+                phone=f"98123456{i:02d}", department=self.dept,
+                date_of_joining=self.joined, status=Employee.STATUS_ACTIVE,
+            )
+            for i in range(5)
+        ]
+
+    @patch("employee.signals.publish")
+    def test_rename_recodes_department_and_queues_employee_job(self, publish):
+        self.dept.name = "Platform"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.dept.save()
+
+        self.dept.refresh_from_db()
+        self.assertEqual(self.dept.department_code, "PLA007")
+        publish.assert_called_once_with(recode_department_employees, self.dept.pk)
+
+    @patch("employee.signals.publish")
+    def test_save_without_rename_does_not_recode(self, publish):
+        dept = Department.objects.get(pk=self.dept.pk)
+        dept.description = "Builds things"
+        with self.captureOnCommitCallbacks(execute=True):
+            dept.save()
+        publish.assert_not_called()
+        dept.refresh_from_db()
+        self.assertEqual(dept.department_code, "ENG007")
+
+    def test_recode_job_rewrites_prefix_in_chunked_updates(self):
+        Department.objects.filter(pk=self.dept.pk).update(name="Platform")
+        with CaptureQueriesContext(connection) as ctx:
+            updated = recode_department_employees(self.dept.pk, chunk_size=2)
+
+        self.assertEqual(updated, 5)
+        codes = sorted(Employee.objects.filter(department=self.dept).values_list("employee_code", flat=True))
+        self.assertEqual(codes, [f"PLA-{self.date_part}-{n:03d}" for n in range(1, 6)])
+        updates = [q for q in ctx.captured_queries if q["sql"].startswith("UPDATE")]
+        self.assertEqual(len(updates), 3)
+
+    def test_recode_job_is_idempotent(self):
+        Department.objects.filter(pk=self.dept.pk).update(name="Platform")
+        recode_department_employees(self.dept.pk)
+        self.assertEqual(recode_department_employees(self.dept.pk), 0)
@@ -0,0 +1,103 @@
+"""
+Cached department directory.
+
+Departments and their working hours change rarely but are listed on every
+page load. The directory loads them with one LEFT JOIN query and keeps the
+rows in the cache. DepartmentViewSet and DepartmentWorkingHourViewSet build
+their lists from those rows. is_open is still computed per request from the
+cached shift times.
+
+The cache key carries a directory version, which is replaced after every
+commit that saves or deletes a Department, a WorkingHour or a Project. An
+employee's departments come from their project memberships. They are cached
+per employee and dropped when the employee joins or leaves a project.
+"""
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Department, WorkingHour
+
+VERSION_KEY = "department-directory:version"
+
+DEPARTMENT_FIELDS = tuple(field.attname for field in Department._meta.concrete_fields)
+HOUR_FIELDS = ("id", "days_of_week", "start_time", "end_time")
+
+
+def _version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # a fresh random version can never meet entries left from an earlier one
+        cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def directory_key(version):
+    return f"department-directory:{version}"
+
+
+def member_key(version, employee_id):
+    return f"department-directory:{version}:member:{employee_id}"
+
+
+def build_directory():
+    """{"departments": [field dicts by id], "hours": {department id: [hour dicts]}} in one query."""
+    rows = Department.objects.order_by("id", "working_hours__id").values(
+        *DEPARTMENT_FIELDS, *(f"working_hours__{name}" for name in HOUR_FIELDS),
+    )
+    departments, hours = [], {}
+    for row in rows:
+        department_id = row["id"]
+        if department_id not in hours:
+            departments.append({name: row[name] for name in DEPARTMENT_FIELDS})
+            hours[department_id] = []
+        if row["working_hours__id"] is not None:
+            hours[department_id].append({name: row[f"working_hours__{name}"] for name in HOUR_FIELDS})
+    return {"departments": departments, "hours": hours}
+
+
+def get_directory():
+    return cache.get_or_set(directory_key(_version()), build_directory, settings.DIRECTORY_CACHE_SECONDS)
+
+
+def departments(ids=None):
+    """
+    Department instances from the directory, ordered by id; only `ids` when
+    given. Each carries its WorkingHour list as `directory_working_hours`.
+    """
+    directory = get_directory()
+    result = []
+    for fields in directory["departments"]:
+        if ids is not None and fields["id"] not in ids:
+            continue
+        department = Department(**fields)
+        department._state.adding = False
+        department.directory_working_hours = [
+            WorkingHour(department=department, **hour) for hour in directory["hours"].get(fields["id"], ())
+        ]
+        result.append(department)
+    return result
+
+
+def member_department_ids(employee):
+    """Ids of the departments of the projects `employee` is a member of."""
+    from projects.models import Project
+
+    return set(cache.get_or_set(
+        member_key(_version(), employee.pk),
+        lambda: list(Project.objects.filter(members=employee).values_list("department_id", flat=True).distinct()),
+        settings.DIRECTORY_CACHE_SECONDS,
+    ))
+
+
+def invalidate():
+    """Start a new directory version once the current transaction commits."""
+    transaction.on_commit(lambda: cache.set(VERSION_KEY, uuid.uuid4().hex, None))
+
+
+def membership_changed(employee_ids):
+    keys = [member_key(_version(), employee_id) for employee_id in employee_ids]
+    transaction.on_commit(lambda: cache.delete_many(keys))
@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class ImportPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2 with fewer iterations, used only for passwords set by the bulk import so a
+    chunk can be hashed inside the request. It is not the preferred hasher, so Django
+    rehashes the password with the default one on the user's first successful login.
+    """
+    algorithm = "pbkdf2_sha256_import"
+
+    @property
+    def iterations(self):
+        return settings.EMPLOYEE_IMPORT_HASH_ITERATIONS
@@ -0,0 +1,315 @@
+"""
+Bulk employee import from CSV or XLSX.
+
+Rows are read lazily and processed in chunks. Each chunk is validated with a
+handful of set-based queries (existing emails, phones and names per
+department), passwords are hashed in-process with the cheaper import hasher
+(employee/hashers.py), and users, employees, profiles and schedules are
+inserted with bulk_create in one transaction per chunk. Rows without a password get an unusable one and are listed under
+"invites" in the report so they can be sent a password reset link.
+
+Columns: email, first_name, last_name, phone, department (id or name), dob,
+gender, address, position, role, date_of_joining, password
+"""
+import csv
+import io
+from datetime import date, datetime, time
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .hashers import ImportPBKDF2PasswordHasher
+from .models import Department, Employee, EmployeeProfile, EmployeeSchedule
+from .sequences import allocate_employee_codes
+
+User = get_user_model()
+
+REQUIRED_COLUMNS = ("email", "phone", "department", "dob", "gender", "address")
+GENDERS = {code for code, _ in Employee.GENDER_CHOICES}
+ROLES_BY_NAME = {label.lower(): value for value, label in Employee.ROLE_CHOICES}
+MIN_PASSWORD_LENGTH = 8
+IMPORT_HASHER = ImportPBKDF2PasswordHasher.algorithm
+
+
+class ImportFileError(Exception):
+    """The file as a whole cannot be read (unknown format, missing columns, ...)."""
+
+
+def read_rows(fileobj, filename):
+    """Yield (row_number, dict) pairs from a CSV or XLSX upload without loading it whole."""
+    name = (filename or "").lower()
+    if name.endswith(".xlsx"):
+        rows = _xlsx_rows(fileobj)
+    elif name.endswith(".csv") or not name:
+        rows = _csv_rows(fileobj)
+    else:
+        raise ImportFileError("Unsupported file type, upload a .csv or .xlsx file.")
+
+    header = next(rows, None)
+    if not header:
+        raise ImportFileError("The file is empty.")
+    header = [str(col or "").strip().lower() for col in header]
+    missing = [col for col in REQUIRED_COLUMNS if col not in header]
+    if missing:
+        raise ImportFileError(f"Missing column(s): {', '.join(missing)}")
+
+    for number, values in enumerate(rows, start=2):
+        if not any(value not in (None, "") for value in values):
+            continue
+        yield number, {col: value for col, value in zip(header, values) if col}
+
+
+def _csv_rows(fileobj):
+    if isinstance(fileobj, io.TextIOBase):
+        text = fileobj
+    else:
+        text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    yield from csv.reader(text)
+
+
+def _xlsx_rows(fileobj):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportFileError("XLSX import needs the openpyxl package, upload a .csv file instead.")
+    workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        yield from workbook.active.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def _text(row, column):
+    value = row.get(column)
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def _date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return parse_date(_text({"v": value}, "v"))
+
+
+def _datetime(value):
+    if isinstance(value, datetime):
+        parsed = value
+    elif isinstance(value, date):
+        parsed = datetime.combine(value, time.min)
+    else:
+        text = _text({"v": value}, "v")
+        parsed = parse_datetime(text)
+        if parsed is None and parse_date(text):
+            parsed = datetime.combine(parse_date(text), time.min)
+    if parsed is not None and timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+class EmployeeImporter:
+    def __init__(self, chunk_size=None, dry_run=False):
+        self.chunk_size = chunk_size or settings.EMPLOYEE_IMPORT_CHUNK_SIZE
+        self.dry_run = dry_run
+        self.report = {"total": 0, "valid": 0, "created": 0, "failed": 0, "errors": [], "invites": []}
+        self._seen_emails = set()
+        self._seen_phones = set()
+        self._seen_names = set()
+
+    def run(self, rows):
+        """Import `rows` ((row_number, dict) pairs, see read_rows) and return the report."""
+        departments = list(Department.objects.all())
+        self._departments_by_id = {str(dept.pk): dept for dept in departments}
+        self._departments_by_name = {dept.name.lower(): dept for dept in departments}
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                break
+            self._import_chunk(chunk)
+        return self.report
+
+    def _fail(self, number, errors):
+        self.report["failed"] += 1
+        self.report["errors"].append({"row": number, "errors": errors})
+
+    def _import_chunk(self, chunk):
+        self.report["total"] += len(chunk)
+        parsed = []
+        for number, row in chunk:
+            data, errors = self._parse(row)
+            if errors:
+                self._fail(number, errors)
+            else:
+                parsed.append((number, data))
+
+        valid = self._check_uniqueness(parsed)
+        self.report["valid"] += len(valid)
+        if not valid or self.dry_run:
+            return
+
+        hashes = self._hash_passwords([data["password"] for _, data in valid])
+        try:
+            with transaction.atomic():
+                self._insert(valid, hashes)
+        except IntegrityError:
+            # a concurrent request took one of the emails/phones after validation
+            for number, _ in valid:
+                self._fail(number, {"non_field_errors": ["Conflicts with a record created during the import, retry this row."]})
+            return
+
+        self.report["created"] += len(valid)
+        self.report["invites"].extend(data["email"] for _, data in valid if not data["password"])
+
+    def _parse(self, row):
+        errors = {}
+        data = {column: _text(row, column) for column in (
+            "email", "first_name", "last_name", "phone", "address", "position", "password",
+        )}
+
+        for column in REQUIRED_COLUMNS:
+            if not _text(row, column):
+                errors[column] = ["This field is required."]
+
+        if data["email"] and "email" not in errors:
+            try:
+                validate_email(data["email"])
+            except ValidationError:
+                errors["email"] = ["Enter a valid email address."]
+            data["email"] = User.objects.normalize_email(data["email"])
+
+        phone = data["phone"]
+        if phone and not (phone.isdigit() and 9600000000 <= int(phone) <= 9899999999):
+            errors["phone"] = ["Phone must be a valid 10-digit Nepali number"]
+
+        department = _text(row, "department")
+        data["department"] = self._departments_by_id.get(department) or self._departments_by_name.get(department.lower())
+        if department and data["department"] is None:
+            errors["department"] = [f"Unknown department: {department}"]
+
+        data["dob"] = _date(row.get("dob"))
+        if _text(row, "dob") and data["dob"] is None:
+            errors["dob"] = ["Use the YYYY-MM-DD format."]
+
+        data["gender"] = _text(row, "gender").upper()[:1]
+        if data["gender"] and data["gender"] not in GENDERS:
+            errors["gender"] = ["Gender must be M, F or O."]
+
+        role = _text(row, "role")
+        data["role"] = Employee.EMPLOYEE
+        if role:
+            data["role"] = int(role) if role.isdigit() else ROLES_BY_NAME.get(role.lower())
+            if data["role"] not in dict(Employee.ROLE_CHOICES):
+                errors["role"] = [f"Unknown role: {role}"]
+
+        data["date_of_joining"] = timezone.now()
+        if _text(row, "date_of_joining"):
+            data["date_of_joining"] = _datetime(row.get("date_of_joining"))
+            if data["date_of_joining"] is None:
+                errors["date_of_joining"] = ["Use the YYYY-MM-DD format."]
+
+        if data["password"] and len(data["password"]) < MIN_PASSWORD_LENGTH:
+            errors["password"] = [f"Ensure this field has at least {MIN_PASSWORD_LENGTH} characters."]
+
+        return data, errors
+
+    def _check_uniqueness(self, parsed):
+        """Drop rows that clash with the database or an earlier row, with three queries per chunk."""
+        if not parsed:
+            return []
+        emails = {data["email"].lower() for _, data in parsed}
+        phones = {data["phone"] for _, data in parsed}
+        last_names = {data["last_name"].lower() for _, data in parsed}
+        department_ids = {data["department"].pk for _, data in parsed}
+
+        taken_emails = set()
+        for email, username in (
+            User.objects.annotate(email_lower=Lower("email"), username_lower=Lower("username"))
+            .filter(Q(email_lower__in=emails) | Q(username_lower__in=emails))
+            .values_list("email_lower", "username_lower")
+        ):
+            taken_emails.update((email, username))
+        taken_phones = set(Employee.objects.filter(phone__in=phones).values_list("phone", flat=True))
+        taken_names = set(
+            Employee.objects.annotate(first=Lower("user__first_name"), last=Lower("user__last_name"))
+            .filter(department_id__in=department_ids, last__in=last_names)
+            .values_list("first", "last", "department_id")
+        )
+
+        valid = []
+        for number, data in parsed:
+            email = data["email"].lower()
+            name = (data["first_name"].lower(), data["last_name"].lower(), data["department"].pk)
+            errors = {}
+            if email in taken_emails or email in self._seen_emails:
+                errors["email"] = ["This email is already registered."]
+            if data["phone"] in taken_phones or data["phone"] in self._seen_phones:
+                errors["phone"] = ["This phone number is already registered."]
+            if data["first_name"] and data["last_name"] and (name in taken_names or name in self._seen_names):
+                errors["name"] = ["This name already exists in this department."]
+            if errors:
+                self._fail(number, errors)
+                continue
+            self._seen_emails.add(email)
+            self._seen_phones.add(data["phone"])
+            self._seen_names.add(name)
+            valid.append((number, data))
+        return valid
+
+    def _hash_passwords(self, passwords):
+        """Hash with the import hasher (upgraded on first login); blank passwords become unusable."""
+        return [make_password(password or None, hasher=IMPORT_HASHER) for password in passwords]
+
+    def _insert(self, valid, hashes):
+        users = User.objects.bulk_create([
+            User(
+                username=data["email"], email=data["email"], password=password_hash,
+                first_name=data["first_name"], last_name=data["last_name"],
+            )
+            for (_, data), password_hash in zip(valid, hashes)
+        ])
+
+        groups = {}
+        for index, (_, data) in enumerate(valid):
+            month = data["date_of_joining"].strftime("%Y%m")
+            groups.setdefault((data["department"].pk, month), []).append(index)
+        codes = [None] * len(valid)
+        for indexes in groups.values():
+            first = valid[indexes[0]][1]
+            allocated = allocate_employee_codes(first["department"], first["date_of_joining"], len(indexes))
+            for index, code in zip(indexes, allocated):
+                codes[index] = code
+
+        employees = Employee.objects.bulk_create([
+            Employee(
+                user=user, phone=data["phone"], dob=data["dob"], address=data["address"],
+                gender=data["gender"], position=data["position"], role=data["role"],
+                department=data["department"], date_of_joining=data["date_of_joining"],
+                employee_code=code, status=Employee.STATUS_ACTIVE,
+                working_start_time=data["department"].working_start_time,
+                working_end_time=data["department"].working_end_time,
+            )
+            for (_, data), user, code in zip(valid, users, codes)
+        ])
+
+        EmployeeProfile.objects.bulk_create([EmployeeProfile(employee=employee) for employee in employees])
+        EmployeeSchedule.objects.bulk_create([
+            EmployeeSchedule(
+                employee=employee,
+                availability="available" if employee.department.is_on_shift() else "off_shift",
+            )
+            for employee in employees
+        ])
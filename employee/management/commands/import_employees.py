@@ -0,0 +1,36 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from employee.importer import EmployeeImporter, ImportFileError, read_rows
+
+
+class Command(BaseCommand):
+    help = "Bulk import employees from a CSV or XLSX file (see employee/importer.py for the columns)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Path to the .csv or .xlsx file")
+        parser.add_argument("--chunk-size", type=int, default=None, help="Rows per transaction")
+        parser.add_argument("--dry-run", action="store_true", help="Validate only, write nothing")
+        parser.add_argument("--report", help="Write the full JSON report to this file")
+
+    def handle(self, *args, **options):
+        importer = EmployeeImporter(chunk_size=options["chunk_size"], dry_run=options["dry_run"])
+        try:
+            with open(options["path"], "rb") as fileobj:
+                report = importer.run(read_rows(fileobj, options["path"]))
+        except (OSError, ImportFileError) as exc:
+            raise CommandError(str(exc))
+
+        if options["report"]:
+            with open(options["report"], "w") as out:
+                json.dump(report, out, indent=2)
+
+        for error in report["errors"][:20]:
+            self.stderr.write(f"row {error['row']}: {error['errors']}")
+        if len(report["errors"]) > 20:
+            self.stderr.write(f"... and {len(report['errors']) - 20} more, see --report")
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['total']} row(s): {report['valid']} valid, {report['created']} created, "
+            f"{report['failed']} failed, {len(report['invites'])} need an invite"
+        ))
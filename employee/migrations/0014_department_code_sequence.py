@@ -0,0 +1,39 @@
+import re
+
+from django.db import migrations
+
+SEQUENCE = "employee_department_code_seq"
+
+
+def create_sequence(apps, schema_editor):
+    """On PostgreSQL, back department codes with a native sequence continuing after the existing codes."""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    Department = apps.get_model("employee", "Department")
+    numbers = [
+        int(match.group(1))
+        for match in (re.search(r"(\d+)$", code or "") for code in Department.objects.values_list("department_code", flat=True))
+        if match
+    ]
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"CREATE SEQUENCE IF NOT EXISTS {SEQUENCE}")
+        if numbers:
+            cursor.execute("SELECT setval(%s, %s)", [SEQUENCE, max(numbers)])
+
+
+def drop_sequence(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"DROP SEQUENCE IF EXISTS {SEQUENCE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee', '0013_codesequence'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_sequence, drop_sequence),
+    ]
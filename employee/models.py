@@ -1,5 +1,5 @@
 # employee/models.py
-from django.db import models, transaction
+from django.db import models
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import AbstractUser
 from django.utils.translation import gettext_lazy as _
@@ -8,6 +8,7 @@ from django.utils import timezone
 from django.core.exceptions import ValidationError
 from multiselectfield import MultiSelectField
 from datetime import datetime, time, timedelta
+from .sequences import allocate_department_code, allocate_employee_codes
 
 User = get_user_model()
 """
@@ -20,7 +21,78 @@ class Timestamp(models.Model):
     class Meta:
         abstract = True
 
-class Department(models.Model):
+"""
+Remembers the loaded values of `tracked_fields` so save() knows what actually changed.
+During save (and so inside pre_save/post_save receivers) `saved_changes` maps
+each changed field to its previous value; new instances report every tracked field.
+"""
+class TrackedFieldsMixin:
+    tracked_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot_tracked_fields()
+        return instance
+
+    def _tracked_value(self, name):
+        field = self._meta.get_field(name)
+        value = self.__dict__.get(field.attname)
+        return field.to_python(value) if value is not None else None
+
+    def _snapshot_tracked_fields(self, names=None):
+        deferred = self.get_deferred_fields()
+        initial = getattr(self, "_tracked_initial", {}) if names is not None else {}
+        for name in self.tracked_fields:
+            attname = self._meta.get_field(name).attname
+            if attname not in deferred and (names is None or name in names or attname in names):
+                initial[name] = self._tracked_value(name)
+        self._tracked_initial = initial
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        self._snapshot_tracked_fields(fields)
+
+    def get_tracked_changes(self):
+        initial = getattr(self, "_tracked_initial", None)
+        if initial is None or self._state.adding:
+            return {name: None for name in self.tracked_fields}
+        return {
+            name: old for name, old in initial.items()
+            if self._tracked_value(name) != old
+        }
+
+    def has_changed(self, *names):
+        changes = getattr(self, "saved_changes", None)
+        if changes is None:
+            changes = self.get_tracked_changes()
+        return any(name in changes for name in names)
+
+    def save(self, *args, **kwargs):
+        changes = self.get_tracked_changes()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            changes = {name: old for name, old in changes.items() if name in update_fields}
+        self.saved_changes = changes
+        try:
+            super().save(*args, **kwargs)
+        finally:
+            del self.saved_changes
+        self._snapshot_tracked_fields(update_fields)
+
+"""
+Counter rows for human-readable codes, one row per key (see employee/sequences.py)
+"""
+class CodeSequence(models.Model):
+    key = models.CharField(max_length=100, unique=True)
+    last_value = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.key}: {self.last_value}"
+
+class Department(TrackedFieldsMixin, models.Model):
+    tracked_fields = ("name", "working_start_time", "working_end_time")
+
     name = models.CharField(_('Name'), max_length=50, unique=True, db_index=True)
     description = models.TextField(_('Description'), blank=True, null=True)
     department_code = models.CharField(max_length=100, blank=True)
@@ -76,13 +148,10 @@ class Department(models.Model):
         return self.name
 
     def save(self, *args, **kwargs):
-        self.full_clean()
+        # name uniqueness is enforced by the DB constraint and DepartmentSerializer
+        self.full_clean(validate_unique=False)
         if not self.department_code:
-            prefix = self.name[:3].upper()
-            with transaction.atomic():
-                last_dept = Department.objects.select_for_update().order_by('-id').first()
-                next_num = (last_dept.id + 1) if last_dept else 1
-                self.department_code = f"{prefix}{next_num:03d}"
+            self.department_code = allocate_department_code(self.name)
         super().save(*args, **kwargs)
 
 # Validation for Nepali phone numbers
@@ -90,7 +159,7 @@ nepali_phone_regex = RegexValidator(
     regex=r'^9[6-8]\d{8}$',
     message=_("Kindly enter valid phone numbers")
 )
-class Employee(Timestamp):
+class Employee(TrackedFieldsMixin, Timestamp):
     GENDER_CHOICES = [
         ('M', "Male"),
         ('F', 'Female'),
@@ -117,6 +186,7 @@ class Employee(Timestamp):
         (EMPLOYEE, 'Employee'),
         (ADMIN, 'Admin'),
     ]
+    tracked_fields = ("department", "working_start_time", "working_end_time", "status")
 
     user = models.OneToOneField(
         User,
@@ -155,25 +225,17 @@ class Employee(Timestamp):
         return self.user.get_full_name() if self.user else f"Employee {self.id}"
 
     def save(self, *args, **kwargs):
-    # Set working hours from department if not already set
+    # Set working hours from department if not already set, or if the employee moved department
         if self.department:
-            if not self.working_start_time:
+            moved = not self._state.adding and self.has_changed("department")
+            if not self.working_start_time or (moved and not self.has_changed("working_start_time")):
                 self.working_start_time = self.department.working_start_time
-            if not self.working_end_time:
+            if not self.working_end_time or (moved and not self.has_changed("working_end_time")):
                 self.working_end_time = self.department.working_end_time
 
         # Generate employee code if not set
         if not self.employee_code and self.department and self.date_of_joining:
-            with transaction.atomic():
-                existing_count = Employee.objects.filter(
-                    department=self.department,
-                    date_of_joining__year=self.date_of_joining.year,
-                    date_of_joining__month=self.date_of_joining.month,
-                ).select_for_update().count()
-
-                dept_code = self.department.name[:3].upper()
-                date_part = self.date_of_joining.strftime("%Y%m")
-                self.employee_code = f"{dept_code}-{date_part}-{existing_count + 1:03d}"
+            self.employee_code = allocate_employee_codes(self.department, self.date_of_joining)[0]
 
         super().save(*args, **kwargs)
     @property
@@ -243,7 +305,7 @@ class WorkingHour(Timestamp):
     def __str__(self):
         return f"{self.department.name} - {self.days_of_week}: {self.start_time} to {self.end_time}"
 
-class EmployeeSchedule(Timestamp):
+class EmployeeSchedule(TrackedFieldsMixin, Timestamp):
     STATUS_CHOICES = [
     ('available', 'Available'),
     ('on_leave', 'On Leave'),
@@ -251,6 +313,8 @@ class EmployeeSchedule(Timestamp):
     ]
     employee = models.OneToOneField(Employee, on_delete=models.SET_NULL, null = True, blank = True)
     availability = models.CharField(max_length=20,choices = STATUS_CHOICES, default="available")
+    tracked_fields = ("availability",)
+
     def update_availability(self):
         if not self.employee or not self.employee.department:
             self.availability = "off_shift"
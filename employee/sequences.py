@@ -0,0 +1,112 @@
+"""
+Counters for human-readable codes (employee codes, department codes, ...).
+
+Each key has one CodeSequence row. allocate() bumps it with a single
+UPDATE ... SET last_value = last_value + n, so a caller reserves a whole block
+of numbers at once and only ever locks that one row, for the duration of the
+UPDATE's transaction. Nothing scans or locks the rows the codes end up on.
+
+Keys listed in DB_SEQUENCES are backed by a native sequence on PostgreSQL
+instead (created in migrations). nextval() is not transactional, so
+concurrent callers never wait on each other, at the cost of gaps when a
+transaction rolls back.
+"""
+import re
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+
+DEPARTMENT_SEQUENCE = "department"
+
+DB_SEQUENCES = {
+    DEPARTMENT_SEQUENCE: "employee_department_code_seq",
+}
+
+_TRAILING_NUMBER = re.compile(r"(\d+)$")
+
+
+def allocate(key, count=1, seed=0):
+    """
+    Reserve `count` consecutive numbers from the sequence `key` and return the first.
+    seed: value the sequence starts from when the key is new, either an int or
+    a callable returning one (used to continue numbering of existing data).
+    """
+    from .models import CodeSequence
+
+    if count < 1:
+        raise ValueError("count must be at least 1")
+
+    with transaction.atomic():
+        updated = CodeSequence.objects.filter(key=key).update(last_value=F("last_value") + count)
+        if not updated:
+            start = seed() if callable(seed) else seed
+            try:
+                with transaction.atomic():
+                    CodeSequence.objects.create(key=key, last_value=start + count)
+                return start + 1
+            except IntegrityError:
+                # another process created the row first, fall back to the increment
+                CodeSequence.objects.filter(key=key).update(last_value=F("last_value") + count)
+        last_value = CodeSequence.objects.filter(key=key).values_list("last_value", flat=True).get()
+    return last_value - count + 1
+
+
+def next_value(key, seed=0):
+    """Next number of the sequence `key`, from the native sequence when there is one."""
+    sequence = DB_SEQUENCES.get(key)
+    if sequence and connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT nextval(%s)", [sequence])
+            return cursor.fetchone()[0]
+    return allocate(key, seed=seed)
+
+
+def trailing_number(code):
+    match = _TRAILING_NUMBER.search(code or "")
+    return int(match.group(1)) if match else 0
+
+
+def _existing_department_number():
+    from .models import Department
+
+    codes = Department.objects.values_list("department_code", flat=True)
+    return max((trailing_number(code) for code in codes), default=0)
+
+
+def allocate_department_code(name):
+    """Return a new department code "<DEP><nnn>" for a department called `name`."""
+    number = next_value(DEPARTMENT_SEQUENCE, seed=_existing_department_number)
+    return f"{name[:3].upper()}{number:03d}"
+
+
+def employee_code_prefix(department):
+    return department.name[:3].upper()
+
+
+def _existing_employee_sequence(department, date_of_joining):
+    """Highest sequence number already used by employees of the department that month."""
+    from .models import Employee
+
+    codes = Employee.objects.filter(
+        department=department,
+        date_of_joining__year=date_of_joining.year,
+        date_of_joining__month=date_of_joining.month,
+        employee_code__isnull=False,
+    ).values_list("employee_code", flat=True)
+    numbers = [int(code.rsplit("-", 1)[-1]) for code in codes if code.rsplit("-", 1)[-1].isdigit()]
+    return max(numbers, default=0)
+
+
+def allocate_employee_codes(department, date_of_joining, count=1):
+    """
+    Return `count` new employee codes "<DEP>-<YYYYMM>-<seq>" for hires joining
+    `department` in the month of `date_of_joining`, allocated in one UPDATE.
+    """
+    date_part = date_of_joining.strftime("%Y%m")
+    first = allocate(
+        f"employee:{department.pk}:{date_part}",
+        count,
+        seed=lambda: _existing_employee_sequence(department, date_of_joining),
+    )
+    prefix = employee_code_prefix(department)
+    return [f"{prefix}-{date_part}-{number:03d}" for number in range(first, first + count)]
@@ -135,6 +135,9 @@ class EmployeeSerializer(serializers.ModelSerializer):
         instance.save()
         return instance
 
+class EmployeeImportSerializer(serializers.Serializer):
+    file = serializers.FileField(help_text="CSV or XLSX file, one employee per row")
+
 class EmployeeAdminSerializer(serializers.ModelSerializer):
     class Meta:
         model = Employee
@@ -266,7 +269,10 @@ class DepartmentWorkingHoursSerializer(serializers.ModelSerializer):
         fields = ['id', 'working_hours']
 
     def get_working_hours(self, obj):
-        hours = WorkingHour.objects.filter(department=obj)
+        # departments from employee/directory.py bring their hours along
+        hours = getattr(obj, "directory_working_hours", None)
+        if hours is None:
+            hours = WorkingHour.objects.filter(department=obj)
         return EmployeeWorkingHourSerializer(hours, many=True).data
 class EmployeeScheduleSerializer(serializers.ModelSerializer):
     employee_name = serializers.SerializerMethodField(read_only = True)
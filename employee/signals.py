@@ -1,10 +1,18 @@
-from .models import Employee, EmployeeProfile, EmployeeSchedule, Leave, Department
+import logging
+from .models import Employee, EmployeeProfile, EmployeeSchedule, Leave, Department, WorkingHour
 from django.dispatch import receiver
 from django.db.models.signals import post_save, post_delete
 from allauth.socialaccount.models import SocialAccount
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from projects.publisher import publish
+from projects import realtime
+from . import directory
+from .sequences import trailing_number
+from .tasks import recode_department_employees
 
 User = get_user_model()
+logger = logging.getLogger(__name__)
 
 @receiver(post_save, sender=Employee)
 def create_employee_profile(sender, instance, created, **kwargs):
@@ -25,38 +33,55 @@ def update_employee_schedule(sender, instance, **kwargs):
     schedule.update_availability()
 """this code handles the changes the department information(name) are updated"""
 @receiver(post_save, sender = Department)
-def update_employee_codes(sender, instance,created, **kwargs):
-    if created:
-        return
-    
-    """checking if the name is actually changed or not"""
-    old_instance = sender.objects.filter(pk = instance.pk).first()
-    if not old_instance:
+def update_employee_codes(sender, instance, created, **kwargs):
+    if created or not instance.has_changed("name"):
         return
-    
-    if old_instance != instance.name:
-        """generate new department code based on new name"""
-        prefix = instance.name[:3].upper()
-        numeric_part = instance.department_code[:3] if instance.department_code else "001" #deafult as 001
-        new_dept_code = f"{prefix}{numeric_part}"
-
-        if instance.department_code != new_dept_code:
-            sender.objects.filter(pk = instance.pk).update(department_code = new_dept_code)
-            """updating all the employees in this section"""
-            employees = instance.employees.all()
-            for emp in employees:
-                if emp.date_of_joining:
-                    date_part = emp.date_of_joining.strftime("%Y%m")
-                    seq = emp.employee_code.split('-')[-1] if emp.employee_code else "001"
-                    emp.employee_code = f"{new_dept_code}-{date_part}-{seq}"
-                    emp.save(update_fields=["employee_code"])
+
+    """new department code: prefix of the new name, number of the old code"""
+    new_dept_code = f"{instance.name[:3].upper()}{trailing_number(instance.department_code):03d}"
+    if instance.department_code != new_dept_code:
+        sender.objects.filter(pk=instance.pk).update(department_code=new_dept_code)
+        logger.info("department %s re-coded %s -> %s", instance.pk, instance.department_code, new_dept_code)
+        instance.department_code = new_dept_code
+
+    """employee codes are rewritten in the background, a large department must not block the request"""
+    department_id = instance.pk
+    transaction.on_commit(lambda: publish(recode_department_employees, department_id))
 
 @receiver(post_save, sender=Department)
-def update_employee_hours(sender, instance, **kwargs):
-    instance.employees.update(
+def update_employee_hours(sender, instance, created, **kwargs):
+    if created or not instance.has_changed("working_start_time", "working_end_time"):
+        return
+    updated = instance.employees.update(
         working_start_time=instance.working_start_time,
         working_end_time=instance.working_end_time
     )
+    """the update() above skips refresh_employee_availability, so their schedules are recomputed here"""
+    schedules = EmployeeSchedule.objects.filter(employee__department=instance).select_related("employee__department")
+    refreshed = 0
+    for schedule in schedules:
+        schedule.update_availability()
+        refreshed += 1
+    logger.info(
+        "department %s working hours copied to %s employee(s), %s schedule(s) refreshed",
+        instance.pk, updated, refreshed,
+    )
+
+"""departments and working hours are served from the cached directory (employee/directory.py)"""
+@receiver([post_save, post_delete], sender=Department)
+@receiver([post_save, post_delete], sender=WorkingHour)
+def refresh_department_directory(sender, instance, **kwargs):
+    directory.invalidate()
+
+"""an employee who moved department or changed status gets their availability recomputed"""
+@receiver(post_save, sender=Employee)
+def refresh_employee_availability(sender, instance, created, **kwargs):
+    if created or not instance.has_changed("department", "working_start_time", "working_end_time", "status"):
+        return
+    schedule = EmployeeSchedule.objects.filter(employee=instance).first()
+    if schedule:
+        schedule.update_availability()
+        logger.info("employee %s availability refreshed: %s", instance.pk, schedule.availability)
 
 
 
@@ -91,4 +116,10 @@ def update_employee_hours(sender, instance, **kwargs):
 #             address="N/A",
 #             # Optional:
 #             # position=f"{first_name} {last_name}"
-#         )
\ No newline at end of file
+#         )
+
+"""push availability changes to the connected event streams"""
+@receiver(post_save, sender=EmployeeSchedule)
+def broadcast_availability(sender, instance, created, **kwargs):
+    if not created:
+        realtime.availability_changed(instance)
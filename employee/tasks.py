@@ -0,0 +1,44 @@
+import logging
+
+from celery import shared_task
+from django.db import transaction
+from django.db.models import Value
+from django.db.models.functions import Concat, StrIndex, Substr
+from .models import Department, Employee
+from .sequences import employee_code_prefix
+
+logger = logging.getLogger(__name__)
+
+RECODE_CHUNK_SIZE = 1000
+
+
+@shared_task(ignore_result=True)
+def recode_department_employees(department_id, chunk_size=RECODE_CHUNK_SIZE):
+    """
+    Rewrite the "<DEP>" prefix of every employee code in the department after a rename.
+    Each chunk is one UPDATE that swaps the text before the first "-" in SQL,
+    so no employee is loaded or saved individually. The prefix is read when the
+    task runs, so rerunning it (or running it after several quick renames) is harmless.
+    """
+    try:
+        department = Department.objects.get(pk=department_id)
+    except Department.DoesNotExist:
+        logger.warning("department %s not found, nothing to re-code", department_id)
+        return 0
+
+    prefix = employee_code_prefix(department)
+    stale = (
+        Employee.objects.filter(department_id=department_id, employee_code__contains="-")
+        .exclude(employee_code__startswith=f"{prefix}-")
+    )
+    new_code = Concat(Value(prefix), Substr("employee_code", StrIndex("employee_code", Value("-"))))
+
+    updated = 0
+    while True:
+        ids = list(stale.order_by("pk").values_list("pk", flat=True)[:chunk_size])
+        if not ids:
+            break
+        with transaction.atomic():
+            updated += Employee.objects.filter(pk__in=ids).update(employee_code=new_code)
+    logger.info("department %s: %s employee code(s) re-coded", department.pk, updated)
+    return updated
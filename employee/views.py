@@ -19,17 +19,37 @@ from datetime import timedelta
 from rest_framework.exceptions import PermissionDenied
 from rest_framework.decorators import action
 from .utils import has_role
-class DepartmentViewSet(viewsets.ModelViewSet):
+from .importer import EmployeeImporter, ImportFileError, read_rows
+from rest_framework.parsers import MultiPartParser
+from project_management.streaming import StreamingExportMixin
+from projects import activity
+from . import directory
+from django.views.decorators.http import require_GET
+from project_management.async_views import async_list
+class DepartmentDirectoryListMixin:
+    """
+    list() served from the cached department directory (employee/directory.py);
+    the viewset says which departments the user sees in visible_department_ids()
+    """
+    def list(self, request, *args, **kwargs):
+        departments = directory.departments(self.visible_department_ids())
+        page = self.paginate_queryset(departments)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        return Response(self.get_serializer(departments, many=True).data)
+
+class DepartmentViewSet(DepartmentDirectoryListMixin, viewsets.ModelViewSet):
     serializer_class = DepartmentSerializer
     queryset = Department.objects.all()
     lookup_field = 'id'
     permission_classes = [IsAuthenticated, IsAssignedProjectOrHigher]
     http_method_names = ['get', 'post', 'put', 'patch', 'delete']
 
-    def get_queryset(self):
+    def visible_department_ids(self):
+        """None when every department is visible, else the ids of the visible ones."""
         user_profile = getattr(self.request.user, "employee_profile", None)
         if not user_profile:
-            return Department.objects.none()  # anonymous user sees nothing
+            return set()  # anonymous user sees nothing
 
         # Higher roles → all departments
         if user_profile.role in [
@@ -38,13 +58,17 @@ class DepartmentViewSet(viewsets.ModelViewSet):
             Employee.PROJECT_MANAGER,
             Employee.ADMIN
         ]:
-            return Department.objects.all().order_by('id')
+            return None
 
         # Normal employees → only departments of projects they are assigned to
-        assigned_projects = Project.objects.filter(members=user_profile).distinct()
-        return Department.objects.filter(projects__in=assigned_projects).distinct().order_by('id')
+        return directory.member_department_ids(user_profile)
+
+    def get_queryset(self):
+        ids = self.visible_department_ids()
+        queryset = Department.objects.all().order_by('id')
+        return queryset if ids is None else queryset.filter(id__in=ids)
 
-class EmployeeViewSet(viewsets.ModelViewSet):
+class EmployeeViewSet(StreamingExportMixin, viewsets.ModelViewSet):
     queryset = Employee.objects.all().order_by('id')
     serializer_class = EmployeeSerializer
     lookup_field = 'id'
@@ -57,6 +81,12 @@ class EmployeeViewSet(viewsets.ModelViewSet):
     search_fields = ['user__first_name', 'user__last_name', 'user__email', 'department__name', 'role', 'phone']
     ordering_fields = ['user__first_name', 'user__last_name', 'user__email', 'role']
     ordering = ['id']
+    export_filename = "employees"
+    export_fields = (
+        'id', 'employee_code', 'user__first_name', 'user__last_name', 'user__email', 'phone',
+        'role', 'status', 'position', 'department__name', 'date_of_joining',
+        'working_start_time', 'working_end_time',
+    )
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -67,6 +97,35 @@ class EmployeeViewSet(viewsets.ModelViewSet):
             "employee": EmployeeSerializer(employee).data
         }, status=status.HTTP_201_CREATED)
 
+    def get_serializer_class(self):
+        if self.action == "import_employees":
+            return EmployeeImportSerializer
+        return super().get_serializer_class()
+
+    @action(detail=False, methods=["post"], url_path="import", parser_classes=[MultiPartParser])
+    def import_employees(self, request):
+        """
+        Bulk import from an uploaded CSV/XLSX "file". ?dry_run=true only validates.
+        Returns a report with per-row errors; valid rows are imported even if others fail.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        upload = serializer.validated_data["file"]
+
+        dry_run = request.query_params.get("dry_run", "").lower() in ("1", "true", "yes")
+        try:
+            report = EmployeeImporter(dry_run=dry_run).run(read_rows(upload, upload.name))
+        except ImportFileError as exc:
+            return Response({"file": [str(exc)]}, status=status.HTTP_400_BAD_REQUEST)
+
+        if report["created"]:
+            response_status = status.HTTP_201_CREATED
+        elif report["failed"]:
+            response_status = status.HTTP_400_BAD_REQUEST
+        else:
+            response_status = status.HTTP_200_OK
+        return Response(report, status=response_status)
+
 class EmployeeProfileViewSet(viewsets.ModelViewSet):
     queryset = EmployeeProfile.objects.all().order_by('id')
     serializer_class = EmployeeProfileSerializer
@@ -115,10 +174,15 @@ class GoogleLogin(SocialLoginView):
         user = self.user
         refresh = RefreshToken.for_user(user)
         return JsonResponse({"access": str(refresh.access_token), "refresh": str(refresh)})
-class LeaveViewSet(viewsets.ModelViewSet):
+class LeaveViewSet(StreamingExportMixin, viewsets.ModelViewSet):
     serializer_class = LeaveSerializer
     permission_classes = [IsSelfOrTeamLeadOrHROrPMOrADMIN]
     http_method_names = ['get', 'post', 'put', 'patch', 'delete']
+    export_filename = "leaves"
+    export_fields = (
+        'id', 'employee__employee_code', 'employee__user__email', 'status', 'start_date', 'end_date',
+        'leave_reason', 'approved_by__user__email', 'approved_at',
+    )
 
     def get_queryset(self):
         user = self.request.user
@@ -156,6 +220,11 @@ class LeaveViewSet(viewsets.ModelViewSet):
         leave.approved_by = employee
         leave.approved_at = timezone.now()
         leave.save()
+        activity.record(
+            activity.LEAVE_APPROVED if status_choice == "APPROVED" else activity.LEAVE_REJECTED,
+            actor=employee, employee=leave.employee_id, target=leave,
+            start_date=leave.start_date, end_date=leave.end_date,
+        )
 
         return Response(LeaveSerializer(leave).data)
     @action(detail=True, methods=["patch"], url_path="cancel")
@@ -182,25 +251,30 @@ class LeaveViewSet(viewsets.ModelViewSet):
         leave.status = "CANCELLED"
         leave.save(update_fields=["status"])
         return Response({"status": "CANCELLED"}, status=status.HTTP_200_OK)
-class DepartmentWorkingHourViewSet(viewsets.ReadOnlyModelViewSet):
+class DepartmentWorkingHourViewSet(DepartmentDirectoryListMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Department.objects.all()
     serializer_class = DepartmentWorkingHoursSerializer
     permission_classes = [IsAuthenticated]
 
-    def get_queryset(self):
+    def visible_department_ids(self):
+        """None when every department is visible, else the ids of the visible ones."""
         user = self.request.user
         employee = getattr(user, "employee_profile", None)
 
         # HR/Admin/PM: see all departments
         if employee and employee.role in [Employee.HR, Employee.ADMIN, Employee.PROJECT_MANAGER]:
-            return self.queryset
+            return None
 
         # Normal employee: only their own department
-        if employee and employee.department:
-            return self.queryset.filter(id=employee.department.id)
+        if employee and employee.department_id:
+            return {employee.department_id}
 
         # No employee object → empty
-        return Department.objects.none()
+        return set()
+
+    def get_queryset(self):
+        ids = self.visible_department_ids()
+        return self.queryset if ids is None else self.queryset.filter(id__in=ids)
 
 class EmployeeScheduleViewSet(viewsets.ModelViewSet):
     queryset = EmployeeSchedule.objects.all()
@@ -224,3 +298,9 @@ class EmployeeScheduleViewSet(viewsets.ModelViewSet):
 
         # Normal employee → only their own schedule
         return EmployeeSchedule.objects.filter(employee__user=user)
+
+
+@require_GET
+async def async_schedule_list(request):
+    """EmployeeScheduleViewSet list with async queries, for serving under ASGI."""
+    return await async_list(EmployeeScheduleViewSet, request, select_related=("employee__user",))
@@ -3,6 +3,17 @@ ASGI config for project_management project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Only the server-sent event stream at /api/events/, which keeps one
+connection open per client, and the /api/async/ endpoints are served from
+here. The rest of the site stays on wsgi.py: exports stream through sync
+iterators, which ASGI would read into memory whole, and persistent database
+connections are not reused under ASGI. The Procfile "asgi" process and the
+compose "web-asgi" service run
+
+    DB_CONN_MODE=per_request gunicorn -k uvicorn.workers.UvicornWorker project_management.asgi:application
+
+and the proxy in front sends /api/events/ and /api/async/ to it.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -12,5 +23,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project_management.settings')
+# static files come from the WSGI process; WhiteNoise would make this middleware chain sync
+os.environ.setdefault('SERVE_STATIC', 'False')
 
 application = get_asgi_application()
@@ -0,0 +1,124 @@
+"""
+Async variants of DRF read endpoints, for the hot list pages under ASGI.
+
+DRF views are synchronous. async_list() runs a viewset's list action as an
+async Django view:
+
+1. Authentication, permission checks and queryset building reuse the
+   viewset's own code in a worker thread. Only the user lookup hits the
+   database here.
+2. The page rows and the total count are independent queries. They are
+   fetched with the async ORM and awaited together.
+3. The page is serialized with the viewset's serializer and rendered by its
+   renderers. Responses are the same as the sync endpoint's.
+
+Under asgi.py the request no longer holds a worker thread while it waits
+on the database. Its middleware chain is async throughout; asgi.py leaves out
+WhiteNoise, the one sync-only middleware (SERVE_STATIC).
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.core.paginator import InvalidPage, Page
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+
+
+def _start(view_class, request, kwargs, action="list"):
+    """Build the DRF request/view and run the view's checks; returns (view, drf_request, error_response)."""
+    view = view_class(action=action, kwargs=kwargs, args=(), format_kwarg=None, action_map={"get": action})
+    view.headers = view.default_response_headers
+    drf_request = view.initialize_request(request, **kwargs)
+    view.request = drf_request
+    try:
+        view.initial(drf_request, **kwargs)
+    except Exception as exc:
+        return view, drf_request, render(view, drf_request, view.handle_exception(exc))
+    return view, drf_request, None
+
+
+def render(view, drf_request, response):
+    response = view.finalize_response(drf_request, response)
+    response.render()
+    return response
+
+
+async def prepare_view(view_class, request, action="list", **kwargs):
+    return await sync_to_async(_start)(view_class, request, kwargs, action)
+
+
+async def _rows(queryset):
+    return [obj async for obj in queryset]
+
+
+def _queryset(view, related):
+    select_related, prefetch_related = related
+    queryset = view.filter_queryset(view.get_queryset())
+    if select_related:
+        queryset = queryset.select_related(*select_related)
+    if prefetch_related:
+        queryset = queryset.prefetch_related(*prefetch_related)
+    return queryset
+
+
+def _serialize(view, drf_request, rows, paginator=None):
+    try:
+        data = view.get_serializer(rows, many=True).data
+        response = Response(data) if paginator is None else paginator.get_paginated_response(data)
+    except Exception as exc:
+        response = view.handle_exception(exc)
+    return render(view, drf_request, response)
+
+
+def _error(view, drf_request, exc):
+    return render(view, drf_request, view.handle_exception(exc))
+
+
+async def _invalid_page(view, drf_request, paginator, number, message):
+    message = paginator.invalid_page_message.format(page_number=number, message=message)
+    return await sync_to_async(_error)(view, drf_request, NotFound(message))
+
+
+async def async_list(view_class, request, select_related=(), prefetch_related=(), **kwargs):
+    """
+    The list action of `view_class` with async queries. `select_related` /
+    `prefetch_related` are applied on top of the view's queryset so that
+    serializing the page needs no further queries.
+    """
+    view, drf_request, response = await prepare_view(view_class, request, **kwargs)
+    if response is not None:
+        return response
+    try:
+        queryset = await sync_to_async(_queryset)(view, (select_related, prefetch_related))
+    except Exception as exc:
+        return await sync_to_async(_error)(view, drf_request, exc)
+
+    paginator = view.paginator
+    page_size = paginator.get_page_size(drf_request) if paginator is not None else None
+    if not page_size:
+        rows = await _rows(queryset)
+        return await sync_to_async(_serialize)(view, drf_request, rows)
+
+    django_paginator = paginator.django_paginator_class(queryset, page_size)
+    requested = drf_request.query_params.get(paginator.page_query_param) or 1
+    if requested in paginator.last_page_strings:
+        # the last page number depends on the count
+        django_paginator.__dict__["count"] = await queryset.acount()
+        requested = django_paginator.num_pages
+    try:
+        number = int(requested)
+    except (TypeError, ValueError):
+        return await _invalid_page(view, drf_request, paginator, requested, django_paginator.error_messages["invalid_page"])
+    if number < 1:
+        return await _invalid_page(view, drf_request, paginator, requested, django_paginator.error_messages["min_page"])
+
+    bottom = (number - 1) * page_size
+    count, rows = await asyncio.gather(queryset.acount(), _rows(queryset[bottom:bottom + page_size]))
+    django_paginator.__dict__["count"] = count  # cached_property, already known
+    try:
+        django_paginator.validate_number(number)
+    except InvalidPage as exc:
+        return await _invalid_page(view, drf_request, paginator, requested, str(exc))
+    paginator.page = Page(rows, number, django_paginator)
+    paginator.request = drf_request
+    return await sync_to_async(_serialize)(view, drf_request, rows, paginator)
@@ -0,0 +1,427 @@
+"""
+Two-tier application cache (settings.CACHES["default"]).
+
+L2 is Redis and is shared by every process. L1 is a small in-process LRU of
+pickled values in front of it, so hot keys skip the network round trip.
+
+Keeping L1 honest:
+- Every set / delete / incr publishes the key on INVALIDATION_CHANNEL. A
+  listener thread in each process drops the key from its L1.
+- L1 entries live at most L1_SECONDS, a bound on staleness should a message
+  be lost.
+- L1 is bypassed while the listener is not subscribed.
+- A value read from Redis only goes into L1 when no invalidation arrived while
+  it was being read (the generation counter). A late reader cannot put back
+  a value that was just replaced.
+- Keys carry settings.CACHES VERSION (CACHE_VERSION) and KEY_PREFIX, so
+  bumping the version moves every process to a fresh key space.
+
+Fallback: without a LOCATION the cache is plain local memory. When Redis
+fails, the error is logged and L2 is skipped for L2_RETRY_SECONDS. Meanwhile
+L1 serves as a per-process cache, so requests don't fail or wait on
+timeouts.
+
+get_or_set() with a callable recomputes single-flight. One caller per process
+holds a striped lock, and one process cluster-wide holds a short "<key>:fill"
+lock in Redis. The others wait up to FILL_WAIT_SECONDS for its result.
+
+cache_report() gives the hit / miss / invalidation counters for monitoring.
+"""
+import logging
+import os
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache
+
+from .metrics import cache_lookup
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "cache:invalidate"
+CLEAR_ALL = "*"
+L2_RETRY_SECONDS = 30
+FILL_LOCK_SECONDS = 30
+FILL_WAIT_SECONDS = 5
+FILL_POLL_SECONDS = 0.05
+FLIGHT_STRIPES = 64
+
+_MISSING = object()
+
+
+def _identity_key(key, key_prefix, version):
+    # keys reaching L2 were already built by TieredCache.make_key
+    return key
+
+
+class LocalLRU:
+    """Bounded in-process store of pickled values with per-entry expiry."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._mutex = threading.Lock()
+
+    def get(self, key):
+        with self._mutex:
+            entry = self._data.get(key)
+            if entry is None:
+                return _MISSING
+            expires, payload = entry
+            if expires <= time.monotonic():
+                del self._data[key]
+                return _MISSING
+            self._data.move_to_end(key)
+        return pickle.loads(payload)
+
+    def set(self, key, value, seconds):
+        if seconds <= 0 or self.max_entries <= 0:
+            self.delete(key)
+            return
+        payload = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._mutex:
+            self._data[key] = (time.monotonic() + seconds, payload)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._mutex:
+            return self._data.pop(key, None) is not None
+
+    def clear(self):
+        with self._mutex:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class CacheStats:
+    COUNTERS = (
+        "l1_hits", "l2_hits", "misses", "sets", "deletes",
+        "invalidations_sent", "invalidations_received", "l2_errors",
+        "fills", "fill_waits", "fill_timeouts",
+    )
+
+    def __init__(self):
+        self._mutex = threading.Lock()
+        self.data = dict.fromkeys(self.COUNTERS, 0)
+
+    def incr(self, name, count=1):
+        with self._mutex:
+            self.data[name] += count
+
+    def snapshot(self):
+        with self._mutex:
+            data = dict(self.data)
+        lookups = data["l1_hits"] + data["l2_hits"] + data["misses"]
+        data["hit_ratio"] = round((data["l1_hits"] + data["l2_hits"]) / lookups, 4) if lookups else None
+        return data
+
+    def clear(self):
+        with self._mutex:
+            self.data = dict.fromkeys(self.COUNTERS, 0)
+
+
+class Tier:
+    """
+    L1, L2 and the invalidation listener for one LOCATION. Django builds a
+    cache object per thread, and they all share the process's Tier.
+    """
+
+    def __init__(self, location, params):
+        options = params.get("OPTIONS", {})
+        self.location = location
+        self.l1_seconds = float(options.get("L1_SECONDS", 10))
+        self.stats = CacheStats()
+        self.sender = uuid.uuid4().hex
+        self.flight_locks = [threading.Lock() for _ in range(FLIGHT_STRIPES)]
+        self.generation = 0
+        self.listening = False
+        self._suspended_until = 0.0
+        self._listener_pid = None
+        self._listener_lock = threading.Lock()
+        self._client = None
+        l2_params = {"TIMEOUT": params.get("TIMEOUT", 300), "KEY_FUNCTION": _identity_key}
+        if location:
+            self.l2 = RedisCache(location, {**l2_params, "OPTIONS": {
+                "socket_connect_timeout": options.get("SOCKET_CONNECT_TIMEOUT", 2),
+                "socket_timeout": options.get("SOCKET_TIMEOUT", 2),
+            }})
+            self.l1 = LocalLRU(int(options.get("L1_MAX_ENTRIES", 1000)))
+        else:
+            # local memory only: an L1 in front of it would just hold a second copy
+            self.l2 = LocMemCache("tiered", {**l2_params, "OPTIONS": {
+                "MAX_ENTRIES": options.get("MAX_ENTRIES", 1000),
+            }})
+            self.l1 = None
+
+    def l2_available(self):
+        return time.monotonic() >= self._suspended_until
+
+    def l2_call(self, method, *args, fallback=None):
+        if not self.l2_available():
+            return fallback
+        try:
+            return getattr(self.l2, method)(*args)
+        except Exception:
+            self.stats.incr("l2_errors")
+            self._suspended_until = time.monotonic() + L2_RETRY_SECONDS
+            logger.exception("cache %s failed, using the local cache for %ss", method, L2_RETRY_SECONDS)
+            return fallback
+
+    def l1_trusted(self):
+        if self.l1 is None:
+            return False
+        if not self.l2_available():
+            # Redis is down: L1 is the cache now
+            return True
+        self._ensure_listener()
+        return self.listening
+
+    def _ensure_listener(self):
+        pid = os.getpid()
+        if self._listener_pid == pid:
+            return
+        with self._listener_lock:
+            if self._listener_pid == pid:
+                return
+            # a forked worker inherits the parent's L1 but not its listener thread
+            self.l1.clear()
+            self.listening = False
+            self._client = None
+            self._listener_pid = pid
+            threading.Thread(target=self._listen, name="cache-invalidation", daemon=True).start()
+
+    def _redis(self):
+        if self._client is None:
+            self._client = self.l2._cache.get_client(write=True)
+        return self._client
+
+    def _listen(self):
+        delay = 1
+        while True:
+            pubsub = None
+            try:
+                import redis
+
+                # no socket_timeout: the subscription sits idle between messages
+                client = redis.Redis.from_url(self.location, socket_connect_timeout=2, health_check_interval=30)
+                pubsub = client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(INVALIDATION_CHANNEL)
+                # anything cached before the subscription may have missed its invalidation
+                self.l1.clear()
+                self.listening = True
+                delay = 1
+                for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        self.invalidated(message["data"])
+            except Exception as exc:
+                if delay == 1:
+                    logger.warning("cache invalidation listener disconnected (%s), retrying", exc)
+            finally:
+                self.listening = False
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+            time.sleep(delay)
+            delay = min(delay * 2, L2_RETRY_SECONDS)
+
+    def invalidated(self, message):
+        """Handle a message from INVALIDATION_CHANNEL."""
+        if isinstance(message, bytes):
+            message = message.decode()
+        sender, _, key = message.partition(":")
+        if sender == self.sender:
+            return
+        self.generation += 1
+        self.stats.incr("invalidations_received")
+        if key == CLEAR_ALL:
+            self.l1.clear()
+        else:
+            self.l1.delete(key)
+
+    def invalidate(self, key):
+        """Drop `key` from this process's L1 and tell the other processes to do the same."""
+        if self.l1 is None:
+            return
+        self.l1.delete(key)
+        if self.l2_available():
+            try:
+                self._redis().publish(INVALIDATION_CHANNEL, f"{self.sender}:{key}")
+                self.stats.incr("invalidations_sent")
+            except Exception:
+                logger.warning("cache invalidation for %s not published", key, exc_info=True)
+
+    def remember(self, key, value, seconds, generation=None):
+        if self.l1 is None or (generation is not None and generation != self.generation):
+            return
+        self.l1.set(key, value, min(self.l1_seconds, seconds))
+
+
+_tiers = {}
+_tiers_lock = threading.Lock()
+
+
+def _tier_for(location, params):
+    with _tiers_lock:
+        if location not in _tiers:
+            _tiers[location] = Tier(location, params)
+        return _tiers[location]
+
+
+class TieredCache(BaseCache):
+    """
+    OPTIONS:
+        L1_MAX_ENTRIES  in-process entries kept (0 disables L1), default 1000
+        L1_SECONDS      longest time an entry stays in L1, default 10
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self.location = location
+        self.tier = _tier_for(location, params)
+        self.stats = self.tier.stats
+
+    def _seconds(self, timeout):
+        expiry = self.get_backend_timeout(timeout)
+        return float("inf") if expiry is None else expiry - time.time()
+
+    # cache API
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        tier = self.tier
+        if tier.l1_trusted():
+            value = tier.l1.get(key)
+            if value is not _MISSING:
+                tier.stats.incr("l1_hits")
+                cache_lookup(True)
+                return value
+        generation = tier.generation
+        value = tier.l2_call("get", key, _MISSING, fallback=_MISSING)
+        if value is _MISSING:
+            tier.stats.incr("misses")
+            cache_lookup(False)
+            return default
+        tier.stats.incr("l2_hits")
+        cache_lookup(True)
+        if tier.l1_trusted():
+            tier.remember(key, value, tier.l1_seconds, generation)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self.tier.stats.incr("sets")
+        self.tier.l2_call("set", key, value, timeout)
+        self.tier.invalidate(key)
+        self.tier.remember(key, value, self._seconds(timeout))
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        tier = self.tier
+        added = tier.l2_call("add", key, value, timeout, fallback=_MISSING)
+        if added is not _MISSING:
+            if added:
+                tier.stats.incr("sets")
+                tier.invalidate(key)
+            return added
+        # Redis is down
+        if tier.l1 is None or tier.l1.get(key) is not _MISSING:
+            return False
+        tier.remember(key, value, self._seconds(timeout))
+        return True
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return bool(self.tier.l2_call("touch", key, timeout, fallback=False))
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self.tier.stats.incr("deletes")
+        deleted = self.tier.l2_call("delete", key, fallback=False)
+        self.tier.invalidate(key)
+        return bool(deleted)
+
+    def has_key(self, key, version=None):
+        return self.get(key, _MISSING, version=version) is not _MISSING
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        value = self.tier.l2_call("incr", key, delta, fallback=_MISSING)
+        if value is _MISSING:
+            raise ValueError(f"Key '{key}' not found")
+        self.tier.invalidate(key)
+        return value
+
+    def clear(self):
+        self.tier.l2_call("clear")
+        if self.tier.l1 is not None:
+            self.tier.l1.clear()
+            self.tier.invalidate(CLEAR_ALL)
+
+    def close(self, **kwargs):
+        self.tier.l2.close(**kwargs)
+
+    def get_or_set(self, key, default, timeout=DEFAULT_TIMEOUT, version=None):
+        """As BaseCache.get_or_set(); a callable `default` is computed by one caller at a time."""
+        value = self.get(key, _MISSING, version=version)
+        if value is not _MISSING:
+            return value
+        if not callable(default):
+            return super().get_or_set(key, default, timeout=timeout, version=version)
+
+        tier = self.tier
+        full_key = self.make_and_validate_key(key, version=version)
+        with tier.flight_locks[hash(full_key) % FLIGHT_STRIPES]:
+            value = self.get(key, _MISSING, version=version)
+            if value is not _MISSING:
+                return value
+            fill_key = f"{full_key}:fill"
+            if tier.l2_call("add", fill_key, 1, FILL_LOCK_SECONDS, fallback=True):
+                try:
+                    return self._fill(key, default, timeout, version)
+                finally:
+                    tier.l2_call("delete", fill_key)
+
+            # another process is computing it
+            tier.stats.incr("fill_waits")
+            deadline = time.monotonic() + FILL_WAIT_SECONDS
+            while time.monotonic() < deadline:
+                time.sleep(FILL_POLL_SECONDS)
+                value = tier.l2_call("get", full_key, _MISSING, fallback=_MISSING)
+                if value is not _MISSING:
+                    return value
+            tier.stats.incr("fill_timeouts")
+            return self._fill(key, default, timeout, version)
+
+    def _fill(self, key, default, timeout, version):
+        self.tier.stats.incr("fills")
+        value = default()
+        self.set(key, value, timeout=timeout, version=version)
+        return value
+
+    def report(self):
+        tier = self.tier
+        data = tier.stats.snapshot()
+        data.update({
+            "l1_entries": len(tier.l1) if tier.l1 is not None else None,
+            "l1_listening": tier.listening,
+            "l2": "redis" if tier.location else "locmem",
+            "l2_available": tier.l2_available(),
+        })
+        return data
+
+
+def cache_report():
+    """Counters of every configured TieredCache, by alias."""
+    return {alias: caches[alias].report() for alias in caches if isinstance(caches[alias], TieredCache)}
@@ -1,9 +1,88 @@
 from __future__ import absolute_import, unicode_literals
 import os
 from celery import Celery
+from celery.signals import worker_init
+from decouple import config
+from kombu import Queue
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project_management.settings')
 
 app = Celery('project_management')
 app.config_from_object('django.conf:settings', namespace='CELERY')
-app.autodiscover_tasks()
\ No newline at end of file
+app.autodiscover_tasks()
+
+"""
+Queues
+notifications: outgoing mail, many short tasks that mostly wait on SMTP
+maintenance: periodic sweeps (availability, overdue tasks) and bulk rewrites, few and long
+exports: heavy report/export jobs that must not starve the other two
+Run one worker per queue, e.g.
+    celery -A project_management worker -Q notifications -c 8
+    celery -A project_management worker -Q maintenance -c 2
+    celery -A project_management worker -Q exports -c 1
+"""
+DEFAULT_QUEUE = 'default'
+NOTIFICATIONS_QUEUE = 'notifications'
+MAINTENANCE_QUEUE = 'maintenance'
+EXPORTS_QUEUE = 'exports'
+
+"""
+prefetch multiplier used by a worker when it consumes the given queue:
+mail tasks are short so a worker may reserve several, long maintenance and
+export tasks are reserved one at a time so a slow run never holds back others
+"""
+QUEUE_PREFETCH_MULTIPLIER = {
+    DEFAULT_QUEUE: 4,
+    NOTIFICATIONS_QUEUE: 8,
+    MAINTENANCE_QUEUE: 1,
+    EXPORTS_QUEUE: 1,
+}
+
+app.conf.task_default_queue = DEFAULT_QUEUE
+app.conf.task_queues = tuple(Queue(name) for name in QUEUE_PREFETCH_MULTIPLIER)
+
+app.conf.task_routes = {
+    'projects.tasks.send_*': {'queue': NOTIFICATIONS_QUEUE},
+    'projects.tasks.check_overdue_tasks': {'queue': MAINTENANCE_QUEUE},
+    'projects.tasks.update_all_employee_availability': {'queue': MAINTENANCE_QUEUE},
+    'projects.tasks.replay_spooled_tasks': {'queue': MAINTENANCE_QUEUE},
+    'projects.tasks.schedule_upcoming_reminders': {'queue': MAINTENANCE_QUEUE},
+    'projects.tasks.reconcile_project_stats': {'queue': MAINTENANCE_QUEUE},
+    'projects.tasks.create_activity_partitions': {'queue': MAINTENANCE_QUEUE},
+    'employee.tasks.recode_department_employees': {'queue': MAINTENANCE_QUEUE},
+    '*.tasks.export_*': {'queue': EXPORTS_QUEUE},
+}
+
+"""
+rate limits are enforced per worker instance, so the SMTP ceiling is
+rate_limit * number of notification workers
+"""
+EMAIL_RATE_LIMIT = config('CELERY_EMAIL_RATE_LIMIT', default='60/m')
+
+app.conf.task_annotations = {
+    'projects.tasks.send_task_created_email': {'rate_limit': EMAIL_RATE_LIMIT},
+    'projects.tasks.send_project_created_email': {'rate_limit': EMAIL_RATE_LIMIT},
+    'projects.tasks.send_assignment_email': {'rate_limit': EMAIL_RATE_LIMIT},
+    'projects.tasks.send_due_soon_reminder': {'rate_limit': EMAIL_RATE_LIMIT},
+    'projects.tasks.send_overdue_reminder': {'rate_limit': EMAIL_RATE_LIMIT},
+    # sweeps are idempotent: ack after the run so a killed worker re-delivers it
+    'projects.tasks.check_overdue_tasks': {'acks_late': True},
+    'projects.tasks.update_all_employee_availability': {'acks_late': True},
+    'employee.tasks.recode_department_employees': {'acks_late': True},
+    'projects.tasks.reconcile_project_stats': {'acks_late': True},
+}
+
+
+@worker_init.connect
+def tune_prefetch_for_queues(sender=None, **kwargs):
+    """
+    Pick the prefetch multiplier from the queues this worker consumes (-Q).
+    An explicit --prefetch-multiplier on the command line still wins.
+    """
+    worker = sender
+    if worker is None or worker.prefetch_multiplier != app.conf.worker_prefetch_multiplier:
+        return
+    consumed = worker.app.amqp.queues.consume_from or {}
+    multipliers = [QUEUE_PREFETCH_MULTIPLIER[name] for name in consumed if name in QUEUE_PREFETCH_MULTIPLIER]
+    if multipliers:
+        worker.prefetch_multiplier = min(multipliers)
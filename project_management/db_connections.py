@@ -0,0 +1,151 @@
+"""
+Database connection reuse: counters, pool statistics and a benchmark.
+
+settings.DB_CONN_MODE picks how a worker gets its connection:
+    per_request -> connect for every request and close at its end (Django's default)
+    persistent  -> keep the connection for CONN_MAX_AGE seconds. It is
+                   health-checked before reuse (CONN_HEALTH_CHECKS) and
+                   replaced when the check fails.
+    pool        -> psycopg 3 pool per process (OPTIONS["pool"]), for ASGI
+                   where persistent connections are not reused
+
+connection_report() returns the per-process numbers:
+- requests served;
+- connections opened, in total and per request;
+- in pool mode, psycopg's pool statistics: size, available, waiting, wait
+  time and timeouts. Here "opened" counts checkouts from the pool, and the
+  physical connections are pool_stats["connections_num"].
+
+`python manage.py db_connections --bench N` measures the cost of opening a
+connection per request against the configured mode.
+"""
+import threading
+import time
+
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+# psycopg_pool counters worth reporting, see ConnectionPool.get_stats()
+POOL_STAT_KEYS = (
+    "pool_min", "pool_max", "pool_size", "pool_available", "requests_waiting",
+    "requests_num", "requests_queued", "requests_wait_ms", "requests_errors",
+    "connections_num", "connections_ms", "connections_errors", "connections_lost",
+)
+
+
+class ConnectionStats:
+    """Requests and newly opened connections in the current process."""
+
+    def __init__(self):
+        self._mutex = threading.Lock()
+        self.requests = 0
+        self.opened = {}
+
+    def record_request(self):
+        with self._mutex:
+            self.requests += 1
+
+    def record_connection(self, alias):
+        with self._mutex:
+            self.opened[alias] = self.opened.get(alias, 0) + 1
+
+    def snapshot(self):
+        with self._mutex:
+            return {"requests": self.requests, "opened": dict(self.opened)}
+
+    def clear(self):
+        with self._mutex:
+            self.requests = 0
+            self.opened.clear()
+
+
+connection_stats = ConnectionStats()
+
+
+@receiver(request_started, dispatch_uid="db_connections.request_started")
+def _count_request(sender, **kwargs):
+    connection_stats.record_request()
+
+
+@receiver(connection_created, dispatch_uid="db_connections.connection_created")
+def _count_connection(sender, connection, **kwargs):
+    connection_stats.record_connection(connection.alias)
+
+
+def mode_of(settings_dict):
+    if settings_dict["OPTIONS"].get("pool"):
+        return "pool"
+    if settings_dict.get("CONN_MAX_AGE"):
+        return "persistent"
+    return "per_request"
+
+
+def pool_stats(alias):
+    """psycopg pool statistics for `alias`, or None when it is not pooled."""
+    connection = connections[alias]
+    if connection.vendor != "postgresql" or not connection.settings_dict["OPTIONS"].get("pool"):
+        return None
+    stats = connection.pool.get_stats()
+    return {key: stats.get(key, 0) for key in POOL_STAT_KEYS}
+
+
+def connection_report():
+    snapshot = connection_stats.snapshot()
+    databases = {}
+    for alias in connections:
+        settings_dict = connections.settings[alias]
+        pool = settings_dict["OPTIONS"].get("pool") or None
+        opened = snapshot["opened"].get(alias, 0)
+        databases[alias] = {
+            "mode": mode_of(settings_dict),
+            "conn_max_age": settings_dict.get("CONN_MAX_AGE"),
+            "health_checks": settings_dict.get("CONN_HEALTH_CHECKS", False),
+            "pool": pool if isinstance(pool, dict) else ({} if pool else None),
+            "opened": opened,
+            "opened_per_request": round(opened / snapshot["requests"], 3) if snapshot["requests"] else None,
+            "pool_stats": pool_stats(alias),
+        }
+    return {"requests": snapshot["requests"], "databases": databases}
+
+
+def benchmark(connection, requests, query="SELECT 1"):
+    """
+    Run `requests` simulated requests of one query each on `connection`. Like
+    close_old_connections(), every request starts and ends with
+    close_if_unusable_or_obsolete(). Returns the timings and the number of
+    connections opened.
+    """
+    opened = []
+
+    def count(sender, connection, **kwargs):
+        if connection is target:
+            opened.append(1)
+
+    target = connection
+    pooled = connection.vendor == "postgresql" and bool(connection.settings_dict["OPTIONS"].get("pool"))
+    connection_created.connect(count, weak=False)
+    try:
+        connection.close()
+        physical = connection.pool.get_stats().get("connections_num", 0) if pooled else None
+        started = time.perf_counter()
+        for _ in range(requests):
+            connection.close_if_unusable_or_obsolete()
+            with connection.cursor() as cursor:
+                cursor.execute(query)
+                cursor.fetchone()
+            connection.close_if_unusable_or_obsolete()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if pooled:
+            physical = connection.pool.get_stats().get("connections_num", 0) - physical
+    finally:
+        connection_created.disconnect(count)
+        connection.close()
+    return {
+        "mode": mode_of(connection.settings_dict),
+        "requests": requests,
+        "total_ms": round(elapsed_ms, 2),
+        "per_request_ms": round(elapsed_ms / requests, 3) if requests else 0.0,
+        "connections_opened": len(opened) if physical is None else physical,
+    }
@@ -0,0 +1,178 @@
+"""
+Read-replica routing.
+
+When settings.REPLICA_DATABASE names a database alias, reads made while
+"replica mode" is on go to that alias. Every write goes to the primary
+("default").
+
+Replica mode is switched on by:
+    ReplicaRoutingMiddleware  for GET / HEAD / OPTIONS requests
+    @reads_from_replica       for designated celery tasks (and any other function)
+
+Read-your-writes: replicas lag behind the primary, so a client must not read
+its own change back from a replica that has not caught up yet.
+- During a request, the first write pins the rest of the request to the
+  primary.
+- The response then sets the REPLICA_PIN_COOKIE cookie for
+  REPLICA_PIN_SECONDS. The client's following requests read from the primary
+  until the cookie expires.
+- Reads inside transaction.atomic() always use the primary.
+
+Without REPLICA_DATABASE every query goes to "default", as before.
+
+Trying it locally with two SQLite files:
+    cp db.sqlite3 replica.sqlite3
+    DB_REPLICA_NAME=replica.sqlite3 python manage.py runserver
+Changes made through the API land in db.sqlite3 only. List pages keep showing
+replica.sqlite3 once the pin cookie has expired.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PRIMARY = DEFAULT_DB_ALIAS
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class _Routing:
+    def __init__(self, replica, sticky):
+        self.replica = replica
+        # a write switches the rest of the unit of work to the primary
+        self.sticky = sticky
+        self.wrote = False
+
+
+_routing = ContextVar("db_routing", default=None)
+
+
+def replica_alias():
+    return getattr(settings, "REPLICA_DATABASE", None) or None
+
+
+@contextmanager
+def replica_reads(sticky=True):
+    """Send reads to the replica inside the block (see module docstring for the exceptions)."""
+    state = _Routing(replica=True, sticky=sticky)
+    token = _routing.set(state)
+    try:
+        yield state
+    finally:
+        _routing.reset(token)
+
+
+@contextmanager
+def primary_reads():
+    """Send reads to the primary inside the block, e.g. right before a write that depends on them."""
+    state = _Routing(replica=False, sticky=True)
+    token = _routing.set(state)
+    try:
+        yield state
+    finally:
+        _routing.reset(token)
+
+
+def reads_from_replica(func):
+    """
+    Run `func` with replica reads and without the write pin. For sweeps and
+    reports whose reads do not depend on their own writes.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with replica_reads(sticky=False):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        alias = replica_alias()
+        state = _routing.get()
+        if alias is None or state is None or not state.replica:
+            return PRIMARY if alias else None
+        if connections[PRIMARY].in_atomic_block:
+            return PRIMARY
+        return alias
+
+    def db_for_write(self, model, **hints):
+        state = _routing.get()
+        if state is not None:
+            state.wrote = True
+            if state.sticky:
+                state.replica = False
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY, replica_alias()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # the replica gets its schema through replication
+        if db == replica_alias():
+            return False
+        return None
+
+
+def _pinned(request):
+    try:
+        return float(request.COOKIES.get(settings.REPLICA_PIN_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def _replica_iterator(content):
+    # streamed bodies (exports) are read after the middleware has returned
+    with replica_reads():
+        yield from content
+
+
+class ReplicaRoutingMiddleware:
+    """Replica reads for safe, unpinned requests; pins the client to the primary after a write."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        replica = request.method in SAFE_METHODS and not _pinned(request)
+        state = _Routing(replica=replica, sticky=True)
+        token = _routing.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _routing.reset(token)
+        return self.finish(response, replica, state)
+
+    async def __acall__(self, request):
+        replica = request.method in SAFE_METHODS and not _pinned(request)
+        state = _Routing(replica=replica, sticky=True)
+        token = _routing.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _routing.reset(token)
+        return self.finish(response, replica, state)
+
+    def finish(self, response, replica, state):
+        if replica and replica_alias() and response.streaming and not response.is_async:
+            response.streaming_content = _replica_iterator(response.streaming_content)
+        if state.wrote and replica_alias():
+            seconds = settings.REPLICA_PIN_SECONDS
+            response.set_cookie(
+                settings.REPLICA_PIN_COOKIE, f"{time.time() + seconds:.3f}",
+                max_age=seconds, httponly=True, samesite="Lax",
+            )
+        return response
@@ -0,0 +1,243 @@
+"""
+Distributed locks for periodic and manually triggered jobs.
+
+A job wrapped with @single_instance runs at most once at a time across all
+workers: a second run that finds the lock taken is skipped instead of
+overlapping the first one. enqueue_once() coalesces manual triggers so any
+number of clicks while a run is queued enqueue a single run.
+
+A trigger is not lost to a skip. enqueue_once() publishes its message with
+the marker's token as the celery task id. When that message reaches a
+worker while another run holds the lock, it sets a ":missed" flag, and the
+holder runs the job once more after its run. Messages still waiting in the
+queue are left to run themselves.
+
+Backends (settings.TASK_LOCK_BACKEND):
+    redis -> SET key token NX PX ttl on settings.TASK_LOCK_URL
+    local -> in-process dict, for tests and single-process development
+"""
+import logging
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from functools import lru_cache, wraps
+
+from celery import current_task
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "joblock:"
+
+# compare-and-delete so a run never releases a lock that expired and was re-taken by another run
+_RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class LocalLockBackend:
+    def __init__(self):
+        self._locks = {}
+        self._mutex = threading.Lock()
+
+    def acquire(self, key, ttl_ms):
+        now = time.monotonic()
+        with self._mutex:
+            held = self._locks.get(key)
+            if held and held[1] > now:
+                return None
+            token = uuid.uuid4().hex
+            self._locks[key] = (token, now + ttl_ms / 1000)
+            return token
+
+    def release(self, key, token=None):
+        """True when the key was held (by `token`, when given) and is now released."""
+        with self._mutex:
+            held = self._locks.get(key)
+            if held is None or (token is not None and held[0] != token):
+                return False
+            del self._locks[key]
+            # an expired entry was no longer held
+            return held[1] > time.monotonic()
+
+    def clear(self):
+        with self._mutex:
+            self._locks.clear()
+
+
+class RedisLockBackend:
+    def __init__(self, url):
+        import redis
+
+        self.client = redis.Redis.from_url(url, socket_connect_timeout=2, socket_timeout=2)
+        self._release = self.client.register_script(_RELEASE_SCRIPT)
+
+    def acquire(self, key, ttl_ms):
+        token = uuid.uuid4().hex
+        if self.client.set(key, token, nx=True, px=ttl_ms):
+            return token
+        return None
+
+    def release(self, key, token=None):
+        """True when the key was held (by `token`, when given) and is now released."""
+        if token is None:
+            return bool(self.client.delete(key))
+        return bool(self._release(keys=[key], args=[token]))
+
+
+local_backend = LocalLockBackend()
+
+
+@lru_cache(maxsize=None)
+def _redis_backend(url):
+    return RedisLockBackend(url)
+
+
+def get_lock_backend():
+    name = getattr(settings, "TASK_LOCK_BACKEND", "local")
+    if name == "redis":
+        return _redis_backend(settings.TASK_LOCK_URL)
+    if name == "local":
+        return local_backend
+    raise ValueError(f"Unknown TASK_LOCK_BACKEND: {name}")
+
+
+class LockStats:
+    """Per-lock counters and timings for the current process."""
+
+    def __init__(self):
+        self._mutex = threading.Lock()
+        self.data = {}
+
+    def record(self, name, acquired, wait_ms, hold_ms=0.0):
+        with self._mutex:
+            entry = self.data.setdefault(name, {
+                "acquired": 0, "skipped": 0,
+                "wait_ms_total": 0.0, "hold_ms_total": 0.0,
+                "last_wait_ms": 0.0, "last_hold_ms": 0.0,
+            })
+            entry["acquired" if acquired else "skipped"] += 1
+            entry["wait_ms_total"] += wait_ms
+            entry["last_wait_ms"] = wait_ms
+            if acquired:
+                entry["hold_ms_total"] += hold_ms
+                entry["last_hold_ms"] = hold_ms
+
+    def snapshot(self):
+        with self._mutex:
+            return {name: dict(entry) for name, entry in self.data.items()}
+
+
+lock_stats = LockStats()
+
+
+class JobLock:
+    def __init__(self, name, token, wait_ms):
+        self.name = name
+        self.token = token
+        self.wait_ms = wait_ms
+        self.hold_ms = 0.0
+
+    @property
+    def acquired(self):
+        return self.token is not None
+
+
+@contextmanager
+def job_lock(name, ttl=3600, wait=0):
+    """
+    Hold the lock `name` for the duration of the block.
+    ttl: seconds after which a crashed holder's lock expires.
+    wait: seconds to keep retrying before giving up (0 = try once).
+    The yielded JobLock tells whether the lock was acquired.
+    """
+    backend = get_lock_backend()
+    key = f"{KEY_PREFIX}{name}"
+    started = time.monotonic()
+    deadline = started + wait
+    token = backend.acquire(key, int(ttl * 1000))
+    while token is None and time.monotonic() < deadline:
+        time.sleep(0.1)
+        token = backend.acquire(key, int(ttl * 1000))
+
+    lock = JobLock(name, token, (time.monotonic() - started) * 1000)
+    if not lock.acquired:
+        lock_stats.record(name, False, lock.wait_ms)
+        logger.info("job lock %s busy, skipping run (waited %.1f ms)", name, lock.wait_ms)
+        yield lock
+        return
+
+    acquired_at = time.monotonic()
+    try:
+        yield lock
+    finally:
+        lock.hold_ms = (time.monotonic() - acquired_at) * 1000
+        backend.release(key, token)
+        lock_stats.record(name, True, lock.wait_ms, lock.hold_ms)
+        logger.info("job lock %s released (waited %.1f ms, held %.1f ms)", name, lock.wait_ms, lock.hold_ms)
+
+
+def _current_task_id():
+    return getattr(getattr(current_task, "request", None), "id", None)
+
+
+def single_instance(name, ttl=3600, wait=0):
+    """
+    Decorator for jobs that must never overlap. A run that cannot take the
+    lock returns {"skipped": True} without executing. When that run was an
+    enqueue_once() trigger, the run holding the lock runs once more after it
+    finishes. Every follow-up run takes the lock afresh, with its own ttl.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            backend = get_lock_backend()
+            queued, missed = f"{KEY_PREFIX}{name}:queued", f"{KEY_PREFIX}{name}:missed"
+            trigger = _current_task_id()
+            follow_up = marked = False
+            while True:
+                with job_lock(name, ttl=ttl, wait=wait) as lock:
+                    if not lock.acquired:
+                        if not marked and (follow_up or trigger and backend.release(queued, trigger)):
+                            backend.acquire(missed, int(ttl * 1000))
+                            marked = True
+                            # the holder may have checked the flag already: try the lock once more
+                            continue
+                        return {"skipped": True, "lock": name}
+                    if trigger:
+                        # this trigger's run is starting, so the next one may be queued
+                        backend.release(queued, trigger)
+                    # triggers skipped so far are covered by this run
+                    backend.release(missed)
+                    result = func(*args, **kwargs)
+                # a trigger was skipped while the lock was held
+                if not backend.release(missed):
+                    return result
+                follow_up, marked = True, False
+        return wrapper
+    return decorator
+
+
+def enqueue_once(task, name, args=(), kwargs=None, ttl=600):
+    """
+    Enqueue `task` unless a run for the lock `name` is already queued.
+    The marker is cleared when the queued run starts or is skipped (see
+    single_instance), or after ttl. Returns True when a new run was enqueued.
+    """
+    backend = get_lock_backend()
+    key = f"{KEY_PREFIX}{name}:queued"
+    token = backend.acquire(key, ttl * 1000)
+    if token is None:
+        return False
+    try:
+        # the task id lets the run recognize itself as this trigger
+        task.apply_async(list(args), kwargs or {}, task_id=token)
+    except Exception:
+        # nothing was queued, so the next trigger must not be turned away
+        backend.release(key, token)
+        raise
+    return True
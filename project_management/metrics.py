@@ -0,0 +1,453 @@
+"""
+Prometheus metrics for requests and celery tasks, served at /metrics.
+
+MetricsMiddleware records, per resolved URL name and method:
+    http_requests_total{status}        requests
+    http_request_duration_seconds      latency histogram
+    http_request_db_queries            queries per request (histogram)
+    http_request_db_seconds            time spent in them (histogram)
+    http_request_cache_lookups_total   cache gets, by result (hit / miss)
+    http_response_size_bytes           body size histogram
+Every celery task gets celery_tasks_total{state}, celery_task_runtime_seconds,
+celery_task_queue_wait_seconds (publish, or its eta, to start; from the
+sent_at header stamped at publish) and celery_task_db_queries.
+The per-process counters behind cache_report(), connection_report() and
+lock_stats are exported as well.
+
+Aggregation across processes: every gunicorn worker and celery child keeps
+its values in memory. A background thread writes them every
+METRICS_FLUSH_SECONDS to METRICS_DIR/<host>-<pid>.json, and /metrics adds up
+the files of all processes. Give the web and celery processes the same
+directory to see both (the compose services share the project mount). Files
+not refreshed for METRICS_RETENTION_SECONDS belong to dead processes and are
+removed; their counts drop out, which Prometheus treats as a counter reset.
+With METRICS_DIR empty, /metrics reports the serving process only.
+"""
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from celery.signals import before_task_publish, task_postrun, task_prerun
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+TASK_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0)
+
+# anything else is reported as "other" so odd clients cannot add label values
+METHODS = ("GET", "HEAD", "OPTIONS", "POST", "PUT", "PATCH", "DELETE")
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, registry, name, documentation, labels):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.values = {}
+
+    def inc(self, *labels, amount=1):
+        with self.registry.mutex:
+            self.values[labels] = self.values.get(labels, 0) + amount
+        self.registry.touched()
+
+    @staticmethod
+    def merge(total, value):
+        return (total or 0) + value
+
+    def lines(self, values):
+        for labels, value in sorted(values.items()):
+            yield f"{self.name}{_labels(self.labels, labels)} {_number(value)}"
+
+
+class Histogram(Counter):
+    """Stores the count per bucket (the last one is +Inf) followed by the sum."""
+
+    kind = "histogram"
+
+    def __init__(self, registry, name, documentation, labels, buckets):
+        super().__init__(registry, name, documentation, labels)
+        self.buckets = buckets
+
+    def observe(self, value, *labels):
+        with self.registry.mutex:
+            entry = self.values.get(labels)
+            if entry is None:
+                entry = self.values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            entry[next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))] += 1
+            entry[-1] += value
+        self.registry.touched()
+
+    @staticmethod
+    def merge(total, value):
+        if total is None:
+            return list(value)
+        return [a + b for a, b in zip(total, value)]
+
+    def lines(self, values):
+        names = self.labels + ("le",)
+        for labels, entry in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), entry[:-1]):
+                cumulative += count
+                yield f"{self.name}_bucket{_labels(names, labels + (_number(bound),))} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labels, labels)} {_number(entry[-1])}"
+            yield f"{self.name}_count{_labels(self.labels, labels)} {cumulative}"
+
+
+def _number(value):
+    if isinstance(value, float):
+        return repr(int(value)) if value.is_integer() else repr(value)
+    return str(value)
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    escaped = (str(value).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n") for value in values)
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(names, escaped)) + "}"
+
+
+class Registry:
+    """The metrics of this process, and the file they are shared through."""
+
+    def __init__(self):
+        self.mutex = threading.Lock()
+        self.metrics = {}
+        self._flusher = None
+        os.register_at_fork(after_in_child=self._forked)
+
+    def counter(self, name, documentation, labels=()):
+        return self._add(Counter(self, name, documentation, labels))
+
+    def histogram(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        return self._add(Histogram(self, name, documentation, labels, buckets))
+
+    def _add(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def _forked(self):
+        # a forked worker starts from zero: the parent's values are its own to report
+        self.mutex = threading.Lock()
+        for metric in self.metrics.values():
+            metric.values = {}
+        self._flusher = None
+
+    def touched(self):
+        if self._flusher is None and settings.METRICS_DIR:
+            self._flusher = threading.Thread(target=self._flush_forever, name="metrics-flush", daemon=True)
+            self._flusher.start()
+
+    def snapshot(self):
+        """{metric name: {label values: value}}, including the collected process counters."""
+        with self.mutex:
+            data = {name: dict(metric.values) for name, metric in self.metrics.items()}
+        for name, labels, value in collect_process_counters():
+            data[name][labels] = value
+        return data
+
+    def clear(self):
+        with self.mutex:
+            for metric in self.metrics.values():
+                metric.values = {}
+
+    def file(self):
+        return Path(settings.METRICS_DIR) / f"{socket.gethostname()}-{os.getpid()}.json"
+
+    def flush(self):
+        """Write this process's values to its file; rewriting it also marks the process as alive."""
+        path = self.file()
+        data = {name: [[list(labels), value] for labels, value in values.items()] for name, values in self.snapshot().items()}
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_name(f".{path.name}.tmp")
+        temporary.write_text(json.dumps(data))
+        os.replace(temporary, path)
+
+    def _flush_forever(self):
+        while True:
+            time.sleep(settings.METRICS_FLUSH_SECONDS)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("metrics not written to %s", settings.METRICS_DIR)
+
+    def other_processes(self):
+        """Snapshots read from the files of the other live processes; stale files are removed."""
+        if not settings.METRICS_DIR:
+            return
+        own = self.file()
+        oldest = time.time() - settings.METRICS_RETENTION_SECONDS
+        for path in Path(settings.METRICS_DIR).glob("*.json"):
+            if path == own:
+                continue
+            try:
+                if path.stat().st_mtime < oldest:
+                    path.unlink()
+                    continue
+                data = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue
+            yield {name: {tuple(labels): value for labels, value in entries} for name, entries in data.items()}
+
+    def render(self):
+        """Prometheus text exposition of this process plus every other process."""
+        totals = {name: {} for name in self.metrics}
+        snapshots = [self.snapshot(), *self.other_processes()]
+        for snapshot in snapshots:
+            for name, values in snapshot.items():
+                metric = self.metrics.get(name)
+                if metric is None:
+                    continue
+                for labels, value in values.items():
+                    totals[name][labels] = metric.merge(totals[name].get(labels), value)
+        lines = []
+        for name, metric in self.metrics.items():
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            lines.extend(metric.lines(totals[name]))
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.counter(
+    "http_requests_total", "Requests by resolved URL name, method and status.", ("view", "method", "status"),
+)
+http_duration = registry.histogram(
+    "http_request_duration_seconds", "Time to produce the response.", ("view", "method"),
+)
+http_db_queries = registry.histogram(
+    "http_request_db_queries", "Database queries per request.", ("view", "method"), QUERY_BUCKETS,
+)
+http_db_seconds = registry.histogram(
+    "http_request_db_seconds", "Time spent in database queries per request.", ("view", "method"),
+)
+http_cache_lookups = registry.counter(
+    "http_request_cache_lookups_total", "Cache gets made by requests, by result.", ("view", "method", "result"),
+)
+http_response_size = registry.histogram(
+    "http_response_size_bytes", "Response body size.", ("view", "method"), SIZE_BUCKETS,
+)
+task_runs = registry.counter("celery_tasks_total", "Finished celery tasks by final state.", ("task", "state"))
+task_runtime = registry.histogram(
+    "celery_task_runtime_seconds", "Celery task run time.", ("task", "state"), TASK_BUCKETS,
+)
+task_queue_wait = registry.histogram(
+    "celery_task_queue_wait_seconds", "Time from publish (or eta) to the start of the run.", ("task",), TASK_BUCKETS,
+)
+task_db_queries = registry.histogram(
+    "celery_task_db_queries", "Database queries per task run.", ("task",), QUERY_BUCKETS,
+)
+cache_operations = registry.counter(
+    "cache_operations_total", "TieredCache counters (project_management/cache.py).", ("cache", "operation"),
+)
+db_connections_opened = registry.counter(
+    "db_connections_opened_total", "Database connections opened (or taken from the pool).", ("database",),
+)
+job_lock_runs = registry.counter("job_lock_runs_total", "Job lock attempts by result.", ("lock", "result"))
+job_lock_wait = registry.counter("job_lock_wait_seconds_total", "Time spent waiting for job locks.", ("lock",))
+job_lock_hold = registry.counter("job_lock_hold_seconds_total", "Time job locks were held.", ("lock",))
+
+
+def collect_process_counters():
+    """(metric name, labels, value) for the counters other modules keep per process."""
+    from .cache import CacheStats, cache_report
+    from .db_connections import connection_stats
+    from .locks import lock_stats
+
+    for alias, report in cache_report().items():
+        for operation in CacheStats.COUNTERS:
+            yield cache_operations.name, (alias, operation), report[operation]
+    for alias, opened in connection_stats.snapshot()["opened"].items():
+        yield db_connections_opened.name, (alias,), opened
+    for name, entry in lock_stats.snapshot().items():
+        yield job_lock_runs.name, (name, "acquired"), entry["acquired"]
+        yield job_lock_runs.name, (name, "skipped"), entry["skipped"]
+        yield job_lock_wait.name, (name,), entry["wait_ms_total"] / 1000
+        yield job_lock_hold.name, (name,), entry["hold_ms_total"] / 1000
+
+
+class Sample:
+    """What one request or task run did, filled in while it runs."""
+
+    __slots__ = ("origin", "queries", "db_seconds", "cache_hits", "cache_misses")
+
+    def __init__(self, origin):
+        # the request, or the task name
+        self.origin = origin
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+
+_sample = ContextVar("metrics_sample", default=None)
+
+
+def current_origin():
+    """URL name (or path) of the request, or name of the task, being run; "" outside both."""
+    sample = _sample.get()
+    if sample is None:
+        return ""
+    if isinstance(sample.origin, str):
+        return sample.origin
+    match = sample.origin.resolver_match
+    return match.view_name if match else sample.origin.path
+
+
+def cache_lookup(hit):
+    """Called by TieredCache.get() for the request or task being measured."""
+    sample = _sample.get()
+    if sample is not None:
+        if hit:
+            sample.cache_hits += 1
+        else:
+            sample.cache_misses += 1
+
+
+def _observe_query(execute, sql, params, many, context):
+    sample = _sample.get()
+    if sample is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        sample.queries += 1
+        sample.db_seconds += time.perf_counter() - started
+
+
+@receiver(connection_created, dispatch_uid="metrics.connection_created")
+def _install_query_observer(sender, connection, **kwargs):
+    # first in the list: execute_wrapper() blocks pop from the end
+    if _observe_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _observe_query)
+
+
+def _count_streamed(content, labels):
+    size = 0
+    for chunk in content:
+        size += len(chunk)
+        yield chunk
+    http_response_size.observe(size, *labels)
+
+
+class MetricsMiddleware:
+    """Records latency, queries, cache lookups and size per resolved URL name and method."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        sample = Sample(request)
+        token = _sample.set(sample)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _sample.reset(token)
+        return self.record(request, response, sample, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        sample = Sample(request)
+        token = _sample.set(sample)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _sample.reset(token)
+        return self.record(request, response, sample, time.perf_counter() - started)
+
+    def record(self, request, response, sample, elapsed):
+        match = request.resolver_match
+        labels = (match.view_name if match else "unresolved", request.method if request.method in METHODS else "other")
+        http_requests.inc(*labels, str(response.status_code))
+        http_duration.observe(elapsed, *labels)
+        http_db_queries.observe(sample.queries, *labels)
+        http_db_seconds.observe(sample.db_seconds, *labels)
+        if sample.cache_hits:
+            http_cache_lookups.inc(*labels, "hit", amount=sample.cache_hits)
+        if sample.cache_misses:
+            http_cache_lookups.inc(*labels, "miss", amount=sample.cache_misses)
+        if not response.streaming:
+            http_response_size.observe(len(response.content), *labels)
+        elif not response.is_async:
+            # event streams (async) never end, so their size is not recorded
+            response.streaming_content = _count_streamed(response.streaming_content, labels)
+        return response
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint; requires `Authorization: Bearer <METRICS_TOKEN>`.
+    Without a METRICS_TOKEN it only exists while DEBUG is on.
+    """
+    if not settings.METRICS_TOKEN:
+        if not settings.DEBUG:
+            raise Http404
+    elif not constant_time_compare(
+        request.headers.get("Authorization", ""), f"Bearer {settings.METRICS_TOKEN}",
+    ):
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type=CONTENT_TYPE)
+
+
+_running = {}
+
+
+@before_task_publish.connect(dispatch_uid="metrics.before_task_publish")
+def _stamp_sent_at(headers=None, **kwargs):
+    if headers is not None:
+        headers.setdefault("sent_at", time.time())
+
+
+@task_prerun.connect(dispatch_uid="metrics.task_prerun")
+def _task_started(task_id=None, task=None, **kwargs):
+    sent_at = (task.request.headers or {}).get("sent_at")
+    if sent_at is not None:
+        ready_at = float(sent_at)
+        if task.request.eta:
+            ready_at = max(ready_at, datetime.fromisoformat(task.request.eta).timestamp())
+        task_queue_wait.observe(max(time.time() - ready_at, 0.0), task.name)
+    sample = Sample(task.name)
+    _running[task_id] = (time.perf_counter(), sample, _sample.set(sample))
+
+
+@task_postrun.connect(dispatch_uid="metrics.task_postrun")
+def _task_finished(task_id=None, task=None, state=None, **kwargs):
+    running = _running.pop(task_id, None)
+    if running is None:
+        return
+    started, sample, token = running
+    _sample.reset(token)
+    state = state or "UNKNOWN"
+    task_runs.inc(task.name, state)
+    task_runtime.observe(time.perf_counter() - started, task.name, state)
+    task_db_queries.observe(sample.queries, task.name)
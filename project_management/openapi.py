@@ -0,0 +1,153 @@
+"""
+Precomputed OpenAPI schema.
+
+Generating the drf-yasg schema walks every viewset and serializer and takes
+seconds. SchemaView only does it once per code version:
+1. `python manage.py generate_openapi` writes openapi-<version>.json / .yaml
+   to settings.OPENAPI_SCHEMA_DIR at deploy time (Docker/entrypoint.sh). With
+   --cache it also stores them in the cache (the Procfile release phase,
+   whose files do not reach the web dynos).
+2. A worker serves the artifact for the current version if there is one.
+   Otherwise it takes the schema from the cache, or generates it once
+   (single-flight) and caches it without expiry.
+3. The bytes stay in process memory. Responses carry an ETag, and
+   If-None-Match requests get a 304.
+
+The version is settings.CODE_VERSION (e.g. the git sha set by CI). Without
+it, the version is a hash of the project's Python sources, so any code
+change produces a new schema. The Swagger / ReDoc pages themselves are cheap
+and still render per request.
+"""
+import hashlib
+import threading
+from functools import lru_cache
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from drf_yasg import openapi
+from drf_yasg.app_settings import swagger_settings
+from drf_yasg.codecs import OpenAPICodecJson, OpenAPICodecYaml
+from drf_yasg.views import get_schema_view
+from rest_framework import permissions
+
+API_INFO = openapi.Info(
+    title="Project Management API",
+    default_version="v1",
+    description="API documentation for Project Management",
+    contact=openapi.Contact(email="irishmjn@gmail.com"),
+    license=openapi.License(name="MIT License"),
+)
+
+# spec renderer format -> artifact extension
+SPEC_FORMATS = {"openapi": "json", "json": "json", "yaml": "yaml"}
+
+_loaded = {}
+_loaded_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def _source_fingerprint():
+    base_dir = Path(settings.BASE_DIR).resolve()
+    roots = {Path(__file__).resolve().parent}
+    for config in apps.get_app_configs():
+        path = Path(config.path).resolve()
+        if path.is_relative_to(base_dir):
+            roots.add(path)
+    digest = hashlib.sha256()
+    for root in sorted(roots):
+        for path in sorted(root.rglob("*.py")):
+            digest.update(str(path.relative_to(base_dir)).encode())
+            digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def code_version():
+    return settings.CODE_VERSION or _source_fingerprint()
+
+
+def generate():
+    """{extension: encoded schema} for every artifact format, from one schema generation."""
+    generator = swagger_settings.DEFAULT_GENERATOR_CLASS(API_INFO)
+    schema = generator.get_schema(request=None, public=True)
+    return {
+        "json": OpenAPICodecJson(validators=[]).encode(schema),
+        "yaml": OpenAPICodecYaml(validators=[]).encode(schema),
+    }
+
+
+def artifact_path(extension, version):
+    return Path(settings.OPENAPI_SCHEMA_DIR) / f"openapi-{version}.{extension}"
+
+
+def cache_key(extension, version):
+    return f"openapi:{version}:{extension}"
+
+
+def write_artifacts(version=None, to_cache=False):
+    """Generate the schema and write it for `version`; returns the paths written."""
+    version = version or code_version()
+    directory = Path(settings.OPENAPI_SCHEMA_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for extension, body in generate().items():
+        path = artifact_path(extension, version)
+        path.write_bytes(body)
+        paths.append(path)
+        if to_cache:
+            cache.set(cache_key(extension, version), body, None)
+    return paths
+
+
+def _generate_cached(extension, version):
+    bodies = generate()
+    for other, body in bodies.items():
+        if other != extension:
+            cache.set(cache_key(other, version), body, None)
+    return bodies[extension]
+
+
+def load(extension):
+    """(body, etag) of the schema for the current code version."""
+    version = code_version()
+    entry = _loaded.get((version, extension))
+    if entry is not None:
+        return entry
+    with _loaded_lock:
+        entry = _loaded.get((version, extension))
+        if entry is None:
+            try:
+                body = artifact_path(extension, version).read_bytes()
+            except FileNotFoundError:
+                body = cache.get_or_set(
+                    cache_key(extension, version), lambda: _generate_cached(extension, version), None,
+                )
+            entry = (body, f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+            _loaded[(version, extension)] = entry
+    return entry
+
+
+class PrecomputedSchemaMixin:
+    """Answers spec requests (?format=openapi, .json, .yaml) from load() instead of regenerating."""
+
+    def get(self, request, version="", format=None):
+        extension = SPEC_FORMATS.get(getattr(request.accepted_renderer, "format", None))
+        if extension is None:
+            return super().get(request, version, format)
+        body, etag = load(extension)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(body, content_type=request.accepted_renderer.media_type)
+        response["ETag"] = etag
+        # revalidate with the ETag, so a deploy is picked up immediately
+        patch_cache_control(response, public=True, no_cache=True)
+        return response
+
+
+class SchemaView(
+    PrecomputedSchemaMixin, get_schema_view(API_INFO, public=True, permission_classes=[permissions.AllowAny]),
+):
+    pass
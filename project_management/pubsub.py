@@ -0,0 +1,169 @@
+"""
+Publish/subscribe fan-out for the server-sent event stream.
+
+Publishing is synchronous (signal handlers, celery tasks). Subscriptions are
+asyncio objects consumed by the streaming response, one per open connection.
+
+Backends (settings.REALTIME_BACKEND):
+    redis  -> PUBLISH / SUBSCRIBE on settings.REALTIME_REDIS_URL, shared by all processes
+    memory -> in-process queues, for tests and single-process development
+
+A publish that fails (Redis down) is logged and dropped; further publishes
+are skipped for PUBLISH_RETRY_SECONDS so requests don't keep paying the
+connect timeout. Clients catch up through the regular endpoints on reconnect.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+logger = logging.getLogger(__name__)
+
+PUBLISH_RETRY_SECONDS = 30
+
+
+class MemorySubscription:
+    def __init__(self, backend, channels):
+        self.backend = backend
+        self.channels = set()
+        self.queue = asyncio.Queue()
+        self.loop = asyncio.get_running_loop()
+        self.update_sync(channels)
+
+    def deliver(self, channel, message):
+        try:
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, (channel, message))
+        except RuntimeError:
+            # the connection's event loop is gone
+            self.update_sync(())
+
+    def update_sync(self, channels):
+        channels = set(channels)
+        self.backend._move(self, self.channels, channels)
+        self.channels = channels
+
+    async def update(self, channels):
+        self.update_sync(channels)
+
+    async def get(self, timeout):
+        """Next (channel, message), or None after `timeout` seconds without one."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def close(self):
+        self.update_sync(())
+
+
+class MemoryBackend:
+    def __init__(self):
+        self._subscribers = {}
+        self._mutex = threading.Lock()
+
+    def _move(self, subscription, old, new):
+        with self._mutex:
+            for channel in old - new:
+                self._subscribers.get(channel, set()).discard(subscription)
+            for channel in new - old:
+                self._subscribers.setdefault(channel, set()).add(subscription)
+
+    def publish(self, channel, message):
+        with self._mutex:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            subscription.deliver(channel, message)
+        return len(subscribers)
+
+    async def subscribe(self, channels):
+        return MemorySubscription(self, channels)
+
+    def clear(self):
+        with self._mutex:
+            self._subscribers.clear()
+
+
+class RedisSubscription:
+    def __init__(self, client, pubsub, channels):
+        self.client = client
+        self.pubsub = pubsub
+        self.channels = set(channels)
+
+    async def update(self, channels):
+        channels = set(channels)
+        if channels - self.channels:
+            await self.pubsub.subscribe(*(channels - self.channels))
+        if self.channels - channels:
+            await self.pubsub.unsubscribe(*(self.channels - channels))
+        self.channels = channels
+
+    async def get(self, timeout):
+        message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+        if message is None:
+            return None
+        return message["channel"].decode(), message["data"].decode()
+
+    async def close(self):
+        await self.pubsub.aclose()
+        await self.client.aclose()
+
+
+class RedisBackend:
+    def __init__(self, url):
+        import redis
+
+        self.url = url
+        self.client = redis.Redis.from_url(url, socket_connect_timeout=2, socket_timeout=2)
+
+    def publish(self, channel, message):
+        return self.client.publish(channel, message)
+
+    async def subscribe(self, channels):
+        import redis.asyncio
+
+        client = redis.asyncio.Redis.from_url(self.url, socket_connect_timeout=2)
+        pubsub = client.pubsub()
+        await pubsub.subscribe(*channels)
+        return RedisSubscription(client, pubsub, channels)
+
+
+memory_backend = MemoryBackend()
+
+
+@lru_cache(maxsize=None)
+def _redis_backend(url):
+    return RedisBackend(url)
+
+
+def get_backend():
+    name = getattr(settings, "REALTIME_BACKEND", "memory")
+    if name == "redis":
+        return _redis_backend(settings.REALTIME_REDIS_URL)
+    if name == "memory":
+        return memory_backend
+    raise ValueError(f"Unknown REALTIME_BACKEND: {name}")
+
+
+_suspended_until = 0.0
+
+
+def publish(channels, event):
+    """Send `event` (a dict) to every channel; returns False when it was dropped."""
+    global _suspended_until
+    if time.monotonic() < _suspended_until:
+        return False
+    message = json.dumps(event, cls=DjangoJSONEncoder)
+    backend = get_backend()
+    try:
+        for channel in channels:
+            backend.publish(channel, message)
+    except Exception:
+        _suspended_until = time.monotonic() + PUBLISH_RETRY_SECONDS
+        logger.exception("realtime publish failed, pausing for %ss", PUBLISH_RETRY_SECONDS)
+        return False
+    return True
@@ -7,6 +7,7 @@ from pathlib import Path
 import os
 from datetime import timedelta
 from decouple import config, Csv
+from django.core.exceptions import ImproperlyConfigured
 
 SOCIALACCOUNT_ADAPTER = 'project_management.adapter.FixSocialAppAdapter'
 
@@ -44,8 +45,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'project_management.metrics.MetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'project_management.db_router.ReplicaRoutingMiddleware',
     "whitenoise.middleware.WhiteNoiseMiddleware",
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -53,7 +56,15 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'allauth.account.middleware.AccountMiddleware',
+    'projects.activity.ActivityLogMiddleware',
 ]
+"""
+static files are served by WhiteNoise from the WSGI web process. The ASGI process turns
+it off (asgi.py): WhiteNoise is sync-only, and Django would run the whole chain, async
+views included, through async_to_sync in a worker thread
+"""
+if not config('SERVE_STATIC', default=True, cast=bool):
+    MIDDLEWARE.remove("whitenoise.middleware.WhiteNoiseMiddleware")
 
 ROOT_URLCONF = 'project_management.urls'
 
@@ -104,6 +115,64 @@ DATABASES = {
     }
 }
 
+"""
+Connection reuse (project_management/db_connections.py), DB_CONN_MODE:
+    per_request -> new connection per request, costly with sslmode=require
+    persistent  -> each worker keeps its connection for DB_CONN_MAX_AGE seconds, pinged before reuse
+    pool        -> psycopg 3 pool per process (install psycopg[pool] in place of psycopg2-binary);
+                   use it under ASGI, where persistent connections are not reused (the ASGI
+                   process runs per_request until then, see asgi.py)
+"""
+DB_CONN_MODE = config('DB_CONN_MODE', default='persistent')
+if DB_CONN_MODE == 'persistent':
+    DATABASES['default']['CONN_MAX_AGE'] = config('DB_CONN_MAX_AGE', default=60, cast=int)
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+elif DB_CONN_MODE == 'pool':
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+        'max_size': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+        # seconds a request waits for a free connection before failing
+        'timeout': config('DB_POOL_TIMEOUT', default=10, cast=float),
+    }
+elif DB_CONN_MODE != 'per_request':
+    raise ImproperlyConfigured(f"Unknown DB_CONN_MODE: {DB_CONN_MODE}")
+
+"""
+Optional read replica, see project_management/db_router.py. It shares the
+primary's engine and credentials unless DB_REPLICA_* says otherwise.
+Tests run against the primary only (TEST MIRROR).
+"""
+DB_REPLICA_NAME = config('DB_REPLICA_NAME', default='')
+if DB_REPLICA_NAME:
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': DB_REPLICA_NAME,
+        'USER': config('DB_REPLICA_USER', default=DATABASES['default']['USER']),
+        'PASSWORD': config('DB_REPLICA_PASSWORD', default=DATABASES['default']['PASSWORD']),
+        'HOST': config('DB_REPLICA_HOST', default=DATABASES['default']['HOST']),
+        'PORT': config('DB_REPLICA_PORT', default=DATABASES['default']['PORT']),
+        'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+        'TEST': {'MIRROR': 'default'},
+    }
+REPLICA_DATABASE = 'replica' if DB_REPLICA_NAME else None
+DATABASE_ROUTERS = ['project_management.db_router.ReplicaRouter']
+# after a write the client reads from the primary for this long (replication lag allowance)
+REPLICA_PIN_SECONDS = config('REPLICA_PIN_SECONDS', default=5, cast=int)
+REPLICA_PIN_COOKIE = 'db_pin'
+
+"""
+Django's defaults, plus the cheaper hasher the bulk import uses; the first entry stays
+the preferred one so imported passwords are upgraded on login
+"""
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+    'employee.hashers.ImportPBKDF2PasswordHasher',
+]
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -200,12 +269,139 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 
+"""
+request paths publish through projects/publisher.py: a short broker connect timeout
+and at most one quick retry, then a circuit breaker spools messages to the database
+until the broker answers again
+"""
+CELERY_BROKER_CONNECTION_TIMEOUT = config('CELERY_BROKER_CONNECTION_TIMEOUT', default=2, cast=float)
+"""
+Redis redelivers a message that is not acknowledged within the visibility timeout, and
+an ETA message stays unacknowledged until it runs; due date reminders are therefore
+only published REMINDER_SCHEDULE_HORIZON_SECONDS ahead (projects.tasks.schedule_upcoming_reminders
+publishes the rest), which must stay below the visibility timeout
+"""
+CELERY_BROKER_VISIBILITY_TIMEOUT = config('CELERY_BROKER_VISIBILITY_TIMEOUT', default=3600, cast=int)
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    'socket_connect_timeout': CELERY_BROKER_CONNECTION_TIMEOUT,
+    'visibility_timeout': CELERY_BROKER_VISIBILITY_TIMEOUT,
+}
+REMINDER_SCHEDULE_HORIZON_SECONDS = config('REMINDER_SCHEDULE_HORIZON_SECONDS', default=30 * 60, cast=int)
+if REMINDER_SCHEDULE_HORIZON_SECONDS >= CELERY_BROKER_VISIBILITY_TIMEOUT:
+    raise ImproperlyConfigured("REMINDER_SCHEDULE_HORIZON_SECONDS must be below CELERY_BROKER_VISIBILITY_TIMEOUT")
+CELERY_TASK_PUBLISH_RETRY_POLICY = {'max_retries': 1, 'interval_start': 0, 'interval_step': 0.2, 'interval_max': 0.2}
+BROKER_CIRCUIT_FAILURE_THRESHOLD = config('BROKER_CIRCUIT_FAILURE_THRESHOLD', default=3, cast=int)
+BROKER_CIRCUIT_RESET_TIMEOUT = config('BROKER_CIRCUIT_RESET_TIMEOUT', default=30, cast=float)
+
+"""
+locks that stop periodic/manual jobs from overlapping (project_management/locks.py)
+redis: SET NX PX on TASK_LOCK_URL, local: in-process only (tests, single worker)
+"""
+TASK_LOCK_BACKEND = config('TASK_LOCK_BACKEND', default='redis')
+TASK_LOCK_URL = config('TASK_LOCK_URL', default=CELERY_BROKER_URL)
+
+"""
+server-sent events at /api/events/ (projects/realtime.py), fanned out over pub/sub:
+redis: PUBLISH/SUBSCRIBE on REALTIME_REDIS_URL, memory: in-process only (tests, single process)
+"""
+REALTIME_BACKEND = config('REALTIME_BACKEND', default='redis')
+REALTIME_REDIS_URL = config('REALTIME_REDIS_URL', default=CELERY_BROKER_URL)
+REALTIME_HEARTBEAT_SECONDS = config('REALTIME_HEARTBEAT_SECONDS', default=15, cast=int)
+"""streams end after this long and the browser reconnects, re-checking the token and subscriptions"""
+REALTIME_MAX_STREAM_SECONDS = config('REALTIME_MAX_STREAM_SECONDS', default=30 * 60, cast=int)
+"""how long a ticket from /api/events/ticket/ can be used to open a stream (once)"""
+REALTIME_TICKET_SECONDS = config('REALTIME_TICKET_SECONDS', default=30, cast=int)
+
+"""
+application cache (project_management/cache.py): in-process LRU in front of Redis,
+kept in sync over pub/sub; redis: CACHE_URL (give it its own database, cache.clear()
+flushes it), memory: local memory only (tests, single process).
+Bump CACHE_VERSION to start from an empty key space.
+"""
+CACHE_BACKEND = config('CACHE_BACKEND', default='redis')
+if CACHE_BACKEND not in ('redis', 'memory'):
+    raise ImproperlyConfigured(f"Unknown CACHE_BACKEND: {CACHE_BACKEND}")
+CACHES = {
+    'default': {
+        'BACKEND': 'project_management.cache.TieredCache',
+        'LOCATION': config('CACHE_URL', default='redis://redis:6379/1') if CACHE_BACKEND == 'redis' else '',
+        'KEY_PREFIX': 'pm',
+        'VERSION': config('CACHE_VERSION', default=1, cast=int),
+        'OPTIONS': {
+            'L1_MAX_ENTRIES': config('CACHE_L1_MAX_ENTRIES', default=1000, cast=int),
+            'L1_SECONDS': config('CACHE_L1_SECONDS', default=10, cast=float),
+        },
+    }
+}
+
+"""
+bulk employee import (employee/importer.py): rows per transaction, and PBKDF2 iterations
+for imported passwords (employee/hashers.py), upgraded to the default hasher on first login
+"""
+EMPLOYEE_IMPORT_CHUNK_SIZE = config('EMPLOYEE_IMPORT_CHUNK_SIZE', default=500, cast=int)
+EMPLOYEE_IMPORT_HASH_ITERATIONS = config('EMPLOYEE_IMPORT_HASH_ITERATIONS', default=20000, cast=int)
+
+"""
+OpenAPI schema artifacts (project_management/openapi.py), written by manage.py generate_openapi;
+CODE_VERSION (e.g. the git sha) keys them, the hash of the sources is used when it is empty
+"""
+OPENAPI_SCHEMA_DIR = config('OPENAPI_SCHEMA_DIR', default=str(BASE_DIR / 'openapi'))
+CODE_VERSION = config('CODE_VERSION', default='')
+
+"""
+Prometheus metrics at /metrics (project_management/metrics.py): each process writes its
+values to METRICS_DIR every METRICS_FLUSH_SECONDS and /metrics adds up the files, so web
+and celery processes need the same directory; files of processes gone for
+METRICS_RETENTION_SECONDS are dropped. Scrapers must send METRICS_TOKEN as a bearer token;
+without one /metrics is a 404 unless DEBUG is on.
+"""
+METRICS_DIR = config('METRICS_DIR', default=str(BASE_DIR / 'metrics'))
+METRICS_FLUSH_SECONDS = config('METRICS_FLUSH_SECONDS', default=5, cast=float)
+METRICS_RETENTION_SECONDS = config('METRICS_RETENTION_SECONDS', default=3600, cast=int)
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+"""
+slow-query capture (project_management/slow_queries.py): queries of SLOW_QUERY_MS or more
+are logged and added up per fingerprint in the SlowQuery table (0 turns it off); that share
+of them gets an EXPLAIN ANALYZE, at most one per fingerprint and process per interval
+"""
+SLOW_QUERY_MS = config('SLOW_QUERY_MS', default=500, cast=float)
+SLOW_QUERY_EXPLAIN_RATE = config('SLOW_QUERY_EXPLAIN_RATE', default=0.1, cast=float)
+SLOW_QUERY_EXPLAIN_INTERVAL = config('SLOW_QUERY_EXPLAIN_INTERVAL', default=3600, cast=int)
+SLOW_QUERY_EXPLAIN_TIMEOUT_MS = config('SLOW_QUERY_EXPLAIN_TIMEOUT_MS', default=10000, cast=int)
+SLOW_QUERY_FLUSH_SECONDS = config('SLOW_QUERY_FLUSH_SECONDS', default=30, cast=float)
+
+"""seconds the department directory (employee/directory.py) stays cached; saves replace it sooner"""
+DIRECTORY_CACHE_SECONDS = config('DIRECTORY_CACHE_SECONDS', default=3600, cast=int)
+
+"""seconds the /api/dashboard/ response is cached per user"""
+DASHBOARD_CACHE_SECONDS = config('DASHBOARD_CACHE_SECONDS', default=30, cast=int)
+
+"""seconds a computed project schedule stays cached; entries are keyed by version, so edits never serve stale ones"""
+SCHEDULE_CACHE_SECONDS = config('SCHEDULE_CACHE_SECONDS', default=24 * 3600, cast=int)
+
 """reload celery every few minutes"""
 CELERY_BEAT_SCHEDULE = {
     'update-employee-availability': {
-        'task': 'your_app.tasks.update_all_employee_availability',
+        'task': 'projects.tasks.update_all_employee_availability',
         'schedule': 600.0,  # every 600 seconds = 10 minutes
     },
+    'schedule-upcoming-reminders': {
+        'task': 'projects.tasks.schedule_upcoming_reminders',
+        'schedule': REMINDER_SCHEDULE_HORIZON_SECONDS / 3,
+    },
+    'replay-spooled-tasks': {
+        'task': 'projects.tasks.replay_spooled_tasks',
+        'schedule': 60.0,
+    },
+    'reconcile-project-stats': {
+        'task': 'projects.tasks.reconcile_project_stats',
+        'schedule': 3600.0,
+    },
+    'create-activity-partitions': {
+        'task': 'projects.tasks.create_activity_partitions',
+        'schedule': 24 * 3600.0,
+    },
 }
 
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
@@ -0,0 +1,259 @@
+"""
+Slow-query capture.
+
+Every database connection gets an execute wrapper. A query that takes
+SLOW_QUERY_MS or longer is logged right away, with:
+- its fingerprint, the SQL with literals, parameters and IN lists replaced;
+- the view (URL name) or celery task that ran it (see metrics.current_origin).
+The rest happens on a background thread per process, so the request or task
+never waits for it:
+- A sample of slow SELECTs (SLOW_QUERY_EXPLAIN_RATE) gets EXPLAIN ANALYZE on
+  the alias it ran on. At most one plan is taken per fingerprint every
+  SLOW_QUERY_EXPLAIN_INTERVAL seconds. EXPLAIN ANALYZE runs the query again,
+  so it runs in a transaction that is rolled back, under a statement timeout
+  on PostgreSQL. SELECTs that lock rows (FOR UPDATE / SHARE) or call
+  functions with side effects (nextval, advisory locks, ...) only get a plain
+  EXPLAIN: running them again would block on the locks, or burn sequence
+  values that a rollback does not give back. SQLite only has EXPLAIN QUERY PLAN.
+- Every SLOW_QUERY_FLUSH_SECONDS the calls and times seen since the last
+  flush are added to the SlowQuery row of their fingerprint. Every process
+  adds to the same rows, so the table ranks the worst offenders across all
+  web and celery processes (manage.py slow_queries, or the admin).
+
+SLOW_QUERY_MS = 0 turns the capture off.
+"""
+import hashlib
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import IntegrityError, connections, transaction
+from django.db.backends.signals import connection_created
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .metrics import current_origin
+
+logger = logging.getLogger(__name__)
+
+# slow queries waiting for the background thread; more are counted as dropped
+MAX_PENDING = 1000
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w.\"])-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b")
+_PLACEHOLDER = re.compile(r"%s|\?")
+_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_ROWS = re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+")
+_SPACE = re.compile(r"\s+")
+# row locks and function calls whose effects a rollback does not undo
+_SIDE_EFFECTS = re.compile(
+    r"\bFOR\s+(?:NO\s+KEY\s+|KEY\s+)?(?:UPDATE|SHARE)\b"
+    r"|\b(?:nextval|setval|pg_advisory_\w+|pg_try_advisory_\w+|pg_notify|pg_sleep\w*)\s*\(",
+    re.IGNORECASE,
+)
+
+# inside the background thread: its own queries are not captured
+_capturing_off = ContextVar("slow_queries_off", default=False)
+
+
+def normalize(sql):
+    """`sql` with literals and parameters as ?, IN lists and VALUES rows as (...), on one line."""
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _LIST.sub("(...)", sql)
+    sql = _ROWS.sub("(...)", sql)
+    return _SPACE.sub(" ", sql).strip()
+
+
+def fingerprint(normalized_sql):
+    return hashlib.sha1(normalized_sql.encode()).hexdigest()[:16]
+
+
+def can_analyze(sql):
+    """False for SELECTs that lock rows or have side effects; those are only EXPLAINed."""
+    return not _SIDE_EFFECTS.search(sql)
+
+
+def explain(alias, sql, params, analyze=True):
+    """The plan of `sql`, analyzed where the backend can (and `analyze`); the run is rolled back."""
+    connection = connections[alias]
+    try:
+        prefix = connection.ops.explain_query_prefix(analyze=analyze)
+    except ValueError:
+        prefix = connection.ops.explain_query_prefix()
+    with transaction.atomic(using=alias):
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                cursor.execute("SET LOCAL statement_timeout = %s", [settings.SLOW_QUERY_EXPLAIN_TIMEOUT_MS])
+            cursor.execute(f"{prefix} {sql}", params)
+            rows = cursor.fetchall()
+        transaction.set_rollback(True, using=alias)
+    # PostgreSQL and MySQL return the plan in the last column, SQLite its detail
+    return "\n".join(str(row[-1]) for row in rows)
+
+
+class SlowQueryRecorder:
+    """Takes slow queries off the querying thread, explains a sample and flushes the totals."""
+
+    def __init__(self, background=True):
+        self.background = background
+        self.pending = queue.Queue(maxsize=MAX_PENDING)
+        self.totals = {}
+        self.dropped = 0
+        self.last_explained = {}
+        self._thread = None
+        self._mutex = threading.Lock()
+        os.register_at_fork(after_in_child=self._forked)
+
+    def _forked(self):
+        self.pending = queue.Queue(maxsize=MAX_PENDING)
+        self.totals = {}
+        self._thread = None
+        self._mutex = threading.Lock()
+
+    def wants_plan(self, key, sql, many):
+        if many or not sql.lstrip()[:6].upper() == "SELECT":
+            return False
+        if random.random() >= settings.SLOW_QUERY_EXPLAIN_RATE:
+            return False
+        now = time.monotonic()
+        with self._mutex:
+            last = self.last_explained.get(key)
+            if last is not None and now - last < settings.SLOW_QUERY_EXPLAIN_INTERVAL:
+                return False
+            self.last_explained[key] = now
+        return True
+
+    def submit(self, event):
+        try:
+            self.pending.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+            return
+        if self.background and self._thread is None:
+            with self._mutex:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="slow-queries", daemon=True)
+                    self._thread.start()
+
+    def process(self, event):
+        entry = self.totals.setdefault(event["fingerprint"], {
+            "sql": event["sql"], "calls": 0, "total_ms": 0.0, "max_ms": 0.0, "origins": Counter(), "plan": None,
+        })
+        entry["calls"] += 1
+        entry["total_ms"] += event["ms"]
+        entry["max_ms"] = max(entry["max_ms"], event["ms"])
+        entry["origins"][event["origin"]] += 1
+        if event["explain"] is None:
+            return
+        alias, sql, params, analyze = event["explain"]
+        try:
+            entry["plan"] = explain(alias, sql, params, analyze=analyze)
+        except Exception:
+            logger.warning("EXPLAIN failed for slow query %s", event["fingerprint"], exc_info=True)
+            return
+        logger.info("plan for slow query %s (%.1f ms):\n%s", event["fingerprint"], event["ms"], entry["plan"])
+
+    def drain(self):
+        """Process whatever is pending, then flush; the background thread's work, done inline."""
+        token = _capturing_off.set(True)
+        try:
+            while True:
+                try:
+                    self.process(self.pending.get_nowait())
+                except queue.Empty:
+                    break
+            self.flush()
+        finally:
+            _capturing_off.reset(token)
+
+    def flush(self):
+        """Add the totals gathered since the last flush to the SlowQuery rows."""
+        from projects.models import SlowQuery
+
+        totals, self.totals = self.totals, {}
+        now = timezone.now()
+        for key, entry in totals.items():
+            changes = {
+                "calls": F("calls") + entry["calls"],
+                "total_ms": F("total_ms") + entry["total_ms"],
+                "max_ms": Greatest(F("max_ms"), Value(entry["max_ms"])),
+                "last_origin": entry["origins"].most_common(1)[0][0][:255],
+                "last_seen": now,
+            }
+            if entry["plan"] is not None:
+                changes.update(plan=entry["plan"], plan_captured_at=now)
+            if SlowQuery.objects.filter(fingerprint=key).update(**changes):
+                continue
+            try:
+                with transaction.atomic():
+                    SlowQuery.objects.create(
+                        fingerprint=key, sql=entry["sql"], calls=entry["calls"], total_ms=entry["total_ms"],
+                        max_ms=entry["max_ms"], last_origin=changes["last_origin"], last_seen=now,
+                        plan=entry["plan"] or "", plan_captured_at=now if entry["plan"] is not None else None,
+                    )
+            except IntegrityError:
+                # another process created it first
+                SlowQuery.objects.filter(fingerprint=key).update(**changes)
+
+    def _run(self):
+        _capturing_off.set(True)
+        next_flush = time.monotonic() + settings.SLOW_QUERY_FLUSH_SECONDS
+        while True:
+            try:
+                self.process(self.pending.get(timeout=max(next_flush - time.monotonic(), 0.01)))
+            except queue.Empty:
+                pass
+            except Exception:
+                logger.exception("slow query not processed")
+            if time.monotonic() >= next_flush:
+                try:
+                    self.flush()
+                except Exception:
+                    logger.exception("slow query totals not saved")
+                finally:
+                    # this thread must not hold connections between batches
+                    connections.close_all()
+                next_flush = time.monotonic() + settings.SLOW_QUERY_FLUSH_SECONDS
+
+
+recorder = SlowQueryRecorder()
+
+
+def _capture_slow(execute, sql, params, many, context):
+    threshold = settings.SLOW_QUERY_MS
+    if not threshold or _capturing_off.get():
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        ms = (time.perf_counter() - started) * 1000
+        if ms >= threshold:
+            _record(context["connection"].alias, sql, params, many, ms)
+
+
+def _record(alias, sql, params, many, ms):
+    normalized = normalize(sql)
+    key = fingerprint(normalized)
+    origin = current_origin()
+    logger.warning("slow query %s, %.1f ms in %s: %s", key, ms, origin or "-", normalized)
+    plan = (alias, sql, tuple(params or ()), can_analyze(sql)) if recorder.wants_plan(key, sql, many) else None
+    recorder.submit({"fingerprint": key, "sql": normalized, "ms": ms, "origin": origin, "explain": plan})
+
+
+@receiver(connection_created, dispatch_uid="slow_queries.connection_created")
+def _install_slow_query_capture(sender, connection, **kwargs):
+    # first in the list: execute_wrapper() blocks pop from the end
+    if _capture_slow not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _capture_slow)
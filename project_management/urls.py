@@ -3,40 +3,41 @@ from django.http import HttpResponse
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from rest_framework import permissions
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
+from projects.views import (
+    ActivityFeedView, DashboardView, EventTicketView, async_dashboard, async_project_list, async_task_list, events,
+)
+from employee.views import async_schedule_list
+from project_management.metrics import metrics_view
+from project_management.openapi import SchemaView
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
 )
 
-schema_view = get_schema_view(
-    openapi.Info(
-        title="Project Management API",
-        default_version="v1",
-        description="API documentation for Project Management",
-        contact=openapi.Contact(email="irishmjn@gmail.com"),
-        license=openapi.License(name="MIT License"),
-    ),
-    public=True,
-    permission_classes=[permissions.AllowAny],
-)
 def home(request):
     return HttpResponse("/swagger/ in url for api")
 
 urlpatterns = [
     path("", home),
     path("admin/", admin.site.urls),
+    path("metrics", metrics_view, name="metrics"),
     path("api/employees/", include("employee.urls", namespace="employee")),
     path("api/projects/", include("projects.urls")),
+    path("api/dashboard/", DashboardView.as_view(), name="dashboard"),
+    path("api/activity/", ActivityFeedView.as_view(), name="activity-feed"),
+    path("api/events/", events, name="events"),
+    path("api/events/ticket/", EventTicketView.as_view(), name="events-ticket"),
+    path("api/async/projects/", async_project_list, name="async-project-list"),
+    path("api/async/projects/<int:project_pk>/tasks/", async_task_list, name="async-task-list"),
+    path("api/async/employee-schedule/", async_schedule_list, name="async-schedule-list"),
+    path("api/async/dashboard/", async_dashboard, name="async-dashboard"),
     path("api/auth/", include("authentication.urls", namespace="authentication")),
     path("api/token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
     path("api/token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
     path("accounts/", include("allauth.urls")),
     path("api-auth/", include("rest_framework.urls")),
-    path("swagger/", schema_view.with_ui("swagger", cache_timeout=0), name="schema-swagger-ui"),
-    path("redoc/", schema_view.with_ui("redoc", cache_timeout=0), name="schema-redoc"),
+    path("swagger/", SchemaView.with_ui("swagger", cache_timeout=0), name="schema-swagger-ui"),
+    path("redoc/", SchemaView.with_ui("redoc", cache_timeout=0), name="schema-redoc"),
 ]
 
 if settings.DEBUG:
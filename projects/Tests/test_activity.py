@@ -0,0 +1,131 @@
+# projects/tests/test_activity.py
+from unittest.mock import patch
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from employee.models import Department, Employee, Leave
+from projects import activity
+from projects.models import ActivityEvent, Folder, Project, Tasks
+
+User = get_user_model()
+
+
+class ActivityLogTest(TestCase):
+    def setUp(self):
+        # started here rather than as class decorators, so the tasks created below are covered too
+        for target in ("projects.tasks.send_assignment_email.delay", "projects.tasks.send_task_created_email.delay"):
+            patcher = patch(target)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.now = timezone.now()
+        self.department = Department.objects.create(name="IT")
+        self.pm = self.create_employee("pm", Employee.PROJECT_MANAGER, "9812345601")
+        self.dev = self.create_employee("dev", Employee.EMPLOYEE, "9812345602")
+        self.outsider = self.create_employee("out", Employee.EMPLOYEE, "9812345603")
+        self.project = Project.objects.create(name="Alpha", department=self.department, created_by=self.pm, manager=self.pm)
+        self.project.members.add(self.dev)
+        self.task = Tasks.objects.create(
+            project=self.project, title="Build", created_by=self.pm, assigned_to=self.dev,
+            due_date=self.now + timezone.timedelta(days=2),
+        )
+        self.client = APIClient()
+
+    def create_employee(self, username, role, phone):
+        user = User.objects.create_user(username=username, email=f"{username}@example.com", password="securepass123")
+        return Employee.objects.create(user=user, role=role, phone=phone, department=self.department, date_of_joining=timezone.now())
+
+    def login(self, employee):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(employee.user).access_token}")
+
+    def task_url(self, name):
+        return reverse(f"project-tasks-{name}", kwargs={"project_pk": self.project.pk, "pk": self.task.pk})
+
+    def test_record_outside_a_request_writes_immediately(self):
+        event = activity.record(activity.TASK_APPROVED, actor=self.pm, project=self.project, target=self.task, note="ok")
+        stored = ActivityEvent.objects.get(pk=event.pk)
+        self.assertEqual((stored.target_type, stored.target_id, stored.data), ("tasks", self.task.pk, {"note": "ok"}))
+
+    async def test_async_requests_write_their_events_at_the_end(self):
+        async def view(request):
+            for verb in (activity.TASK_APPROVED, activity.TASK_REJECTED):
+                await sync_to_async(activity.record)(verb, actor=self.pm.pk, project=self.project.pk)
+            self.assertEqual(await ActivityEvent.objects.acount(), 0)
+            return HttpResponse()
+
+        middleware = activity.ActivityLogMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        await middleware(RequestFactory().get("/api/async/dashboard/"))
+        self.assertEqual(await ActivityEvent.objects.acount(), 2)
+
+    def test_task_workflow_is_logged(self):
+        self.login(self.dev)
+        self.assertEqual(self.client.post(self.task_url("submit")).status_code, 200)
+        self.login(self.pm)
+        self.assertEqual(self.client.patch(self.task_url("reject-task")).status_code, 200)
+
+        verbs = list(ActivityEvent.objects.order_by("id").values_list("verb", "actor_id", "employee_id", "data"))
+        self.assertEqual(verbs, [
+            (activity.TASK_SUBMITTED, self.dev.id, self.dev.id, {"from_status": "todo"}),
+            (activity.TASK_REJECTED, self.pm.id, self.dev.id, {"from_status": "review"}),
+        ])
+
+    def test_membership_changes_are_written_in_one_insert(self):
+        self.login(self.pm)
+        url = reverse("project-assign-members", args=[self.project.pk])
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(url, {"member_ids": [self.pm.id, self.outsider.id]}, format="json")
+        self.assertEqual(response.status_code, 200)
+        inserts = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith('INSERT INTO "projects_activityevent"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(
+            set(ActivityEvent.objects.values_list("verb", "employee_id")),
+            {(activity.MEMBER_ADDED, self.pm.id), (activity.MEMBER_ADDED, self.outsider.id), (activity.MEMBER_REMOVED, self.dev.id)},
+        )
+
+    def test_folder_move_and_leave_decision_are_logged(self):
+        parent = Folder.objects.create(project=self.project, title="Docs", description="", created_by=self.pm)
+        child = Folder.objects.create(project=self.project, title="Specs", description="", created_by=self.pm)
+        leave = Leave.objects.create(
+            employee=self.dev, start_date=self.now.date(), end_date=self.now.date(), leave_reason="Trip",
+        )
+        self.login(self.pm)
+        response = self.client.post(
+            reverse("folder-move", kwargs={"project_pk": self.project.pk, "pk": child.pk}), {"new_parent": parent.pk}, format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        response = self.client.patch(reverse("employee:leave-approve-leave", args=[leave.pk]), {"status": "APPROVED"}, format="json")
+        self.assertEqual(response.status_code, 200)
+
+        moved = ActivityEvent.objects.get(verb=activity.FOLDER_MOVED)
+        self.assertEqual((moved.project_id, moved.data["to_parent"]), (self.project.pk, parent.pk))
+        approved = ActivityEvent.objects.get(verb=activity.LEAVE_APPROVED)
+        self.assertEqual((approved.employee_id, approved.actor_id), (self.dev.id, self.pm.id))
+
+    def test_feeds_are_cursor_paginated_and_scoped(self):
+        for number in range(5):
+            activity.record(activity.TASK_SUBMITTED, actor=self.dev, project=self.project, employee=self.dev, n=number)
+        activity.record(activity.LEAVE_APPROVED, actor=self.pm, employee=self.outsider)
+        url = reverse("activity-feed")
+
+        self.login(self.dev)
+        first = self.client.get(url, {"project": self.project.pk, "page_size": 3})
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual([event["data"]["n"] for event in first.data["results"]], [4, 3, 2])
+        second = self.client.get(first.data["next"])
+        self.assertEqual([event["data"]["n"] for event in second.data["results"]], [1, 0])
+        self.assertEqual(len(self.client.get(url).data["results"]), 5)
+        self.assertEqual(self.client.get(url, {"employee": self.outsider.id}).status_code, 403)
+
+        self.login(self.outsider)
+        self.assertEqual(self.client.get(url, {"project": self.project.pk}).status_code, 404)
+        self.assertEqual(self.client.get(url).data["results"][0]["verb"], activity.LEAVE_APPROVED)
+
+        self.login(self.pm)
+        self.assertEqual(len(self.client.get(url, {"employee": self.dev.id}).data["results"]), 5)
@@ -0,0 +1,129 @@
+# projects/tests/test_async_views.py
+from urllib.parse import urlparse
+from unittest.mock import patch
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIHandler
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.tokens import RefreshToken
+from employee.models import Department, Employee, EmployeeSchedule, Leave
+from projects.models import Project, Tasks
+
+User = get_user_model()
+
+
+@patch("projects.tasks.send_task_created_email.delay")
+class AsyncEquivalenceTest(TestCase):
+    """the async endpoints must answer exactly like their sync counterparts"""
+
+    def setUp(self):
+        cache.clear()
+        self.now = timezone.now()
+        self.department = Department.objects.create(name="IT")
+        self.hr = self.create_employee("hr", Employee.HR, "9812345601")
+        self.pm = self.create_employee("pm", Employee.PROJECT_MANAGER, "9812345602")
+        self.dev = self.create_employee("dev", Employee.EMPLOYEE, "9812345603")
+        self.projects = []
+        for number in range(13):
+            project = Project.objects.create(
+                name=f"Project {number:02d}", department=self.department, created_by=self.pm,
+                manager=self.pm if number % 2 else None, team_lead=self.pm, end_date=self.now + timezone.timedelta(days=number + 1),
+            )
+            project.members.add(self.dev)
+            self.projects.append(project)
+        for number in range(12):
+            Tasks.objects.create(
+                project=self.projects[0], title=f"Task {number:02d}", created_by=self.pm,
+                assigned_to=self.dev if number % 3 else None, priority="high" if number % 2 else "low",
+                due_date=self.now + timezone.timedelta(days=number - 3),
+            )
+        for employee in (self.hr, self.pm, self.dev):
+            EmployeeSchedule.objects.get_or_create(employee=employee)
+        Leave.objects.create(employee=self.dev, start_date=self.now.date(), end_date=self.now.date(), leave_reason="Trip")
+        self.tokens = {
+            employee.pk: str(RefreshToken.for_user(employee.user).access_token) for employee in (self.hr, self.pm, self.dev)
+        }
+
+    def create_employee(self, username, role, phone):
+        user = User.objects.create_user(
+            username=username, email=f"{username}@example.com", password="securepass123", first_name=username.title(),
+        )
+        return Employee.objects.create(user=user, role=role, phone=phone, department=self.department, date_of_joining=timezone.now())
+
+    def headers(self, employee):
+        return {"Authorization": f"Bearer {self.tokens[employee.pk]}"}
+
+    def assertSameResponse(self, sync_url, async_url, employee, params=None):
+        sync_response = self.client.get(sync_url, params or {}, headers=self.headers(employee))
+        async_response = self._run_async_get(async_url, employee, params)
+        self.assertEqual(async_response.status_code, sync_response.status_code)
+        sync_data, async_data = sync_response.json(), async_response.json()
+        if isinstance(sync_data, dict):
+            for link in ("next", "previous"):
+                if sync_data.get(link):
+                    self.assertEqual(urlparse(async_data[link]).query, urlparse(sync_data[link]).query)
+                    sync_data[link] = async_data[link] = "link"
+        self.assertEqual(async_data, sync_data)
+        return sync_data
+
+    def _run_async_get(self, url, employee, params):
+        return async_to_sync(self.async_client.get)(url, params or {}, headers=self.headers(employee))
+
+    def test_project_list(self, _):
+        sync_url, async_url = reverse("project-list"), reverse("async-project-list")
+        for employee in (self.hr, self.pm, self.dev):
+            self.assertSameResponse(sync_url, async_url, employee)
+        data = self.assertSameResponse(sync_url, async_url, self.hr, {"page": 2, "search": "Project", "ordering": "-name"})
+        self.assertEqual(data["count"], 13)
+        self.assertSameResponse(sync_url, async_url, self.hr, {"page": "last"})
+        self.assertSameResponse(sync_url, async_url, self.hr, {"page": 9})
+        self.assertSameResponse(sync_url, async_url, self.hr, {"page": "x"})
+
+    def test_task_list(self, _):
+        kwargs = {"project_pk": self.projects[0].pk}
+        sync_url, async_url = reverse("project-tasks-list", kwargs=kwargs), reverse("async-task-list", kwargs=kwargs)
+        for employee in (self.pm, self.dev):
+            self.assertSameResponse(sync_url, async_url, employee)
+        data = self.assertSameResponse(sync_url, async_url, self.pm, {"priority": "high", "ordering": "due_date"})
+        self.assertEqual(data["count"], 6)
+        self.assertSameResponse(sync_url, async_url, self.pm, {"page": 2})
+
+    def test_schedule_list(self, _):
+        sync_url, async_url = reverse("employee:employee-schedule-list"), reverse("async-schedule-list")
+        for employee in (self.hr, self.dev):
+            self.assertSameResponse(sync_url, async_url, employee)
+
+    def test_dashboard(self, _):
+        for employee in (self.hr, self.dev):
+            cache.clear()
+            sync_data = self.client.get(reverse("dashboard"), headers=self.headers(employee)).json()
+            cache.clear()
+            async_data = self._run_async_get(reverse("async-dashboard"), employee, None).json()
+            sync_data.pop("generated_at")
+            async_data.pop("generated_at")
+            self.assertEqual(async_data, sync_data)
+        self.assertEqual(async_data["tasks"]["open_total"], 8)
+
+    def test_authentication_is_enforced(self, _):
+        response = self._run_async_get(reverse("async-project-list"), self.dev, None)
+        self.assertEqual(response.status_code, 200)
+        response = async_to_sync(self.async_client.get)(reverse("async-project-list"))
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(self.client.get(reverse("project-list")).status_code, 401)
+
+
+class AsgiMiddlewareTest(SimpleTestCase):
+    def test_asgi_chain_has_no_sync_only_middleware(self):
+        # the middleware asgi.py runs with (SERVE_STATIC off)
+        middleware = [name for name in settings.MIDDLEWARE if name != "whitenoise.middleware.WhiteNoiseMiddleware"]
+        with override_settings(DEBUG=True, MIDDLEWARE=middleware):
+            with self.assertNoLogs("django.request", "DEBUG"):
+                ASGIHandler()
+            with self.settings(MIDDLEWARE=settings.MIDDLEWARE + ["whitenoise.middleware.WhiteNoiseMiddleware"]):
+                with self.assertLogs("django.request", "DEBUG") as logs:
+                    ASGIHandler()
+        self.assertIn("adapted for middleware whitenoise", "\n".join(logs.output))
@@ -0,0 +1,117 @@
+# projects/tests/test_cache.py
+import os
+import threading
+import time
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import SimpleTestCase
+from project_management.cache import INVALIDATION_CHANNEL, Tier, TieredCache, _identity_key
+
+
+class Bus:
+    """Stands in for Redis pub/sub between the tiers of two "processes"."""
+
+    def __init__(self):
+        self.tiers = []
+
+    def publish(self, channel, message):
+        assert channel == INVALIDATION_CHANNEL
+        for tier in self.tiers:
+            tier.invalidated(message)
+
+
+class TieredCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.bus = Bus()
+        self.shared_l2 = LocMemCache("tiered-test", {"KEY_FUNCTION": _identity_key})
+        self.shared_l2.clear()
+
+    def process(self, version=1):
+        """A cache as one process would see it: its own L1, the shared L2 and the bus."""
+        cache = TieredCache("", {"KEY_PREFIX": "t", "VERSION": version})
+        cache.tier = tier = Tier("redis://cache", {"OPTIONS": {"L1_SECONDS": 60}})
+        cache.stats = tier.stats
+        tier.l2 = self.shared_l2
+        tier._client = self.bus
+        tier._listener_pid = os.getpid()
+        tier.listening = True
+        self.bus.tiers.append(tier)
+        return cache
+
+    def test_local_memory_backend(self):
+        cache = TieredCache("", {"KEY_PREFIX": "t"})
+        cache.clear()
+        self.assertIsNone(cache.get("a"))
+        cache.set("a", {"n": 1})
+        self.assertEqual(cache.get("a"), {"n": 1})
+        self.assertFalse(cache.add("a", 2))
+        cache.set("count", 1)
+        self.assertEqual(cache.incr("count", 2), 3)
+        self.assertTrue(cache.delete("a"))
+        self.assertEqual(cache.get_or_set("b", lambda: 5), 5)
+        report = cache.report()
+        self.assertEqual(report["l2"], "locmem")
+        self.assertIsNone(report["l1_entries"])
+
+    def test_l1_serves_copies_and_follows_invalidations(self):
+        first, second = self.process(), self.process()
+        first.set("state", {"tasks": [1]})
+        self.assertEqual(second.get("state"), {"tasks": [1]})  # from L2, now in its L1
+        second.get("state")["tasks"].append(2)
+        self.assertEqual(second.get("state"), {"tasks": [1]})
+        self.assertEqual(second.report()["l1_hits"], 2)
+
+        first.set("state", {"tasks": [3]})
+        self.assertEqual(second.get("state"), {"tasks": [3]})
+        first.delete("state")
+        self.assertIsNone(second.get("state"))
+        self.assertEqual(second.report()["invalidations_received"], 3)
+
+    def test_late_reader_does_not_refill_l1_with_a_replaced_value(self):
+        first, second = self.process(), self.process()
+        first.set("key", "old")
+        generation = second.tier.generation
+        first.set("key", "new")  # arrives while second was still reading "old"
+        second.tier.remember(second.make_key("key"), "old", 60, generation)
+        self.assertEqual(second.get("key"), "new")
+
+    def test_versioned_keys(self):
+        current, next_release = self.process(version=1), self.process(version=2)
+        current.set("key", "v1")
+        self.assertIsNone(next_release.get("key"))
+
+    def test_falls_back_to_local_memory_when_redis_is_down(self):
+        cache = TieredCache("redis://127.0.0.1:1/0", {"KEY_PREFIX": "t", "OPTIONS": {"SOCKET_CONNECT_TIMEOUT": 0.2}})
+        with self.assertLogs("project_management.cache", "ERROR"):
+            cache.set("key", "value")
+        self.assertEqual(cache.get("key"), "value")
+        self.assertTrue(cache.add("other", 1))
+        self.assertFalse(cache.add("other", 2))
+        report = cache.report()
+        self.assertFalse(report["l2_available"])
+        self.assertEqual(report["l2_errors"], 1)
+
+    def test_single_flight_recompute(self):
+        cache = self.process()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.05)
+            return "value"
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get_or_set("hot", compute, 60))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ["value"] * 8)
+        self.assertEqual(len(calls), 1)
+
+    def test_waits_for_another_process_to_fill(self):
+        first, second = self.process(), self.process()
+        self.shared_l2.add(f"{second.make_key('hot')}:fill", 1, 30)
+        threading.Timer(0.1, lambda: first.set("hot", "theirs")).start()
+        self.assertEqual(second.get_or_set("hot", lambda: "mine", 60), "theirs")
+        self.assertEqual(second.report()["fill_waits"], 1)
+        self.assertEqual(second.report()["fills"], 0)
@@ -0,0 +1,104 @@
+# projects/tests/test_dashboard.py
+from unittest.mock import patch
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from employee.models import Department, Employee, EmployeeSchedule, Leave
+from projects.models import Project, Tasks
+
+User = get_user_model()
+
+
+@patch("projects.tasks.send_task_created_email.delay")
+class DashboardTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.department = Department.objects.create(name="IT")
+        self.phone = 9812345600
+        self.pm = self.create_employee("pm", Employee.PROJECT_MANAGER)
+        self.emp = self.create_employee("emp", Employee.EMPLOYEE)
+        self.project = Project.objects.create(
+            name="Alpha", department=self.department, manager=self.pm, created_by=self.pm,
+            end_date=timezone.now() + timezone.timedelta(days=10),
+        )
+        self.project.members.add(self.emp)
+        self.client = APIClient()
+
+    def create_employee(self, username, role):
+        self.phone += 1
+        user = User.objects.create_user(
+            username=username, email=f"{username}@example.com", password="securepass123", first_name=username.title(),
+        )
+        employee = Employee.objects.create(
+            user=user, role=role, phone=str(self.phone), department=self.department, date_of_joining=timezone.now(),
+        )
+        EmployeeSchedule.objects.create(employee=employee)
+        return employee
+
+    def create_tasks(self, count):
+        for i in range(count):
+            Tasks.objects.create(
+                project=self.project, title=f"Task {Tasks.objects.count()}", assigned_to=self.emp, created_by=self.pm,
+                due_date=timezone.now() + timezone.timedelta(days=i + 1),
+            )
+
+    def login(self, employee):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(employee.user).access_token}")
+
+    def get(self, employee=None):
+        if employee is not None:
+            self.login(employee)
+        return self.client.get(reverse("dashboard"))
+
+    def test_employee_dashboard(self, _):
+        self.create_tasks(7)
+        response = self.get(self.emp)
+        self.assertEqual(response.status_code, 200)
+        data = response.data
+        self.assertEqual(data["tasks"]["open_total"], 7)
+        self.assertEqual(data["tasks"]["by_status"]["todo"], 7)
+        self.assertEqual(len(data["tasks"]["upcoming"]), 5)
+        self.assertEqual([p["name"] for p in data["projects"]], ["Alpha"])
+        self.assertEqual(data["team_availability"]["available"], 2)
+        self.assertNotIn("leave_approvals", data)
+
+    def test_approvers_see_pending_leaves(self, _):
+        Leave.objects.create(
+            employee=self.emp, start_date=timezone.now().date(), end_date=timezone.now().date(), leave_reason="Flu",
+        )
+        data = self.get(self.pm).data
+        self.assertEqual(data["leave_approvals"]["count"], 1)
+        self.assertEqual(data["leave_approvals"]["oldest"][0]["employee__user__first_name"], "Emp")
+
+    def test_query_count_is_fixed(self, _):
+        self.create_tasks(1)
+        self.login(self.pm)
+        with CaptureQueriesContext(connection) as small:
+            self.get()
+        cache.clear()
+        self.create_tasks(20)
+        with CaptureQueriesContext(connection) as large:
+            self.get()
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+        self.assertLessEqual(len(large.captured_queries), 8)
+
+    def test_response_is_cached_per_user(self, _):
+        self.get(self.emp)
+        self.create_tasks(1)
+        with CaptureQueriesContext(connection) as ctx:
+            data = self.get().data
+        self.assertEqual(data["tasks"]["open_total"], 0)
+        # only the JWT user lookup remains
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertEqual(self.get(self.pm).data["employee"]["role"], Employee.PROJECT_MANAGER)
+
+    def test_user_without_employee_profile(self, _):
+        user = User.objects.create_user(username="nobody", email="nobody@example.com", password="securepass123")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+        self.assertEqual(self.client.get(reverse("dashboard")).status_code, 403)
@@ -0,0 +1,57 @@
+# projects/tests/test_db_connections.py
+import os
+import tempfile
+from io import StringIO
+from django.core.management import call_command
+from django.core.signals import request_started
+from django.db import connections
+from django.db.utils import load_backend
+from django.test import TestCase
+from project_management.db_connections import benchmark, connection_report, connection_stats
+
+
+class ConnectionReuseTest(TestCase):
+    def setUp(self):
+        connection_stats.clear()
+        handle, self.path = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(handle)
+        self.addCleanup(os.remove, self.path)
+
+    def sqlite(self, **settings):
+        settings_dict = {**connections.settings["default"], "NAME": self.path, "TEST": {}, **settings}
+        settings_dict["OPTIONS"] = {}
+        return load_backend("django.db.backends.sqlite3").DatabaseWrapper(settings_dict, "bench")
+
+    def test_per_request_mode_connects_every_request(self):
+        result = benchmark(self.sqlite(CONN_MAX_AGE=0, CONN_HEALTH_CHECKS=False), 5)
+        self.assertEqual(result["mode"], "per_request")
+        self.assertEqual(result["connections_opened"], 5)
+
+    def test_persistent_mode_reuses_the_connection(self):
+        result = benchmark(self.sqlite(CONN_MAX_AGE=60, CONN_HEALTH_CHECKS=True), 5)
+        self.assertEqual(result["mode"], "persistent")
+        self.assertEqual(result["connections_opened"], 1)
+        self.assertEqual(connection_report()["databases"]["default"]["mode"], "persistent")
+
+    def test_report_counts_requests_and_connections(self):
+        request_started.send(sender=self.__class__)
+        request_started.send(sender=self.__class__)
+        connection = self.sqlite(CONN_MAX_AGE=0)
+        connection.ensure_connection()
+        connection.close()
+
+        report = connection_report()
+        self.assertEqual(report["requests"], 2)
+        default = report["databases"]["default"]
+        self.assertTrue(default["health_checks"])
+        self.assertIsNone(default["pool"])
+        self.assertEqual(connection_stats.snapshot()["opened"], {"bench": 1})
+
+    def test_bench_command(self):
+        out = StringIO()
+        call_command("db_connections", bench=3, stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertTrue(lines[0].startswith("per_request"))
+        self.assertIn("3 request(s)", lines[0])
+        self.assertTrue(lines[1].startswith("persistent"))
+        self.assertIn("ms/request", lines[2])
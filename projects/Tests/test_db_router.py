@@ -0,0 +1,127 @@
+# projects/tests/test_db_router.py
+import time
+from unittest.mock import MagicMock, patch
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.db import router
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from project_management.db_router import (
+    ReplicaRoutingMiddleware, primary_reads, reads_from_replica, replica_reads,
+)
+from employee.models import EmployeeSchedule, Leave
+from projects.models import Project, Tasks
+from projects.tasks import update_all_employee_availability
+
+
+@override_settings(REPLICA_DATABASE="replica", REPLICA_PIN_SECONDS=5, REPLICA_PIN_COOKIE="db_pin")
+class ReplicaRouterTest(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def run_middleware(self, request, view):
+        seen = {}
+
+        def get_response(request):
+            seen["before"] = router.db_for_read(Project)
+            response = view(request)
+            seen["after"] = router.db_for_read(Tasks)
+            return response
+
+        response = ReplicaRoutingMiddleware(get_response)(request)
+        return seen, response
+
+    def test_reads_follow_the_routing_mode(self):
+        self.assertEqual(router.db_for_read(Project), "default")
+        with replica_reads():
+            self.assertEqual(router.db_for_read(Project), "replica")
+            with primary_reads():
+                self.assertEqual(router.db_for_read(Project), "default")
+            self.assertEqual(router.db_for_write(Project), "default")
+            # read-your-writes: the rest of the block stays on the primary
+            self.assertEqual(router.db_for_read(Project), "default")
+        with override_settings(REPLICA_DATABASE=None), replica_reads():
+            self.assertEqual(router.db_for_read(Project), "default")
+
+    def test_replica_task_keeps_reading_from_the_replica_after_writes(self):
+        @reads_from_replica
+        def sweep():
+            router.db_for_write(Project)
+            return router.db_for_read(Project)
+
+        self.assertEqual(sweep(), "replica")
+        self.assertEqual(router.db_for_read(Project), "default")
+
+    def test_safe_requests_read_from_the_replica(self):
+        seen, response = self.run_middleware(self.factory.get("/api/projects/projects/"), lambda request: HttpResponse())
+        self.assertEqual(seen, {"before": "replica", "after": "replica"})
+        self.assertNotIn("db_pin", response.cookies)
+
+        seen, _ = self.run_middleware(self.factory.post("/api/projects/projects/"), lambda request: HttpResponse())
+        self.assertEqual(seen, {"before": "default", "after": "default"})
+
+    def test_write_pins_the_client_to_the_primary(self):
+        def write_view(request):
+            router.db_for_write(Project)
+            return HttpResponse()
+
+        seen, response = self.run_middleware(self.factory.patch("/api/projects/projects/1/"), write_view)
+        pin = response.cookies["db_pin"]
+        self.assertEqual(pin["max-age"], 5)
+        self.assertTrue(pin["httponly"])
+
+        request = self.factory.get("/api/projects/projects/")
+        request.COOKIES["db_pin"] = pin.value
+        seen, _ = self.run_middleware(request, lambda request: HttpResponse())
+        self.assertEqual(seen["before"], "default")
+
+        for stale in (f"{time.time() - 1:.3f}", "garbage"):
+            request = self.factory.get("/api/projects/projects/")
+            request.COOKIES["db_pin"] = stale
+            seen, _ = self.run_middleware(request, lambda request: HttpResponse())
+            self.assertEqual(seen["before"], "replica")
+
+    def test_write_during_a_get_pins_the_rest_of_the_request(self):
+        def view(request):
+            router.db_for_write(Project)
+            return HttpResponse()
+
+        seen, response = self.run_middleware(self.factory.get("/api/dashboard/"), view)
+        self.assertEqual(seen, {"before": "replica", "after": "default"})
+        self.assertIn("db_pin", response.cookies)
+
+    async def test_async_requests_are_routed_and_pinned(self):
+        seen = {}
+
+        async def view(request):
+            seen["before"] = await sync_to_async(router.db_for_read)(Project)
+            await sync_to_async(router.db_for_write)(Project)
+            seen["after"] = router.db_for_read(Tasks)
+            return HttpResponse()
+
+        middleware = ReplicaRoutingMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        response = await middleware(self.factory.get("/api/async/dashboard/"))
+        self.assertEqual(seen, {"before": "replica", "after": "default"})
+        self.assertIn("db_pin", response.cookies)
+
+    def test_streamed_body_reads_from_the_replica(self):
+        def rows():
+            yield router.db_for_read(Project)
+
+        _, response = self.run_middleware(
+            self.factory.get("/api/projects/projects/export/"), lambda request: StreamingHttpResponse(rows()),
+        )
+        self.assertEqual(b"".join(response.streaming_content), b"replica")
+
+    @override_settings(TASK_LOCK_BACKEND="local")
+    def test_availability_sweep_recomputes_from_the_primary(self):
+        seen = []
+        schedule = MagicMock()
+        schedule.update_availability.side_effect = lambda: seen.append(router.db_for_read(Leave))
+        with patch("projects.tasks.EmployeeSchedule.objects") as objects:
+            schedules = objects.filter.return_value
+            schedules.values_list.side_effect = lambda *args, **kwargs: seen.append(router.db_for_read(EmployeeSchedule)) or [1]
+            schedules.select_related.return_value = [schedule]
+            update_all_employee_availability()
+        # the ids come from the replica, the leaves behind each availability from the primary
+        self.assertEqual(seen, ["replica", "default"])
@@ -0,0 +1,121 @@
+# projects/tests/test_locks.py
+from unittest.mock import MagicMock, patch
+from celery import shared_task
+from django.test import SimpleTestCase, override_settings
+from project_management.locks import (
+    _current_task_id, enqueue_once, job_lock, local_backend, lock_stats, single_instance,
+)
+
+
+@shared_task(name="projects.tests.test_locks.current_id")
+def current_id():
+    return _current_task_id()
+
+
+@override_settings(TASK_LOCK_BACKEND="local")
+class JobLockTests(SimpleTestCase):
+    def setUp(self):
+        local_backend.clear()
+
+    def test_overlapping_run_is_skipped(self):
+        calls = []
+
+        @single_instance("test-sweep")
+        def sweep():
+            calls.append("outer")
+            # a second run starting while the first holds the lock
+            return inner()
+
+        @single_instance("test-sweep")
+        def inner():
+            calls.append("inner")
+
+        self.assertEqual(sweep(), {"skipped": True, "lock": "test-sweep"})
+        self.assertEqual(calls, ["outer"])
+
+    def test_lock_is_released_after_run_and_on_error(self):
+        @single_instance("test-release")
+        def failing():
+            raise RuntimeError("boom")
+
+        with self.assertRaises(RuntimeError):
+            failing()
+        with job_lock("test-release") as lock:
+            self.assertTrue(lock.acquired)
+
+    def test_wait_and_hold_times_are_recorded(self):
+        with job_lock("test-stats"):
+            with job_lock("test-stats") as second:
+                self.assertFalse(second.acquired)
+
+        stats = lock_stats.snapshot()["test-stats"]
+        self.assertGreaterEqual(stats["acquired"], 1)
+        self.assertGreaterEqual(stats["skipped"], 1)
+        self.assertGreaterEqual(stats["last_hold_ms"], 0)
+
+    def deliver(self, task, func):
+        """Run `func` as the worker handling the message enqueue_once() last published for `task`."""
+        with patch("project_management.locks._current_task_id", return_value=task.apply_async.call_args.kwargs["task_id"]):
+            return func()
+
+    def test_runs_know_their_celery_task_id(self):
+        self.assertEqual(current_id.apply(task_id="abc").get(), "abc")
+        self.assertIsNone(_current_task_id())
+
+    def test_enqueue_once_coalesces_triggers_until_run_starts(self):
+        task = MagicMock()
+        run = single_instance("test-trigger")(lambda: None)
+
+        self.assertTrue(enqueue_once(task, "test-trigger"))
+        self.assertFalse(enqueue_once(task, "test-trigger"))
+        self.assertEqual(task.apply_async.call_count, 1)
+
+        # a scheduled run leaves the marker to the queued message, which runs anyway
+        run()
+        self.assertFalse(enqueue_once(task, "test-trigger"))
+        self.deliver(task, run)
+        self.assertTrue(enqueue_once(task, "test-trigger"))
+        self.assertEqual(task.apply_async.call_count, 2)
+
+    def test_failed_publish_releases_the_marker(self):
+        task = MagicMock()
+        task.apply_async.side_effect = ConnectionError("broker down")
+
+        with self.assertRaises(ConnectionError):
+            enqueue_once(task, "test-trigger")
+        task.apply_async.side_effect = None
+        self.assertTrue(enqueue_once(task, "test-trigger"))
+
+    def test_trigger_skipped_during_a_run_gets_one_follow_up_run(self):
+        task = MagicMock()
+        runs = []
+
+        @single_instance("test-trigger")
+        def sweep():
+            runs.append(len(runs))
+            if len(runs) == 1:
+                # triggered while running; its message is delivered before this run ends
+                self.assertTrue(enqueue_once(task, "test-trigger"))
+                self.assertEqual(self.deliver(task, sweep), {"skipped": True, "lock": "test-trigger"})
+
+        sweep()
+        self.assertEqual(runs, [0, 1])
+        sweep()
+        self.assertEqual(runs, [0, 1, 2])
+        self.assertTrue(enqueue_once(task, "test-trigger"))
+
+    def test_trigger_still_queued_after_a_run_runs_once(self):
+        task = MagicMock()
+        runs = []
+
+        @single_instance("test-trigger")
+        def sweep():
+            runs.append(len(runs))
+            if len(runs) == 1:
+                self.assertTrue(enqueue_once(task, "test-trigger"))
+
+        sweep()
+        self.assertEqual(runs, [0])
+        self.deliver(task, sweep)
+        self.assertEqual(runs, [0, 1])
+        self.assertTrue(enqueue_once(task, "test-trigger"))
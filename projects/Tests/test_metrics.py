@@ -0,0 +1,104 @@
+# projects/tests/test_metrics.py
+import os
+import re
+import shutil
+import tempfile
+import time
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+from employee.models import Department, Employee
+from project_management.metrics import registry
+from projects.tasks import send_task_created_email
+
+User = get_user_model()
+
+
+class MetricsTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        settings = override_settings(METRICS_DIR=self.directory, METRICS_TOKEN="scrape-secret")
+        settings.enable()
+        self.addCleanup(settings.disable)
+        registry.clear()
+        department = Department.objects.create(name="IT")
+        user = User.objects.create_user(username="hr", email="hr@example.com", password="securepass123")
+        Employee.objects.create(
+            user=user, role=Employee.HR, phone="9812345601", department=department, date_of_joining=timezone.now(),
+        )
+        self.headers = {"Authorization": f"Bearer {RefreshToken.for_user(user).access_token}"}
+
+    def scrape(self):
+        response = self.client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        return response.content.decode()
+
+    def value(self, text, sample):
+        match = re.search(rf"^{re.escape(sample)} (\S+)$", text, re.MULTILINE)
+        self.assertIsNotNone(match, f"{sample} not in the metrics")
+        return float(match.group(1))
+
+    def test_requests_are_recorded_per_view_and_method(self):
+        for _ in range(2):
+            self.assertEqual(self.client.get(reverse("project-list"), headers=self.headers).status_code, 200)
+        self.client.get("/no-such-page/")
+
+        text = self.scrape()
+        labels = 'view="project-list",method="GET"'
+        self.assertEqual(self.value(text, f'http_requests_total{{{labels},status="200"}}'), 2)
+        self.assertEqual(self.value(text, f"http_request_duration_seconds_count{{{labels}}}"), 2)
+        self.assertEqual(self.value(text, f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}}'), 2)
+        self.assertGreater(self.value(text, f"http_request_db_queries_sum{{{labels}}}"), 0)
+        self.assertGreater(self.value(text, f"http_response_size_bytes_sum{{{labels}}}"), 0)
+        self.assertEqual(self.value(text, 'http_requests_total{view="unresolved",method="GET",status="404"}'), 1)
+        self.assertIn("# TYPE http_request_duration_seconds histogram", text)
+
+    async def test_async_views_are_recorded(self):
+        response = await self.async_client.get(reverse("async-project-list"), headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+
+        text = self.scrape()
+        labels = 'view="async-project-list",method="GET"'
+        self.assertEqual(self.value(text, f'http_requests_total{{{labels},status="200"}}'), 1)
+        # queries run in sync_to_async threads count towards the request
+        self.assertGreater(self.value(text, f"http_request_db_queries_sum{{{labels}}}"), 0)
+
+    def test_celery_tasks_record_runtime_and_queue_wait(self):
+        send_task_created_email.apply(args=[999], headers={"sent_at": time.time() - 2})
+
+        text = self.scrape()
+        name = "projects.tasks.send_task_created_email"
+        self.assertEqual(self.value(text, f'celery_tasks_total{{task="{name}",state="SUCCESS"}}'), 1)
+        self.assertEqual(self.value(text, f'celery_task_runtime_seconds_count{{task="{name}",state="SUCCESS"}}'), 1)
+        self.assertGreaterEqual(self.value(text, f'celery_task_queue_wait_seconds_sum{{task="{name}"}}'), 2)
+        self.assertEqual(self.value(text, f'celery_task_db_queries_sum{{task="{name}"}}'), 1)
+
+    def test_files_of_other_processes_are_added_up(self):
+        self.client.get(reverse("project-list"), headers=self.headers)
+        registry.flush()
+        own = registry.file()
+        shutil.copy(own, os.path.join(self.directory, "worker-2.json"))
+        stale = os.path.join(self.directory, "worker-3.json")
+        shutil.copy(own, stale)
+        old = time.time() - 2 * 3600
+        os.utime(stale, (old, old))
+
+        text = self.scrape()
+        self.assertEqual(self.value(text, 'http_requests_total{view="project-list",method="GET",status="200"}'), 2)
+        self.assertFalse(os.path.exists(stale))
+
+    def test_token_is_required(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        self.assertEqual(self.client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code, 403)
+        self.scrape()
+
+    @override_settings(METRICS_TOKEN="")
+    def test_endpoint_is_hidden_without_a_token_unless_debugging(self):
+        with self.settings(DEBUG=False):
+            self.assertEqual(self.client.get("/metrics").status_code, 404)
+        with self.settings(DEBUG=True):
+            self.assertEqual(self.client.get("/metrics").status_code, 200)
@@ -0,0 +1,59 @@
+# projects/tests/test_openapi.py
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest.mock import patch
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from project_management import openapi
+
+
+class PrecomputedSchemaTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        openapi._loaded.clear()
+        self.addCleanup(openapi._loaded.clear)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        settings = override_settings(OPENAPI_SCHEMA_DIR=directory.name, CODE_VERSION="build-1")
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_command_writes_the_artifacts(self):
+        out = StringIO()
+        call_command("generate_openapi", stdout=out)
+        schema = json.loads((self.directory / "openapi-build-1.json").read_text())
+        self.assertIn("/projects/projects/", schema["paths"])
+        self.assertTrue((self.directory / "openapi-build-1.yaml").read_text().startswith("swagger:"))
+        self.assertIn("build-1", out.getvalue())
+
+    def test_artifact_is_served_with_an_etag(self):
+        (self.directory / "openapi-build-1.json").write_bytes(b'{"swagger": "2.0", "artifact": true}')
+        with patch.object(openapi, "generate") as generate:
+            response = self.client.get("/swagger/?format=openapi")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.content, b'{"swagger": "2.0", "artifact": true}')
+            etag = response["ETag"]
+            self.assertEqual(self.client.get("/swagger/?format=openapi", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        generate.assert_not_called()
+
+    def test_schema_is_generated_once_per_code_version(self):
+        with patch.object(openapi, "generate", wraps=openapi.generate) as generate:
+            first = self.client.get("/swagger/?format=openapi")
+            openapi._loaded.clear()  # another worker: served from the cache
+            self.assertEqual(self.client.get("/swagger/?format=openapi").content, first.content)
+            self.assertEqual(self.client.get("/swagger/?format=yaml").status_code, 200)
+            self.assertEqual(generate.call_count, 1)
+
+            with override_settings(CODE_VERSION="build-2"):
+                self.client.get("/swagger/?format=openapi")
+            self.assertEqual(generate.call_count, 2)
+        self.assertTrue(any(path.startswith("/projects/") for path in json.loads(first.content)["paths"]))
+
+    def test_ui_page_still_renders(self):
+        response = self.client.get("/swagger/")
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "swagger")
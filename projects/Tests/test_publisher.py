@@ -0,0 +1,98 @@
+# projects/tests/test_publisher.py
+from unittest.mock import MagicMock, patch
+from django.test import TestCase
+from django.utils import timezone
+from kombu.exceptions import OperationalError
+from projects.models import SpooledTask
+from projects.publisher import CircuitBreaker, publish, publish_with_options, replay_spool
+from projects.tasks import send_assignment_email
+
+
+def fake_task(name="projects.tasks.fake", side_effect=None):
+    task = MagicMock()
+    task.name = name
+    task.delay.side_effect = side_effect
+    task.apply_async.side_effect = side_effect
+    return task
+
+
+class PublisherTests(TestCase):
+    def setUp(self):
+        self.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        patcher = patch("projects.publisher.breaker", self.breaker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_healthy_broker_publishes_directly(self):
+        task = fake_task()
+        self.assertTrue(publish(task, 1, "a"))
+        task.delay.assert_called_once_with(1, "a")
+        self.assertFalse(SpooledTask.objects.exists())
+
+    def test_broker_error_spools_message(self):
+        task = fake_task(side_effect=OperationalError("down"))
+        self.assertFalse(publish(task, 7))
+        spooled = SpooledTask.objects.get()
+        self.assertEqual((spooled.task_name, spooled.args), ("projects.tasks.fake", [7]))
+
+    def test_open_circuit_skips_broker(self):
+        task = fake_task(side_effect=OperationalError("down"))
+        publish(task, 1)
+        publish(task, 2)
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+
+        publish(task, 3)
+        self.assertEqual(task.delay.call_count, 2)
+        self.assertEqual(SpooledTask.objects.count(), 3)
+
+    def test_half_open_probe_closes_circuit_and_schedules_replay(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.breaker.opened_at -= 61
+
+        task = fake_task()
+        with patch("projects.publisher._schedule_replay") as schedule_replay:
+            self.assertTrue(publish(task, 1))
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        schedule_replay.assert_called_once()
+
+    def test_reset_closes_the_circuit(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.breaker.reset()
+        self.assertEqual((self.breaker.state, self.breaker.failures), (CircuitBreaker.CLOSED, 0))
+        task = fake_task()
+        self.assertTrue(publish(task, 1))
+        task.delay.assert_called_once_with(1)
+
+    def test_eta_survives_spooling(self):
+        eta = (timezone.now() + timezone.timedelta(hours=1)).replace(microsecond=0)
+        publish_with_options(fake_task(side_effect=OperationalError("down")), (1,), eta=eta)
+
+        with patch.object(send_assignment_email, "apply_async") as apply_async:
+            SpooledTask.objects.update(task_name=send_assignment_email.name)
+            self.assertEqual(replay_spool(), 1)
+        self.assertEqual(apply_async.call_args.kwargs["eta"], eta)
+
+
+class ReplaySpoolTests(TestCase):
+    def spool(self, *args):
+        return SpooledTask.objects.create(task_name=send_assignment_email.name, args=list(args))
+
+    def test_replays_in_order_and_clears_spool(self):
+        self.spool("s1", "m1", "a@example.com")
+        self.spool("s2", "m2", "b@example.com")
+        with patch.object(send_assignment_email, "apply_async") as apply_async:
+            self.assertEqual(replay_spool(), 2)
+        self.assertEqual([c.args[0][0] for c in apply_async.call_args_list], ["s1", "s2"])
+        self.assertFalse(SpooledTask.objects.exists())
+
+    def test_broker_error_keeps_remaining_messages(self):
+        first = self.spool("s1", "m1", "a@example.com")
+        second = self.spool("s2", "m2", "b@example.com")
+        with patch.object(send_assignment_email, "apply_async", side_effect=[None, OperationalError("down")]):
+            self.assertEqual(replay_spool(), 1)
+        self.assertFalse(SpooledTask.objects.filter(pk=first.pk).exists())
+        second.refresh_from_db()
+        self.assertEqual(second.attempts, 1)
+        self.assertIn("down", second.last_error)
@@ -0,0 +1,133 @@
+# projects/tests/test_realtime.py
+import json
+from unittest.mock import patch
+from asgiref.sync import sync_to_async
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.tokens import RefreshToken
+from employee.models import Department, Employee, EmployeeSchedule
+from project_management.pubsub import MemoryBackend
+from projects import realtime
+from projects.models import Project, TaskComment, Tasks
+
+User = get_user_model()
+
+
+@override_settings(REALTIME_BACKEND="memory")
+@patch("projects.tasks.send_task_created_email.delay")
+class RealtimeTest(TestCase):
+    def setUp(self):
+        self.department = Department.objects.create(name="IT")
+        self.hr = self.create_employee("hr", Employee.HR, "9812345601")
+        self.pm = self.create_employee("pm", Employee.PROJECT_MANAGER, "9812345602")
+        self.dev = self.create_employee("dev", Employee.EMPLOYEE, "9812345603")
+        self.project = Project.objects.create(name="Alpha", department=self.department, created_by=self.pm, manager=self.pm)
+        self.other = Project.objects.create(name="Beta", department=self.department, created_by=self.pm)
+        self.project.members.add(self.dev)
+
+    def create_employee(self, username, role, phone):
+        user = User.objects.create_user(username=username, email=f"{username}@example.com", password="securepass123")
+        return Employee.objects.create(user=user, role=role, phone=phone, department=self.department, date_of_joining=timezone.now())
+
+    def published(self, mock):
+        return [(sorted(call.args[0]), call.args[1]) for call in mock.call_args_list]
+
+    def test_channels_follow_project_visibility(self, _):
+        self.assertEqual(realtime.channels_for(self.hr), {"employee:%s" % self.hr.pk, "projects", "availability"})
+        self.assertEqual(
+            realtime.channels_for(self.pm),
+            {"employee:%s" % self.pm.pk, "project:%s" % self.project.pk, "availability"},
+        )
+        self.assertEqual(
+            realtime.channels_for(self.dev),
+            {"employee:%s" % self.dev.pk, "project:%s" % self.project.pk, "availability:dept:%s" % self.department.pk},
+        )
+
+    @patch("project_management.pubsub.publish")
+    def test_changes_are_published_after_commit(self, publish, _):
+        task = Tasks.objects.create(project=self.project, title="Build", created_by=self.pm, assigned_to=self.dev)
+        with self.captureOnCommitCallbacks(execute=True):
+            task.status = "in_progress"
+            task.save()
+            TaskComment.objects.create(task=task, author=self.dev, commented_by=self.dev, description="On it")
+            self.project.members.add(self.pm)
+        EmployeeSchedule.objects.create(employee=self.dev, availability="available")
+        schedule = EmployeeSchedule.objects.get(employee=self.dev)
+        with self.captureOnCommitCallbacks(execute=True):
+            schedule.availability = "on_leave"
+            schedule.save(update_fields=["availability"])
+            schedule.save(update_fields=["availability"])
+
+        events = self.published(publish)
+        project_channels = sorted(["project:%s" % self.project.pk, "projects"])
+        self.assertEqual([(channels, event["type"]) for channels, event in events], [
+            (project_channels, realtime.TASK_STATUS),
+            (project_channels, realtime.COMMENT_CREATED),
+            (project_channels, realtime.MEMBERS_CHANGED),
+            (["employee:%s" % self.pm.pk], realtime.MEMBERS_CHANGED),
+            (sorted(["availability", "availability:dept:%s" % self.department.pk]), realtime.AVAILABILITY_CHANGED),
+        ])
+        self.assertEqual((events[0][1]["previous"], events[0][1]["status"]), ("todo", "in_progress"))
+        self.assertEqual(events[2][1]["id"], events[3][1]["id"])
+
+    async def test_stream_delivers_visible_events_once(self, _):
+        backend = MemoryBackend()
+        stream = realtime.event_stream(self.dev, backend=backend, heartbeat=0.05, max_seconds=5)
+        self.assertTrue((await anext(stream)).startswith("retry:"))
+
+        event = {"id": "e1", "type": realtime.TASK_STATUS, "project": self.project.pk}
+        backend.publish("project:%s" % self.project.pk, json.dumps(event))
+        backend.publish("employee:%s" % self.dev.pk, json.dumps(event))
+        backend.publish("project:%s" % self.other.pk, json.dumps({"id": "e2", "type": realtime.TASK_STATUS}))
+        frame = await anext(stream)
+        self.assertIn("event: task.status\nid: e1\n", frame)
+        self.assertEqual(await anext(stream), ": keep-alive\n\n")
+
+        # added to Beta: the stream resubscribes and starts receiving its events
+        await self.other.members.aadd(self.dev)
+        backend.publish("employee:%s" % self.dev.pk, json.dumps({"id": "e3", "type": realtime.MEMBERS_CHANGED}))
+        self.assertIn("id: e3", await anext(stream))
+        backend.publish("project:%s" % self.other.pk, json.dumps({"id": "e4", "type": realtime.COMMENT_CREATED}))
+        self.assertIn("id: e4", await anext(stream))
+        await stream.aclose()
+        self.assertEqual(backend._subscribers.get("project:%s" % self.other.pk), set())
+
+    async def test_stream_ends_after_max_seconds(self, _):
+        stream = realtime.event_stream(self.dev, backend=MemoryBackend(), heartbeat=0.05, max_seconds=0.2)
+        frames = [frame async for frame in stream]
+        self.assertTrue(frames[0].startswith("retry:"))
+        self.assertLess(len(frames), 10)
+
+    def test_endpoint_is_only_served_over_asgi(self, _):
+        token = RefreshToken.for_user(self.dev.user).access_token
+        response = self.client.get(reverse("events"), headers={"Authorization": f"Bearer {token}"})
+        self.assertEqual(response.status_code, 501)
+
+    async def test_endpoint_requires_a_valid_token_or_ticket(self, _):
+        url = reverse("events")
+        self.assertEqual((await self.async_client.get(url)).status_code, 401)
+        self.assertEqual((await self.async_client.get(url, {"ticket": "garbage"})).status_code, 401)
+        # access tokens are not accepted in the query string
+        token = await sync_to_async(lambda: str(RefreshToken.for_user(self.dev.user).access_token))()
+        self.assertEqual((await self.async_client.get(url, {"token": token})).status_code, 401)
+
+    async def test_endpoint_streams_with_a_single_use_ticket(self, _):
+        token = await sync_to_async(lambda: str(RefreshToken.for_user(self.dev.user).access_token))()
+        issued = await self.async_client.post(reverse("events-ticket"), headers={"Authorization": f"Bearer {token}"})
+        self.assertEqual(issued.status_code, 201)
+        ticket = issued.json()["ticket"]
+
+        response = await self.async_client.get(reverse("events"), {"ticket": ticket})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        first = await anext(aiter(response.streaming_content))
+        self.assertTrue(first.startswith(b"retry:"))
+        self.assertEqual((await self.async_client.get(reverse("events"), {"ticket": ticket})).status_code, 401)
+
+    @override_settings(REALTIME_TICKET_SECONDS=30)
+    def test_tickets_expire(self, _):
+        with patch("projects.realtime.cache.set") as cache_set:
+            realtime.issue_ticket(self.dev)
+        self.assertEqual(cache_set.call_args.args[1:], (self.dev.pk, 30))
@@ -0,0 +1,153 @@
+# projects/tests/test_scheduling.py
+import random
+from unittest.mock import patch
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from employee.models import Department, Employee
+from projects.models import Project, TaskDependency, Tasks
+from projects.scheduling import (
+    DependencyError, add_dependency, build_schedule, get_schedule, schedule_cache_key, schedule_summary,
+)
+
+User = get_user_model()
+DAY = timezone.timedelta(days=1)
+
+
+@patch("projects.tasks.send_task_created_email.delay")
+class SchedulingTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.now = timezone.now()
+        self.department = Department.objects.create(name="IT")
+        user = User.objects.create_user(username="pm", email="pm@example.com", password="securepass123")
+        self.pm = Employee.objects.create(
+            user=user, role=Employee.PROJECT_MANAGER, phone="9812345601", department=self.department,
+            date_of_joining=self.now,
+        )
+        self.project = Project.objects.create(name="Alpha", department=self.department, created_by=self.pm, manager=self.pm)
+
+    def create_task(self, title, days):
+        return Tasks.objects.create(project=self.project, title=title, created_by=self.pm, due_date=self.now + days * DAY)
+
+    def project_schedule(self):
+        return get_schedule(Project.objects.get(pk=self.project.pk))
+
+    def assertMatchesFullBuild(self, state):
+        full = build_schedule(self.project.pk, state["version"])
+        for column in ("order", "es", "ef", "ls", "lf", "finish", "nodes"):
+            self.assertEqual(state[column], full[column], column)
+
+    def test_critical_path_follows_the_longest_chain(self, _):
+        design, build, ship = self.create_task("Design", 2), self.create_task("Build", 3), self.create_task("Ship", 1)
+        docs = self.create_task("Docs", 1)
+        add_dependency(design, build)
+        add_dependency(build, ship)
+        add_dependency(design, docs)
+
+        summary = schedule_summary(self.project_schedule())
+        self.assertEqual(summary["critical_path"], [design.id, build.id, ship.id])
+        tasks = {task["id"]: task for task in summary["tasks"]}
+        self.assertEqual(tasks[build.id]["earliest_start"], tasks[design.id]["earliest_finish"])
+        self.assertTrue(tasks[ship.id]["late"])
+        self.assertFalse(tasks[docs.id]["critical"])
+        self.assertGreater(tasks[docs.id]["slack_hours"], 0)
+        self.assertEqual(summary["finish"], tasks[ship.id]["earliest_finish"])
+
+    def test_rejects_cycles_self_and_cross_project_edges(self, _):
+        a, b, c = self.create_task("A", 1), self.create_task("B", 1), self.create_task("C", 1)
+        add_dependency(a, b)
+        add_dependency(b, c)
+        with self.assertRaisesMessage(DependencyError, "cycle"):
+            add_dependency(c, a)
+        with self.assertRaisesMessage(DependencyError, "already exists"):
+            add_dependency(a, b)
+        with self.assertRaises(DependencyError):
+            add_dependency(a, a)
+        other = Project.objects.create(name="Beta", department=self.department, created_by=self.pm)
+        foreign = Tasks.objects.create(project=other, title="X", created_by=self.pm)
+        with self.assertRaisesMessage(DependencyError, "same project"):
+            add_dependency(a, foreign)
+        self.assertEqual(TaskDependency.objects.count(), 2)
+
+    def test_changes_patch_the_cached_schedule(self, _):
+        a, b, c = self.create_task("A", 1), self.create_task("B", 2), self.create_task("C", 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            add_dependency(a, b)
+        self.project_schedule()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            a.due_date = self.now + 5 * DAY
+            a.save()
+        project = Project.objects.get(pk=self.project.pk)
+        with CaptureQueriesContext(connection) as ctx:
+            state = get_schedule(project)
+        self.assertEqual(len(ctx.captured_queries), 0)
+        self.assertEqual(state["version"], project.schedule_version)
+        self.assertMatchesFullBuild(state)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            add_dependency(b, c)
+        with self.captureOnCommitCallbacks(execute=True):
+            a.status = "completed"
+            a.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            TaskDependency.objects.get(predecessor=a, successor=b).delete()
+        project.refresh_from_db()
+        self.assertIsNotNone(cache.get(schedule_cache_key(project.pk, project.schedule_version)))
+        self.assertMatchesFullBuild(get_schedule(project))
+
+    def test_incremental_updates_match_full_rebuild(self, _):
+        rng = random.Random(7)
+        tasks = [self.create_task(f"T{i}", rng.randint(1, 10)) for i in range(25)]
+        for _ in range(40):
+            pred, succ = sorted(rng.sample(range(len(tasks)), 2))
+            try:
+                with self.captureOnCommitCallbacks(execute=True):
+                    add_dependency(tasks[pred], tasks[succ])
+            except DependencyError:
+                pass
+        self.project_schedule()
+
+        for _ in range(30):
+            task = rng.choice(tasks)
+            with self.captureOnCommitCallbacks(execute=True):
+                if rng.random() < 0.3:
+                    task.status = rng.choice(["completed", "todo", "cancelled"])
+                else:
+                    task.due_date = self.now + rng.randint(1, 20) * DAY
+                task.save()
+        state = self.project_schedule()
+        self.assertMatchesFullBuild(state)
+
+    def test_api(self, _):
+        a, b = self.create_task("A", 1), self.create_task("B", 1)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.pm.user).access_token}")
+        url = reverse("task-dependencies-list", kwargs={"project_pk": self.project.pk})
+
+        response = client.post(url, {"predecessor": a.id, "successor": b.id}, format="json")
+        self.assertEqual(response.status_code, 201, response.data)
+        response = client.post(url, {"predecessor": b.id, "successor": a.id}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(client.get(url).data["count"], 1)
+
+        response = client.get(reverse("project-schedule", args=[self.project.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["critical_path"], [a.id, b.id])
+
+        user = User.objects.create_user(username="dev", email="dev@example.com", password="securepass123")
+        dev = Employee.objects.create(
+            user=user, role=Employee.EMPLOYEE, phone="9812345602", department=self.department, date_of_joining=self.now,
+        )
+        self.project.members.add(dev)
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+        self.assertEqual(client.get(url).status_code, 200)
+        response = client.post(url, {"predecessor": b.id, "successor": a.id}, format="json")
+        self.assertEqual(response.status_code, 403)
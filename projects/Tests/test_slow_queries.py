@@ -0,0 +1,102 @@
+# projects/tests/test_slow_queries.py
+from io import StringIO
+from unittest.mock import patch
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+from employee.models import Department, Employee
+from project_management.slow_queries import SlowQueryRecorder, _record, can_analyze, fingerprint, normalize
+from projects.models import Project, SlowQuery
+from projects.tasks import send_task_created_email
+
+User = get_user_model()
+
+
+@override_settings(SLOW_QUERY_MS=0.000001, SLOW_QUERY_EXPLAIN_RATE=1, SLOW_QUERY_EXPLAIN_INTERVAL=3600)
+class SlowQueryTest(TestCase):
+    def setUp(self):
+        self.recorder = SlowQueryRecorder(background=False)
+        patcher = patch("project_management.slow_queries.recorder", self.recorder)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        with self.settings(SLOW_QUERY_MS=0):
+            department = Department.objects.create(name="IT")
+            user = User.objects.create_user(username="hr", email="hr@example.com", password="securepass123")
+            self.hr = Employee.objects.create(
+                user=user, role=Employee.HR, phone="9812345601", department=department, date_of_joining=timezone.now(),
+            )
+            Project.objects.create(name="Apollo", department=department, created_by=self.hr)
+            self.headers = {"Authorization": f"Bearer {RefreshToken.for_user(user).access_token}"}
+
+    def test_literals_and_in_lists_share_a_fingerprint(self):
+        first = normalize('SELECT "p"."id" FROM "p" WHERE "p"."name" = \'a\' AND "p"."id" IN (1, 2, 3) LIMIT 21')
+        second = normalize('SELECT "p"."id"\n  FROM "p" WHERE "p"."name" = %s AND "p"."id" IN (%s) LIMIT 5')
+        self.assertEqual(first, 'SELECT "p"."id" FROM "p" WHERE "p"."name" = ? AND "p"."id" IN (...) LIMIT ?')
+        self.assertEqual(fingerprint(first), fingerprint(second))
+        self.assertEqual(normalize("INSERT INTO t VALUES (%s, %s), (%s, %s)"), "INSERT INTO t VALUES (...)")
+
+    def test_slow_queries_are_aggregated_with_origin_and_plan(self):
+        with self.assertLogs("project_management.slow_queries", "WARNING") as logs:
+            for _ in range(2):
+                self.assertEqual(self.client.get(reverse("project-list"), headers=self.headers).status_code, 200)
+        self.assertIn("in project-list: SELECT", "\n".join(logs.output))
+        self.recorder.drain()
+
+        projects = SlowQuery.objects.filter(sql__startswith='SELECT "projects_project"."id"').get()
+        self.assertEqual(projects.calls, 2)
+        self.assertEqual(projects.last_origin, "project-list")
+        self.assertGreater(projects.total_ms, 0)
+        self.assertGreaterEqual(projects.total_ms, projects.max_ms)
+        self.assertTrue(projects.plan)
+        self.assertIsNotNone(projects.plan_captured_at)
+
+        # a later batch, from this or any other process, adds to the same row
+        self.client.get(reverse("project-list"), headers=self.headers)
+        self.recorder.drain()
+        projects.refresh_from_db()
+        self.assertEqual(projects.calls, 3)
+
+    def test_writes_are_recorded_without_a_plan(self):
+        with self.assertLogs("project_management.slow_queries", "WARNING"):
+            Department.objects.create(name="Ops")
+        self.recorder.drain()
+        insert = SlowQuery.objects.get(sql__startswith='INSERT INTO "employee_department"')
+        self.assertEqual(insert.plan, "")
+        self.assertEqual(insert.last_origin, "")
+
+    def test_locking_and_side_effect_selects_are_not_analyzed(self):
+        self.assertFalse(can_analyze('SELECT "p"."id" FROM "p" WHERE "p"."id" = %s FOR UPDATE'))
+        self.assertFalse(can_analyze('SELECT "p"."id" FROM "p" FOR NO KEY UPDATE SKIP LOCKED'))
+        self.assertFalse(can_analyze("SELECT nextval('projects_tasks_id_seq')"))
+        self.assertTrue(can_analyze('SELECT "p"."for_update" FROM "p" ORDER BY "p"."id"'))
+
+        sql = 'SELECT "p"."id" FROM "p" WHERE "p"."id" = %s FOR SHARE'
+        with patch("project_management.slow_queries.explain", return_value="Seq Scan on p") as explain:
+            with self.assertLogs("project_management.slow_queries", "WARNING"):
+                _record("default", sql, [1], False, 750.0)
+            self.recorder.drain()
+        explain.assert_called_once_with("default", sql, (1,), analyze=False)
+        self.assertEqual(SlowQuery.objects.get(sql__endswith="FOR SHARE").plan, "Seq Scan on p")
+
+    def test_task_origin_and_worst_offenders_command(self):
+        with self.assertLogs("project_management.slow_queries", "WARNING"):
+            send_task_created_email.apply(args=[999])
+        self.recorder.drain()
+        self.assertTrue(SlowQuery.objects.filter(last_origin="projects.tasks.send_task_created_email").exists())
+
+        out = StringIO()
+        with self.settings(SLOW_QUERY_MS=0):
+            call_command("slow_queries", limit=1, by="calls", plans=True, stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertIn("1 call(s)", lines[0])
+        self.assertIn("last in projects.tasks.send_task_created_email", lines[0])
+        self.assertTrue(lines[1].startswith("    SELECT"))
+
+    @override_settings(SLOW_QUERY_MS=0)
+    def test_threshold_zero_turns_capture_off(self):
+        Department.objects.create(name="Ops")
+        self.recorder.drain()
+        self.assertFalse(SlowQuery.objects.exists())
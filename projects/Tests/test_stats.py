@@ -0,0 +1,146 @@
+# projects/tests/test_stats.py
+from unittest.mock import patch
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from employee.models import Department, Employee
+from projects.models import Project, ProjectStats, Tasks
+from projects.stats import note_task_overdue, rebuild_project_stats
+
+User = get_user_model()
+
+
+@patch("projects.tasks.send_task_created_email.delay")
+class ProjectStatsTest(TestCase):
+    def setUp(self):
+        self.department = Department.objects.create(name="IT")
+        user = User.objects.create_user(username="pm", email="pm@example.com", password="securepass123")
+        self.pm = Employee.objects.create(
+            user=user, role=Employee.PROJECT_MANAGER, phone="9812345601", department=self.department,
+            date_of_joining=timezone.now(),
+        )
+        self.project = Project.objects.create(name="Alpha", department=self.department, created_by=self.pm, manager=self.pm)
+        self.other = Project.objects.create(name="Beta", department=self.department, created_by=self.pm, manager=self.pm)
+
+    def create_task(self, title, project=None, **kwargs):
+        return Tasks.objects.create(project=project or self.project, title=title, created_by=self.pm, **kwargs)
+
+    def stats(self, project=None):
+        return ProjectStats.objects.get(project=project or self.project)
+
+    def test_project_starts_with_empty_stats(self, _):
+        stats = self.stats()
+        self.assertEqual((stats.total, stats.percent_complete), (0, 0))
+
+    def test_counts_follow_status_transitions(self, _):
+        first, second = self.create_task("One"), self.create_task("Two")
+        cancelled = self.create_task("Three")
+
+        first = Tasks.objects.get(pk=first.pk)
+        first.status = "review"
+        first.save()
+        first.status = "completed"
+        first.save()
+        cancelled = Tasks.objects.get(pk=cancelled.pk)
+        cancelled.status = "cancelled"
+        cancelled.save(update_fields=["status"])
+
+        stats = self.stats()
+        self.assertEqual((stats.total, stats.todo, stats.review, stats.completed, stats.cancelled), (3, 1, 0, 1, 1))
+        self.assertAlmostEqual(stats.percent_complete, 50.0)
+
+        second.delete()
+        stats = self.stats()
+        self.assertEqual((stats.total, stats.todo), (2, 0))
+        self.assertAlmostEqual(stats.percent_complete, 100.0)
+
+    def test_each_write_is_one_update(self, _):
+        task = Tasks.objects.get(pk=self.create_task("One").pk)
+        task.status = "in_progress"
+        with CaptureQueriesContext(connection) as ctx:
+            task.save()
+        stats_queries = [q for q in ctx.captured_queries if "projects_projectstats" in q["sql"]]
+        self.assertEqual(len(stats_queries), 1)
+        self.assertTrue(stats_queries[0]["sql"].startswith("UPDATE"))
+
+    def test_saves_without_tracked_changes_skip_stats(self, _):
+        task = Tasks.objects.get(pk=self.create_task("One").pk)
+        task.description = "More detail"
+        with CaptureQueriesContext(connection) as ctx:
+            task.save()
+        self.assertFalse(any("projects_projectstats" in q["sql"] for q in ctx.captured_queries))
+
+    def test_moving_a_task_moves_its_counts(self, _):
+        task = Tasks.objects.get(pk=self.create_task("One").pk)
+        task.project = self.other
+        task.save()
+        self.assertEqual(self.stats().total, 0)
+        self.assertEqual(self.stats(self.other).todo, 1)
+
+    def test_overdue_counts(self, _):
+        past = timezone.now() - timezone.timedelta(days=1)
+        self.create_task("Late", due_date=past)
+        self.assertEqual(self.stats().overdue, 1)
+
+        future_task = self.create_task("Soon", due_date=timezone.now() + timezone.timedelta(hours=1))
+        # the due date passes without a write: the overdue reminder counts it once
+        Tasks.objects.filter(pk=future_task.pk).update(due_date=past, updated_at=past - timezone.timedelta(hours=1))
+        future_task.refresh_from_db()
+        note_task_overdue(future_task)
+        note_task_overdue(future_task)
+        self.assertEqual(self.stats().overdue, 2)
+
+        future_task.status = "completed"
+        future_task.save()
+        self.assertEqual(self.stats().overdue, 1)
+
+    def test_overdue_before_the_reminder_is_not_taken_out(self, _):
+        counted = self.create_task("Late", due_date=timezone.now() - timezone.timedelta(days=1))
+        deleted = self.create_task("Soon", due_date=timezone.now() + timezone.timedelta(seconds=1))
+        cancelled = self.create_task("Later", due_date=timezone.now() + timezone.timedelta(seconds=1))
+        # both pass their due date before the overdue reminder runs
+        with patch("django.utils.timezone.now", return_value=timezone.now() + timezone.timedelta(hours=1)):
+            deleted.delete()
+            cancelled.status = "cancelled"
+            cancelled.save()
+        stats = self.stats()
+        self.assertEqual((stats.total, stats.cancelled, stats.overdue), (2, 1, 1))
+
+        counted.delete()
+        self.assertEqual(self.stats().overdue, 0)
+        self.assertEqual(rebuild_project_stats(), 0)
+
+    def test_rebuild_fixes_drift(self, _):
+        self.create_task("One")
+        Tasks.objects.filter(project=self.project).update(status="completed")
+        self.assertEqual(self.stats().completed, 0)
+        self.assertEqual(rebuild_project_stats(), 1)
+        self.assertEqual((self.stats().completed, self.stats().percent_complete), (1, 100.0))
+        self.assertEqual(rebuild_project_stats(), 0)
+
+    def test_rebuild_creates_missing_rows(self, _):
+        ProjectStats.objects.filter(project=self.project).delete()
+        self.create_task("One")
+        self.assertEqual(self.stats().total, 1)
+
+    def test_api_exposes_stats_and_orders_by_percent_complete(self, _):
+        done = self.create_task("Done", project=self.other)
+        done.status = "completed"
+        done.save()
+        self.create_task("Open")
+
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.pm.user).access_token}")
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(reverse("project-list"), {"ordering": "-percent_complete"})
+        self.assertEqual(response.status_code, 200)
+        # the earliest due date is a correlated subquery, not an aggregate over the tasks join
+        self.assertFalse(any("GROUP BY" in query["sql"] for query in ctx.captured_queries))
+        names = [project["name"] for project in response.data["results"]]
+        self.assertEqual(names, ["Beta", "Alpha"])
+        self.assertEqual(response.data["results"][0]["stats"]["completed"], 1)
@@ -0,0 +1,198 @@
+# projects/tests/test_tasks.py
+from django.core import mail
+from django.db import connection
+from unittest.mock import patch
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from employee.models import Department, Employee
+from projects.models import Project, Tasks
+from projects.tasks import (
+    REMINDER_LEAD_TIME, schedule_due_reminders, schedule_upcoming_reminders, send_assignment_email,
+    send_due_soon_reminder, send_overdue_reminder, send_project_created_email,
+)
+from project_management.locks import local_backend
+from project_management.celery import EMAIL_RATE_LIMIT, MAINTENANCE_QUEUE, NOTIFICATIONS_QUEUE, app
+
+User = get_user_model()
+
+
+class ProjectCreatedEmailTests(TestCase):
+    def setUp(self):
+        self.department = Department.objects.create(name="IT")
+        self.phone_seq = 9812340000
+        self.hr = self.create_employee("hr", Employee.HR)
+        self.admin = self.create_employee("admin", Employee.ADMIN)
+        self.pm = self.create_employee("pm", Employee.PROJECT_MANAGER)
+        self.lead = self.create_employee("lead", Employee.TEAM_LEAD)
+
+    def create_employee(self, username, role=Employee.EMPLOYEE):
+        self.phone_seq += 1
+        user = User.objects.create_user(
+            username=username,
+            email=f"{username}@example.com",
+            password="securepass123",
+            first_name=username.title(),
+            last_name="Test",
+        )
+        return Employee.objects.create(
+            user=user,
+            role=role,
+            phone=str(self.phone_seq),
+            department=self.department,
+            date_of_joining=timezone.now(),
+            dob="1990-01-01",
+            gender="M",
+            address="Kathmandu",
+        )
+
+    def create_project(self, name, member_count):
+        project = Project.objects.create(
+            name=name,
+            department=self.department,
+            manager=self.pm,
+            team_lead=self.lead,
+            created_by=self.admin,
+            end_date=timezone.now() + timezone.timedelta(days=30),
+        )
+        project.members.set([self.create_employee(f"{name}-member{i}") for i in range(member_count)])
+        return project
+
+    def send_and_count_queries(self, project):
+        mail.outbox = []
+        with CaptureQueriesContext(connection) as ctx:
+            send_project_created_email(project.id)
+        return len(ctx.captured_queries)
+
+    def test_sends_one_email_per_unique_recipient(self):
+        project = self.create_project("Alpha", member_count=2)
+        send_project_created_email(project.id)
+
+        recipients = sorted(m.to[0] for m in mail.outbox)
+        self.assertEqual(recipients, ["admin@example.com", "hr@example.com", "lead@example.com", "pm@example.com"])
+        body = mail.outbox[0].body
+        self.assertIn("A new project has been created: Alpha", body)
+        self.assertIn("Alpha-Member0 Test", body)
+        self.assertIn("Department: IT", body)
+
+    def test_query_count_is_constant_regardless_of_member_count(self):
+        """Benchmark: 1 member and 25 members must cost the same number of queries."""
+        small = self.send_and_count_queries(self.create_project("Small", member_count=1))
+        large = self.send_and_count_queries(self.create_project("Large", member_count=25))
+        self.assertEqual(small, large)
+        self.assertLessEqual(large, 3)
+
+    def test_missing_project_is_ignored(self):
+        send_project_created_email(999999)
+        self.assertEqual(mail.outbox, [])
+
+
+class CeleryRoutingTests(SimpleTestCase):
+    def queue_for(self, task_name):
+        return app.amqp.router.route({}, task_name)['queue'].name
+
+    def test_mail_tasks_go_to_notifications_queue(self):
+        for name in ["send_task_created_email", "send_project_created_email", "send_assignment_email"]:
+            self.assertEqual(self.queue_for(f"projects.tasks.{name}"), NOTIFICATIONS_QUEUE)
+
+    def test_sweeps_go_to_maintenance_queue(self):
+        self.assertEqual(self.queue_for("projects.tasks.check_overdue_tasks"), MAINTENANCE_QUEUE)
+        self.assertEqual(self.queue_for("projects.tasks.update_all_employee_availability"), MAINTENANCE_QUEUE)
+
+    def test_mail_tasks_are_rate_limited_and_ignore_results(self):
+        self.assertTrue(send_assignment_email.ignore_result)
+        self.assertTrue(send_project_created_email.ignore_result)
+        self.assertEqual(send_assignment_email.rate_limit, EMAIL_RATE_LIMIT)
+
+
+@override_settings(TASK_LOCK_BACKEND="local")
+class DueDateReminderTests(TestCase):
+    def setUp(self):
+        local_backend.clear()
+        self.department = Department.objects.create(name="IT")
+        user = User.objects.create_user(
+            username="emp", email="emp@example.com", password="securepass123", first_name="Emp"
+        )
+        self.employee = Employee.objects.create(
+            user=user, phone="9812345601", department=self.department,
+            date_of_joining=timezone.now(), dob="1990-01-01", gender="M", address="Kathmandu",
+        )
+        self.project = Project.objects.create(name="Alpha", department=self.department, created_by=self.employee)
+        with patch("projects.tasks.send_task_created_email.delay"):
+            self.task = Tasks.objects.create(
+                project=self.project, title="Ship it", assigned_to=self.employee,
+                created_by=self.employee, due_date=timezone.now() + timezone.timedelta(days=3),
+            )
+
+    @patch("projects.tasks.send_overdue_reminder.apply_async")
+    @patch("projects.tasks.send_due_soon_reminder.apply_async")
+    def test_reminders_within_the_horizon_are_published_on_save(self, due_soon, overdue):
+        self.task.due_date = timezone.now() + timezone.timedelta(minutes=20)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task.save()
+
+        self.task.refresh_from_db()
+        token = self.task.reminder_token
+        self.assertTrue(token)
+        due_soon.assert_not_called()
+        overdue.assert_called_once_with([self.task.pk, token], {}, eta=self.task.due_date)
+
+    @patch("projects.tasks.send_overdue_reminder.apply_async")
+    @patch("projects.tasks.send_due_soon_reminder.apply_async")
+    def test_later_reminders_are_published_by_the_beat_job(self, due_soon, overdue):
+        with self.captureOnCommitCallbacks(execute=True):
+            schedule_due_reminders(self.task)
+        due_soon.assert_not_called()
+        overdue.assert_not_called()
+
+        token, due_soon_at = self.task.reminder_token, self.task.due_date - REMINDER_LEAD_TIME
+        with patch("django.utils.timezone.now", return_value=due_soon_at - timezone.timedelta(minutes=10)):
+            schedule_upcoming_reminders()
+            schedule_upcoming_reminders()
+        due_soon.assert_called_once_with([self.task.pk, token], {}, eta=due_soon_at)
+        overdue.assert_not_called()
+
+        with patch("django.utils.timezone.now", return_value=self.task.due_date - timezone.timedelta(minutes=10)):
+            schedule_upcoming_reminders()
+        overdue.assert_called_once_with([self.task.pk, token], {}, eta=self.task.due_date)
+
+    def test_orm_due_date_change_reschedules(self):
+        old_token = self.task.reminder_token
+        self.assertTrue(old_token)
+        self.task.due_date += timezone.timedelta(days=1)
+        self.task.save()
+        self.assertNotEqual(self.task.reminder_token, old_token)
+        self.task.title = "Ship it now"
+        self.task.save()
+        self.assertEqual(Tasks.objects.get(pk=self.task.pk).reminder_token, self.task.reminder_token)
+
+    @patch("projects.tasks.send_overdue_reminder.apply_async")
+    @patch("projects.tasks.send_due_soon_reminder.apply_async")
+    def test_changing_due_date_cancels_previous_reminders(self, due_soon, overdue):
+        schedule_due_reminders(self.task)
+        old_token = self.task.reminder_token
+        self.task.due_date += timezone.timedelta(days=1)
+        schedule_due_reminders(self.task)
+
+        mail.outbox = []
+        send_overdue_reminder(self.task.pk, old_token)
+        self.assertEqual(mail.outbox, [])
+
+        send_overdue_reminder(self.task.pk, self.task.reminder_token)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn("Task Overdue: Ship it", mail.outbox[0].subject)
+
+    def test_redelivered_reminder_is_sent_once(self):
+        schedule_due_reminders(self.task)
+        mail.outbox = []
+        send_due_soon_reminder(self.task.pk, self.task.reminder_token)
+        send_due_soon_reminder(self.task.pk, self.task.reminder_token)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_closed_task_gets_no_reminder(self):
+        schedule_due_reminders(self.task)
+        Tasks.objects.filter(pk=self.task.pk).update(status="completed")
+        mail.outbox = []
+        send_overdue_reminder(self.task.pk, self.task.reminder_token)
+        self.assertEqual(mail.outbox, [])
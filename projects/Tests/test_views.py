@@ -1,4 +1,5 @@
 # projects/tests/test_views.py
+import json
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.urls import reverse
@@ -101,6 +102,30 @@ class ProjectViewSetTestCase(APITestCase):
         project_ids = [p['id'] for p in response.data['results']]
         self.assertEqual(project_ids, [self.project2.id])
 
+    def read_stream(self, response):
+        return b"".join(response.streaming_content).decode()
+
+    def test_export_streams_scoped_csv(self):
+        self.authenticate_user(self.user_pm)
+        response = self.client.get(reverse("project-export"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertIn('filename="projects-', response["Content-Disposition"])
+        lines = self.read_stream(response).splitlines()
+        self.assertTrue(lines[0].startswith("id,name,department__name"))
+        self.assertEqual([line.split(",")[1] for line in lines[1:]], ["Project 1", "Project 2"])
+
+    def test_export_applies_list_filters_and_ndjson(self):
+        self.authenticate_user(self.user_hr)
+        response = self.client.get(reverse("project-export"), {"search": "Project 3", "export_format": "ndjson"})
+        rows = [json.loads(line) for line in self.read_stream(response).splitlines()]
+        self.assertEqual([row["name"] for row in rows], ["Project 3"])
+
+    def test_export_rejects_unknown_format(self):
+        self.authenticate_user(self.user_hr)
+        response = self.client.get(reverse("project-export"), {"export_format": "xml"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_user_without_employee_profile_returns_empty_list(self):
         self.authenticate_user(self.user_no_profile)
         response = self.client.get(reverse("project-list"))
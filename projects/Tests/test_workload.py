@@ -0,0 +1,107 @@
+# projects/tests/test_workload.py
+from unittest.mock import patch
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from employee.models import Department, Employee, Leave
+from projects.models import Project, Tasks
+from projects.workload import member_workload, plan_assignments, rank_assignees, task_weight
+
+User = get_user_model()
+
+
+@patch("projects.tasks.send_task_created_email.delay")
+class WorkloadTest(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        self.department = Department.objects.create(name="IT", working_start_time="09:00", working_end_time="17:00")
+        self.phone = 9812345600
+        self.pm = self.create_employee("pm", Employee.PROJECT_MANAGER)
+        self.busy = self.create_employee("busy")
+        self.free = self.create_employee("free")
+        self.away = self.create_employee("away")
+        self.project = Project.objects.create(name="Alpha", department=self.department, manager=self.pm, created_by=self.pm)
+        self.project.members.set([self.busy, self.free, self.away])
+
+    def create_employee(self, username, role=Employee.EMPLOYEE):
+        self.phone += 1
+        user = User.objects.create_user(username=username, email=f"{username}@example.com", password="securepass123")
+        return Employee.objects.create(
+            user=user, role=role, phone=str(self.phone), department=self.department, date_of_joining=self.now,
+        )
+
+    def assign(self, employee, priority="medium", due_in=None, status="todo"):
+        return Tasks.objects.create(
+            project=self.project, title=f"T{Tasks.objects.count()}", assigned_to=employee, created_by=self.pm,
+            priority=priority, status=status,
+            due_date=self.now + due_in if due_in is not None else None,
+        )
+
+    def test_weights_follow_priority_and_due_date(self, _):
+        self.assertEqual(task_weight("low", None, self.now), 1.0)
+        self.assertEqual(task_weight("urgent", self.now - timezone.timedelta(hours=1), self.now), 10.0)
+        self.assertEqual(task_weight("high", self.now + timezone.timedelta(days=1), self.now), 4.5)
+        self.assertEqual(task_weight("medium", self.now + timezone.timedelta(days=5), self.now), 2.4)
+
+    def test_sql_load_matches_python_weights(self, _):
+        self.assign(self.busy, "urgent", timezone.timedelta(hours=-1))
+        self.assign(self.busy, "high", timezone.timedelta(days=1))
+        self.assign(self.busy, "low")
+        self.assign(self.busy, "high", status="completed")
+        entry = next(e for e in member_workload(self.project, now=self.now) if e["employee_id"] == self.busy.id)
+        self.assertEqual(entry["open_tasks"], 3)
+        self.assertEqual(entry["load"], 10.0 + 4.5 + 1.0)
+
+    def test_capacity_accounts_for_leave(self, _):
+        today = timezone.localtime(self.now).date()
+        Leave.objects.create(
+            employee=self.away, start_date=today, end_date=today + timezone.timedelta(days=13),
+            leave_reason="Trek", status="APPROVED",
+        )
+        ranked = rank_assignees(self.project, horizon_days=14, now=self.now)
+        self.assertEqual(ranked[-1]["employee_id"], self.away.id)
+        self.assertEqual(ranked[-1]["capacity_hours"], 0)
+        self.assertIsNone(ranked[-1]["utilization"])
+        self.assertEqual(ranked[0]["capacity_hours"], 8 * 14)
+
+    def test_ranking_prefers_least_loaded(self, _):
+        self.assign(self.busy, "urgent")
+        self.assign(self.away, "low")
+        ranked = [entry["employee_id"] for entry in rank_assignees(self.project, now=self.now)]
+        self.assertEqual(ranked, [self.free.id, self.away.id, self.busy.id])
+
+    def test_two_queries_regardless_of_team_size(self, _):
+        for _ in range(5):
+            self.assign(self.busy)
+        with CaptureQueriesContext(connection) as ctx:
+            member_workload(self.project, now=self.now)
+        self.assertEqual(len(ctx.captured_queries), 2)
+
+    def test_plan_spreads_a_batch(self, _):
+        self.assign(self.busy, "urgent")
+        tasks = [{"priority": "high"}, {"priority": "medium"}, {"priority": "low"}, {"priority": "high"}]
+        assignments, members = plan_assignments(self.project, tasks, now=self.now)
+        chosen = [assignment["employee_id"] for assignment in assignments]
+        self.assertEqual(chosen[0], self.free.id)
+        self.assertEqual(set(chosen), {self.free.id, self.away.id})
+        self.assertEqual(sum(m["load"] for m in members), 5.0 + 3 + 2 + 1 + 3)
+
+    def test_api(self, _):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.pm.user).access_token}")
+        url = reverse("project-workload", args=[self.project.id])
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["members"]), 3)
+
+        response = client.post(url, {"tasks": [{"priority": "urgent"}]}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["assignments"]), 1)
+
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.free.user).access_token}")
+        self.assertEqual(client.get(url).status_code, 403)
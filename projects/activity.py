@@ -0,0 +1,151 @@
+"""
+Append-only activity log.
+
+record() builds an ActivityEvent. During a request, ActivityLogMiddleware
+collects the events and writes them with a single INSERT once the response is
+ready. Outside a request (celery tasks, the shell) each event is written
+straight away.
+
+On PostgreSQL the table is partitioned by month on created_at (migration
+0011). ensure_partitions() creates the coming months' partitions and runs
+daily from the create_activity_partitions beat task; rows outside every
+partition land in the default one. Feeds are read newest first with cursor
+(keyset) pagination over the (project|employee, created_at, id) indexes, so a
+page costs the same however large the log grows.
+"""
+import logging
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.db import DatabaseError, connections
+from django.utils import timezone
+from rest_framework.pagination import CursorPagination
+
+from .models import ActivityEvent
+
+logger = logging.getLogger(__name__)
+
+TASK_SUBMITTED = "task.submitted"
+TASK_APPROVED = "task.approved"
+TASK_REJECTED = "task.rejected"
+TASK_CANCELLED = "task.cancelled"
+MEMBER_ADDED = "project.member_added"
+MEMBER_REMOVED = "project.member_removed"
+FOLDER_MOVED = "folder.moved"
+FILE_MOVED = "folder_file.moved"
+LEAVE_APPROVED = "leave.approved"
+LEAVE_REJECTED = "leave.rejected"
+
+PARTITION_MONTHS_AHEAD = 3
+
+_pending = ContextVar("activity_pending", default=None)
+
+
+def _pk(value):
+    return getattr(value, "pk", value)
+
+
+def record(verb, actor=None, project=None, employee=None, target=None, **data):
+    """Log `verb`; model instances or ids are accepted for actor, project and employee."""
+    event = ActivityEvent(
+        created_at=timezone.now(),
+        verb=verb,
+        actor_id=_pk(actor),
+        project_id=_pk(project),
+        employee_id=_pk(employee),
+        target_type=target._meta.model_name if target is not None else "",
+        target_id=target.pk if target is not None else None,
+        data=data,
+    )
+    pending = _pending.get()
+    if pending is None:
+        ActivityEvent.objects.bulk_create([event])
+    else:
+        pending.append(event)
+    return event
+
+
+def flush():
+    """Write the events collected so far in one INSERT."""
+    pending = _pending.get()
+    if not pending:
+        return 0
+    events = list(pending)
+    pending.clear()
+    try:
+        ActivityEvent.objects.bulk_create(events)
+    except DatabaseError:
+        # the changes being logged are already committed, don't fail the response
+        logger.exception("could not write %s activity event(s)", len(events))
+        return 0
+    return len(events)
+
+
+class ActivityLogMiddleware:
+    """Collects the events recorded while handling a request and writes them at the end."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = _pending.set([])
+        try:
+            response = self.get_response(request)
+            flush()
+        finally:
+            _pending.reset(token)
+        return response
+
+    async def __acall__(self, request):
+        pending = []
+        token = _pending.set(pending)
+        try:
+            response = await self.get_response(request)
+            if pending:
+                # sync_to_async copies the context, so flush() sees this request's events
+                await sync_to_async(flush)()
+        finally:
+            _pending.reset(token)
+        return response
+
+
+class ActivityCursorPagination(CursorPagination):
+    ordering = ("-created_at", "-id")
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+
+
+def _add_months(day, months):
+    month = day.month - 1 + months
+    return day.replace(year=day.year + month // 12, month=month % 12 + 1, day=1)
+
+
+def ensure_partitions(months_ahead=PARTITION_MONTHS_AHEAD, using="default"):
+    """Create the monthly partitions up to `months_ahead` months from now; returns the names created."""
+    connection = connections[using]
+    if connection.vendor != "postgresql":
+        return []
+    table = ActivityEvent._meta.db_table
+    first = timezone.now().date().replace(day=1)
+    created = []
+    with connection.cursor() as cursor:
+        for offset in range(months_ahead + 1):
+            start, end = _add_months(first, offset), _add_months(first, offset + 1)
+            name = f"{table}_{start:%Y%m}"
+            cursor.execute("SELECT to_regclass(%s)", [name])
+            if cursor.fetchone()[0] is not None:
+                continue
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} FOR VALUES FROM ('{start}') TO ('{end}')"
+            )
+            created.append(name)
+    return created
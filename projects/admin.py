@@ -1,6 +1,7 @@
 from django.contrib import admin
 from .models import *
 from .tasks import * 
+from .publisher import publish
 # Register your models here.
 @admin.register(Project)
 class ProjectAdmin(admin.ModelAdmin):
@@ -13,7 +14,7 @@ class ProjectAdmin(admin.ModelAdmin):
         if is_new and obj.created_by:
             subject = f"New Project Created: {obj.name}"
             message = f"Hi {obj.created_by.user.first_name}, your project '{obj.name}' has been created successfully."
-            send_assignment_email.delay(subject, message, obj.created_by.user.email)
+            publish(send_assignment_email, subject, message, obj.created_by.user.email)
 
 admin.site.register(ProjectDocuments)
 @admin.register(Tasks)
@@ -25,4 +26,13 @@ class TasksAdmin(admin.ModelAdmin):
 admin.site.register(TaskComment)
 admin.site.register(Folder)
 admin.site.register(List)
-admin.site.register(FolderFile)
\ No newline at end of file
+admin.site.register(FolderFile)
+
+@admin.register(SpooledTask)
+class SpooledTaskAdmin(admin.ModelAdmin):
+    list_display = ('id', 'task_name', 'attempts', 'created_at', 'last_error')
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = ('fingerprint', 'calls', 'total_ms', 'max_ms', 'last_origin', 'plan_captured_at', 'last_seen')
+    search_fields = ('fingerprint', 'sql', 'last_origin')
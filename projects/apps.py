@@ -5,4 +5,7 @@ class ProjectsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'projects'
     def ready(self):
-        import projects.signals
\ No newline at end of file
+        import projects.signals
+        import project_management.db_connections  # noqa: F401
+        import project_management.metrics  # noqa: F401
+        import project_management.slow_queries  # noqa: F401
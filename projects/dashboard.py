@@ -0,0 +1,166 @@
+"""
+Everything the frontend shows after login, in one response.
+
+build_dashboard() issues a fixed number of queries whatever the role or the
+amount of data: open task counts and the next few due tasks, the nearest
+project deadlines, pending leave approvals (approvers only) and availability
+counts for the employee's team. The result is cached per user for
+DASHBOARD_CACHE_SECONDS, so repeated loads within that window cost no queries.
+The queries are independent of each other; abuild_dashboard() awaits them
+together for the async endpoint.
+"""
+import asyncio
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from django.utils import timezone
+
+from employee.models import Employee, EmployeeSchedule, Leave
+from .models import Project, Tasks
+
+OPEN_TASK_STATUSES = ("todo", "in_progress", "review", "rejected")
+APPROVER_ROLES = (Employee.HR, Employee.TEAM_LEAD, Employee.PROJECT_MANAGER, Employee.ADMIN)
+LIST_LIMIT = 5
+
+
+def dashboard_cache_key(user_id):
+    return f"dashboard:{user_id}"
+
+
+def visible_projects(employee):
+    """Same role scoping as ProjectViewSet."""
+    if employee.role in (Employee.HR, Employee.ADMIN):
+        return Project.objects.all()
+    if employee.role == Employee.PROJECT_MANAGER:
+        return Project.objects.filter(manager=employee)
+    if employee.role == Employee.TEAM_LEAD:
+        return Project.objects.filter(team_lead=employee)
+    return Project.objects.filter(members=employee)
+
+
+def team_schedules(employee):
+    """HR, Admin and PMs see the whole company, everyone else their own department."""
+    if employee.role in (Employee.HR, Employee.ADMIN, Employee.PROJECT_MANAGER):
+        return EmployeeSchedule.objects.filter(employee__status=Employee.STATUS_ACTIVE)
+    return EmployeeSchedule.objects.filter(
+        employee__department_id=employee.department_id, employee__status=Employee.STATUS_ACTIVE
+    )
+
+
+def _dashboard_queries(employee, now):
+    """
+    The independent queries behind a dashboard, not yet evaluated:
+    ({name: queryset to list}, {name: queryset to count}).
+    """
+    my_tasks = Tasks.objects.filter(assigned_to=employee, status__in=OPEN_TASK_STATUSES)
+    queries = {
+        "task_counts": my_tasks.values_list("status").annotate(count=Count("id")).order_by(),
+        "upcoming": my_tasks.filter(due_date__isnull=False)
+        .order_by("due_date")
+        .values("id", "title", "status", "priority", "due_date", "project_id", "project__name")[:LIST_LIMIT],
+        "projects": visible_projects(employee)
+        .filter(is_active=True, end_date__gte=now)
+        .order_by("end_date")
+        .values(
+            "id", "name", "end_date",
+            "stats__total", "stats__completed", "stats__overdue", "stats__percent_complete",
+        )[:LIST_LIMIT],
+        "availability": team_schedules(employee).values_list("availability").annotate(count=Count("id")).order_by(),
+    }
+    counts = {}
+    if employee.role in APPROVER_ROLES:
+        pending = Leave.objects.filter(status="PENDING").exclude(employee=employee)
+        counts["pending_count"] = pending
+        queries["pending_oldest"] = pending.order_by("start_date", "id").values(
+            "id", "start_date", "end_date", "leave_reason",
+            "employee_id", "employee__user__first_name", "employee__user__last_name",
+        )[:LIST_LIMIT]
+    return queries, counts
+
+
+def _assemble(employee, now, results):
+    by_status = dict.fromkeys(OPEN_TASK_STATUSES, 0)
+    by_status.update(results["task_counts"])
+    upcoming = results["upcoming"]
+    for task in upcoming:
+        task["is_overdue"] = task["due_date"] < now
+    availability = dict.fromkeys((choice for choice, _ in EmployeeSchedule.STATUS_CHOICES), 0)
+    availability.update(results["availability"])
+
+    schedule = getattr(employee, "employeeschedule", None)
+    data = {
+        "generated_at": now,
+        "employee": {
+            "id": employee.id,
+            "name": employee.user.get_full_name() if employee.user else str(employee),
+            "role": employee.role,
+            "role_display": employee.get_role_display(),
+            "department": employee.department.name if employee.department else None,
+            "working_start_time": employee.working_start_time,
+            "working_end_time": employee.working_end_time,
+            "availability": schedule.availability if schedule else None,
+        },
+        "tasks": {"open_total": sum(by_status.values()), "by_status": by_status, "upcoming": upcoming},
+        "projects": results["projects"],
+        "team_availability": availability,
+    }
+    if "pending_count" in results:
+        data["leave_approvals"] = {"count": results["pending_count"], "oldest": results["pending_oldest"]}
+    return data
+
+
+def build_dashboard(employee):
+    now = timezone.now()
+    queries, counts = _dashboard_queries(employee, now)
+    results = {name: list(query) for name, query in queries.items()}
+    results.update((name, query.count()) for name, query in counts.items())
+    return _assemble(employee, now, results)
+
+
+async def _evaluate(query):
+    return [row async for row in query]
+
+
+async def abuild_dashboard(employee):
+    """build_dashboard() with the queries awaited together through the async ORM."""
+    now = timezone.now()
+    queries, counts = _dashboard_queries(employee, now)
+    names = list(queries) + list(counts)
+    rows = await asyncio.gather(
+        *(_evaluate(query) for query in queries.values()),
+        *(query.acount() for query in counts.values()),
+    )
+    return _assemble(employee, now, dict(zip(names, rows)))
+
+
+def _employee_for(user):
+    return Employee.objects.select_related("user", "department", "employeeschedule").filter(user=user)
+
+
+def get_dashboard(user):
+    """Cached dashboard for `user`, or None when the user has no employee profile."""
+    key = dashboard_cache_key(user.pk)
+    data = cache.get(key)
+    if data is not None:
+        return data
+    employee = _employee_for(user).first()
+    if employee is None:
+        return None
+    data = build_dashboard(employee)
+    cache.set(key, data, settings.DASHBOARD_CACHE_SECONDS)
+    return data
+
+
+async def aget_dashboard(user):
+    """get_dashboard() for async views; shares the same cache entries."""
+    key = dashboard_cache_key(user.pk)
+    data = await cache.aget(key)
+    if data is not None:
+        return data
+    employee = await _employee_for(user).afirst()
+    if employee is None:
+        return None
+    data = await abuild_dashboard(employee)
+    await cache.aset(key, data, settings.DASHBOARD_CACHE_SECONDS)
+    return data
@@ -0,0 +1,53 @@
+import copy
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.utils import load_backend
+
+from project_management.db_connections import benchmark, connection_report
+
+
+def _wrapper(alias, settings_dict):
+    return load_backend(settings_dict["ENGINE"]).DatabaseWrapper(settings_dict, alias)
+
+
+class Command(BaseCommand):
+    help = (
+        "Show this process's database connection settings and statistics; with --bench, compare "
+        "opening a connection per request against the configured DB_CONN_MODE."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default="default", help="Database alias")
+        parser.add_argument("--bench", type=int, default=0, metavar="N", help="Simulated requests per mode")
+
+    def handle(self, *args, **options):
+        alias = options["database"]
+        if alias not in connections:
+            raise CommandError(f"Unknown database alias: {alias}")
+        if not options["bench"]:
+            self.stdout.write(json.dumps(connection_report(), indent=2, default=str))
+            return
+
+        configured = copy.deepcopy(connections.settings[alias])
+        per_request = copy.deepcopy(configured)
+        per_request["CONN_MAX_AGE"] = 0
+        per_request["CONN_HEALTH_CHECKS"] = False
+        per_request["OPTIONS"].pop("pool", None)
+
+        results = [benchmark(_wrapper(f"{alias}-bench", per_request), options["bench"])]
+        connection = _wrapper(alias, configured)
+        try:
+            results.append(benchmark(connection, options["bench"]))
+        finally:
+            if connection.vendor == "postgresql":
+                connection.close_pool()
+
+        for result in results:
+            self.stdout.write(
+                f"{result['mode']:<12} {result['requests']} request(s): {result['per_request_ms']:.3f} ms/request, "
+                f"{result['connections_opened']} connection(s) opened"
+            )
+        before, after = results[0]["per_request_ms"], results[1]["per_request_ms"]
+        self.stdout.write(self.style.SUCCESS(f"connection overhead saved: {before - after:.3f} ms/request"))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from project_management.openapi import code_version, write_artifacts
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate the OpenAPI schema for this code version into OPENAPI_SCHEMA_DIR "
+        "(see project_management/openapi.py); run at build or deploy time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--code-version", help="Code version to key the artifacts (default: CODE_VERSION or the source hash)")
+        parser.add_argument("--cache", action="store_true", help="Also store the schema in the shared cache")
+
+    def handle(self, *args, **options):
+        version = options["code_version"] or code_version()
+        for path in write_artifacts(version, to_cache=options["cache"]):
+            self.stdout.write(f"wrote {path}")
+        self.stdout.write(self.style.SUCCESS(f"OpenAPI schema generated for version {version}"))
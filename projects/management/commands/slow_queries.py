@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from projects.models import SlowQuery
+
+ORDERINGS = {"total": "-total_ms", "max": "-max_ms", "calls": "-calls"}
+
+
+class Command(BaseCommand):
+    help = "List the slowest query fingerprints recorded by every process, worst first."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=20)
+        parser.add_argument("--by", choices=sorted(ORDERINGS), default="total", help="Rank by total time, max time or calls")
+        parser.add_argument("--plans", action="store_true", help="Print the latest captured plan of each")
+
+    def handle(self, *args, **options):
+        for query in SlowQuery.objects.order_by(ORDERINGS[options["by"]])[:options["limit"]]:
+            average = query.total_ms / query.calls if query.calls else 0.0
+            self.stdout.write(
+                f"{query.fingerprint} {query.calls} call(s), total {query.total_ms:.0f} ms, "
+                f"avg {average:.1f} ms, max {query.max_ms:.1f} ms, last in {query.last_origin or '-'}"
+            )
+            self.stdout.write(f"    {query.sql}")
+            if options["plans"] and query.plan:
+                for line in query.plan.splitlines():
+                    self.stdout.write(f"        {line}")
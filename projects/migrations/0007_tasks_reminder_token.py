@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 00:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0006_alter_tasks_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tasks',
+            name='reminder_token',
+            field=models.CharField(blank=True, default='', editable=False, max_length=32),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.5 on 2026-10-19 00:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.utils import timezone
+
+STATUSES = ("todo", "in_progress", "review", "completed", "rejected", "cancelled")
+OVERDUE_STATUSES = ("todo", "in_progress", "rejected")
+
+
+def populate_stats(apps, schema_editor):
+    Project = apps.get_model('projects', 'Project')
+    ProjectStats = apps.get_model('projects', 'ProjectStats')
+    annotations = {"total": Count("tasks")}
+    for status in STATUSES:
+        annotations[status] = Count("tasks", filter=Q(tasks__status=status))
+    annotations["overdue"] = Count(
+        "tasks", filter=Q(tasks__status__in=OVERDUE_STATUSES, tasks__due_date__lt=timezone.now())
+    )
+    rows = []
+    for counts in Project.objects.values("pk").annotate(**annotations).iterator():
+        project_id = counts.pop("pk")
+        active = counts["total"] - counts["cancelled"]
+        percent = counts["completed"] * 100.0 / active if active > 0 else 0.0
+        rows.append(ProjectStats(project_id=project_id, percent_complete=percent, **counts))
+    ProjectStats.objects.bulk_create(rows, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0008_spooledtask'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectStats',
+            fields=[
+                ('project', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='projects.project')),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('todo', models.PositiveIntegerField(default=0)),
+                ('in_progress', models.PositiveIntegerField(default=0)),
+                ('review', models.PositiveIntegerField(default=0)),
+                ('completed', models.PositiveIntegerField(default=0)),
+                ('rejected', models.PositiveIntegerField(default=0)),
+                ('cancelled', models.PositiveIntegerField(default=0)),
+                ('overdue', models.PositiveIntegerField(default=0)),
+                ('percent_complete', models.FloatField(db_index=True, default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(populate_stats, migrations.RunPython.noop),
+    ]
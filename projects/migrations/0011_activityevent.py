@@ -0,0 +1,71 @@
+# Generated by Django 5.2.5 on 2026-10-19 01:10
+
+import django.core.serializers.json
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+TABLE = "projects_activityevent"
+MONTHS_AHEAD = 3
+
+
+def _add_months(day, months):
+    month = day.month - 1 + months
+    return day.replace(year=day.year + month // 12, month=month % 12 + 1, day=1)
+
+
+def partition_by_month(apps, schema_editor):
+    """
+    On PostgreSQL, swap the plain table for one partitioned by month on
+    created_at. The primary key has to include the partition key, so it
+    becomes (id, created_at); ids still come from a single sequence.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    ActivityEvent = apps.get_model("projects", "ActivityEvent")
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {TABLE} RENAME TO {TABLE}_template")
+        cursor.execute(f"CREATE TABLE {TABLE} (LIKE {TABLE}_template INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)")
+        cursor.execute(f"DROP TABLE {TABLE}_template")
+        cursor.execute(f"CREATE SEQUENCE {TABLE}_id_seq OWNED BY NONE")
+        cursor.execute(f"ALTER TABLE {TABLE} ALTER COLUMN id SET DEFAULT nextval('{TABLE}_id_seq')")
+        cursor.execute(f"ALTER SEQUENCE {TABLE}_id_seq OWNED BY {TABLE}.id")
+        cursor.execute(f"ALTER TABLE {TABLE} ADD PRIMARY KEY (id, created_at)")
+        cursor.execute(f"CREATE TABLE {TABLE}_default PARTITION OF {TABLE} DEFAULT")
+        first = django.utils.timezone.now().date().replace(day=1)
+        for offset in range(MONTHS_AHEAD + 1):
+            start, end = _add_months(first, offset), _add_months(first, offset + 1)
+            cursor.execute(
+                f"CREATE TABLE {TABLE}_{start:%Y%m} PARTITION OF {TABLE} FOR VALUES FROM ('{start}') TO ('{end}')"
+            )
+    for index in ActivityEvent._meta.indexes:
+        schema_editor.add_index(ActivityEvent, index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee', '0014_department_code_sequence'),
+        ('projects', '0010_task_dependency'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityEvent',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('verb', models.CharField(max_length=50)),
+                ('target_type', models.CharField(blank=True, default='', max_length=30)),
+                ('target_id', models.BigIntegerField(blank=True, null=True)),
+                ('data', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('actor', models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='employee.employee')),
+                ('employee', models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='employee.employee')),
+                ('project', models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='projects.project')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['project', '-created_at', '-id'], name='activity_project_feed_idx'), models.Index(fields=['employee', '-created_at', '-id'], name='activity_employee_feed_idx')],
+            },
+        ),
+        migrations.RunPython(partition_by_month, migrations.RunPython.noop),
+    ]
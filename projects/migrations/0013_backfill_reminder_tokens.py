@@ -0,0 +1,37 @@
+import uuid
+
+from django.db import migrations
+from django.utils import timezone
+
+# projects.tasks.REMINDER_STATUSES when this migration was written
+REMINDER_STATUSES = ("todo", "in_progress", "rejected")
+
+
+def backfill_reminder_tokens(apps, schema_editor):
+    """
+    Give open tasks that still have a due date ahead a reminder token, so
+    schedule_upcoming_reminders publishes their reminders like those of new tasks.
+    """
+    Tasks = apps.get_model("projects", "Tasks")
+    pending = Tasks.objects.filter(
+        reminder_token="", due_date__gt=timezone.now(), status__in=REMINDER_STATUSES,
+    ).only("pk")
+    batch = []
+    for task in pending.iterator(chunk_size=1000):
+        task.reminder_token = uuid.uuid4().hex
+        batch.append(task)
+        if len(batch) == 1000:
+            Tasks.objects.bulk_update(batch, ["reminder_token"])
+            batch = []
+    Tasks.objects.bulk_update(batch, ["reminder_token"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0012_slowquery'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_reminder_tokens, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+from django.db import migrations, models
+from django.utils import timezone
+
+# projects.stats.OVERDUE_STATUSES when this migration was written
+OVERDUE_STATUSES = ("todo", "in_progress", "rejected")
+
+
+def mark_overdue_tasks(apps, schema_editor):
+    """
+    Flag the tasks the overdue counters already include, so deleting or
+    finishing them takes them back out; reconcile_project_stats settles the rest.
+    """
+    Tasks = apps.get_model("projects", "Tasks")
+    Tasks.objects.filter(status__in=OVERDUE_STATUSES, due_date__lt=timezone.now()).update(overdue_counted=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0013_backfill_reminder_tokens'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tasks',
+            name='overdue_counted',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(mark_overdue_tasks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 03:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee', '0014_department_code_sequence'),
+        ('projects', '0014_tasks_overdue_counted'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tasks',
+            index=models.Index(fields=['project', 'due_date'], name='task_project_due_idx'),
+        ),
+    ]
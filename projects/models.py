@@ -3,9 +3,14 @@ from django.db import models
 from employee.models import *
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import MinValueValidator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
 
 # Create your models here.
-class Project(Timestamp):
+class Project(TrackedFieldsMixin, Timestamp):
+    """the department directory caches each member's project departments (projects/signals.py)"""
+    tracked_fields = ("department",)
+
     department = models.ForeignKey(Department, on_delete=models.CASCADE, related_name='projects')
     """
     limiting to project manager only gives access to project managers
@@ -21,9 +26,32 @@ class Project(Timestamp):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True, db_index=True)
     is_active = models.BooleanField(default=True)
+    """bumped whenever task dates, statuses or dependencies change; keys the cached schedule"""
+    schedule_version = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         return self.name
+
+"""
+per-project task counts kept up to date incrementally by projects/stats.py
+(task save/delete signals) and corrected by the periodic reconcile_project_stats task
+"""
+class ProjectStats(models.Model):
+    project = models.OneToOneField(Project, on_delete=models.CASCADE, primary_key=True, related_name="stats")
+    total = models.PositiveIntegerField(default=0)
+    todo = models.PositiveIntegerField(default=0)
+    in_progress = models.PositiveIntegerField(default=0)
+    review = models.PositiveIntegerField(default=0)
+    completed = models.PositiveIntegerField(default=0)
+    rejected = models.PositiveIntegerField(default=0)
+    cancelled = models.PositiveIntegerField(default=0)
+    overdue = models.PositiveIntegerField(default=0)
+    """completed / (total - cancelled) * 100"""
+    percent_complete = models.FloatField(default=0, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.project}: {self.percent_complete:.0f}% complete"
     
 """
 Project documents like the contract between clients and head
@@ -41,7 +69,7 @@ class ProjectDocuments(models.Model):
 
     def __str__(self):
         return self.project.name
-class Tasks(models.Model):
+class Tasks(TrackedFieldsMixin, models.Model):
     STATUS_CHOICES = [
         ("todo", "To Do"),
         ("in_progress", "In Progress"),
@@ -76,10 +104,45 @@ class Tasks(models.Model):
     role based access[HR, SuperUser, TeamLead, Project_manager] can approve
     """
     reviewed_by = models.ForeignKey(Employee, on_delete=models.SET_NULL, null=True, blank=True, related_name="reviewed_tasks", db_index=True)
+    """
+    identifies the currently scheduled due-date reminders, replaced whenever due_date changes
+    """
+    reminder_token = models.CharField(max_length=32, blank=True, default="", editable=False)
+    """
+    whether the task is included in its project's ProjectStats.overdue count, see projects/stats.py
+    """
+    overdue_counted = models.BooleanField(default=False, editable=False)
+    tracked_fields = ("project", "status", "due_date")
+
+    class Meta:
+        indexes = [
+            # a project's earliest due date (ProjectViewSet) is one index lookup
+            models.Index(fields=["project", "due_date"], name="task_project_due_idx"),
+        ]
 
     def __str__(self):
         return self.title
 
+"""
+finish-to-start dependency: the successor cannot start before the predecessor finishes.
+Both tasks belong to the same project; edges that would close a cycle are rejected
+by projects.scheduling.add_dependency
+"""
+class TaskDependency(models.Model):
+    predecessor = models.ForeignKey(Tasks, on_delete=models.CASCADE, related_name="successor_links")
+    successor = models.ForeignKey(Tasks, on_delete=models.CASCADE, related_name="predecessor_links")
+    created_by = models.ForeignKey(Employee, on_delete=models.SET_NULL, null=True, blank=True, related_name="created_dependencies")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = (("predecessor", "successor"),)
+        constraints = [
+            models.CheckConstraint(condition=~models.Q(predecessor=models.F("successor")), name="task_dependency_not_self"),
+        ]
+
+    def __str__(self):
+        return f"{self.predecessor} -> {self.successor}"
+
 """
 when comments are made by group members in the assigned projects(HR, SuperUser, TeamLead, ProjectManager)
 Tasks comment can be viewed by this class
@@ -168,4 +231,73 @@ class FolderFile(models.Model):
         super().save(*args, **kwargs)
 
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return self.name
+
+
+"""
+celery messages that could not be published because the broker was down;
+replayed oldest first by projects.tasks.replay_spooled_tasks
+"""
+class SpooledTask(models.Model):
+    task_name = models.CharField(max_length=255)
+    args = models.JSONField(default=list, encoder=DjangoJSONEncoder)
+    kwargs = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    options = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.task_name} (spooled {self.created_at})"
+
+"""
+append-only history of task workflow actions, membership changes, folder moves
+and leave decisions, written through projects.activity.record(). Foreign keys
+carry no database constraint so deleting a project or employee never has to
+touch the log; on PostgreSQL the table is partitioned by month on created_at
+"""
+class ActivityEvent(models.Model):
+    id = models.BigAutoField(primary_key=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    verb = models.CharField(max_length=50)
+    """who did it"""
+    actor = models.ForeignKey(Employee, on_delete=models.DO_NOTHING, null=True, blank=True, related_name="+", db_constraint=False, db_index=False)
+    project = models.ForeignKey(Project, on_delete=models.DO_NOTHING, null=True, blank=True, related_name="+", db_constraint=False, db_index=False)
+    """whom it concerns: the task assignee, the added member, the leave requester"""
+    employee = models.ForeignKey(Employee, on_delete=models.DO_NOTHING, null=True, blank=True, related_name="+", db_constraint=False, db_index=False)
+    target_type = models.CharField(max_length=30, blank=True, default="")
+    target_id = models.BigIntegerField(null=True, blank=True)
+    data = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["project", "-created_at", "-id"], name="activity_project_feed_idx"),
+            models.Index(fields=["employee", "-created_at", "-id"], name="activity_employee_feed_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.verb} by {self.actor_id} at {self.created_at}"
+
+"""
+slow queries aggregated by fingerprint (the SQL with literals and parameters replaced),
+written by project_management/slow_queries.py from every process; the worst offenders
+are at the top (manage.py slow_queries)
+"""
+class SlowQuery(models.Model):
+    fingerprint = models.CharField(max_length=16, unique=True)
+    sql = models.TextField()
+    calls = models.PositiveBigIntegerField(default=0)
+    total_ms = models.FloatField(default=0)
+    max_ms = models.FloatField(default=0)
+    """view name or task name that ran it most often in the latest batch"""
+    last_origin = models.CharField(max_length=255, blank=True, default="")
+    plan = models.TextField(blank=True, default="")
+    plan_captured_at = models.DateTimeField(null=True, blank=True)
+    first_seen = models.DateTimeField(auto_now_add=True)
+    last_seen = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["-total_ms"]
+
+    def __str__(self):
+        return f"{self.fingerprint}: {self.calls} call(s), {self.total_ms:.0f} ms"
@@ -0,0 +1,166 @@
+"""
+Publishing Celery tasks from request paths without depending on broker health.
+
+publish() sends the task normally while the broker is healthy. Failed
+publishes trip a circuit breaker; while it is open, messages are written
+straight to the SpooledTask table instead of waiting on broker timeouts.
+replay_spool() (run by projects.tasks.replay_spooled_tasks on a beat
+schedule, and kicked off as soon as the breaker closes again) re-publishes
+spooled messages in the order they were spooled.
+"""
+import logging
+import threading
+import time
+
+from celery import current_app
+from django.conf import settings
+from django.utils.dateparse import parse_datetime
+from kombu.exceptions import OperationalError
+
+from .models import SpooledTask
+
+logger = logging.getLogger(__name__)
+
+BROKER_ERRORS = (OperationalError, ConnectionError, OSError)
+
+
+class CircuitBreaker:
+    """
+    closed: publish normally
+    open: skip the broker for reset_timeout seconds after failure_threshold consecutive failures
+    half-open: after reset_timeout let one publish through to probe the broker
+    """
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self):
+        """Returns True when this success closed a previously open circuit."""
+        with self._lock:
+            recovered = self.state != self.CLOSED
+            self.state = self.CLOSED
+            self.failures = 0
+            return recovered
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning("broker circuit opened after %s failure(s)", self.failures)
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def reset(self):
+        """Close the circuit and forget past failures."""
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self.opened_at = 0.0
+
+
+breaker = CircuitBreaker(
+    failure_threshold=settings.BROKER_CIRCUIT_FAILURE_THRESHOLD,
+    reset_timeout=settings.BROKER_CIRCUIT_RESET_TIMEOUT,
+)
+
+
+def _send(task, args, kwargs, options):
+    if options:
+        task.apply_async(args, kwargs, **options)
+    else:
+        task.delay(*args, **kwargs)
+
+
+def publish(task, *args, **kwargs):
+    """Drop-in replacement for task.delay(*args, **kwargs)."""
+    return publish_with_options(task, args, kwargs)
+
+
+def publish_with_options(task, args=(), kwargs=None, **options):
+    """
+    Drop-in replacement for task.apply_async(args, kwargs, **options).
+    Returns True when the message reached the broker, False when it was spooled.
+    """
+    args, kwargs = list(args), kwargs or {}
+    if breaker.allow_request():
+        try:
+            _send(task, args, kwargs, options)
+        except BROKER_ERRORS as exc:
+            breaker.record_failure()
+            logger.warning("publishing %s failed, spooling: %s", task.name, exc)
+        else:
+            if breaker.record_success():
+                _schedule_replay()
+            return True
+
+    spool(task.name, args, kwargs, options)
+    return False
+
+
+def spool(task_name, args, kwargs, options=None):
+    return SpooledTask.objects.create(task_name=task_name, args=args, kwargs=kwargs, options=options or {})
+
+
+def _schedule_replay():
+    from project_management.locks import enqueue_once
+    from .tasks import SPOOL_REPLAY_LOCK, replay_spooled_tasks
+
+    try:
+        enqueue_once(replay_spooled_tasks, SPOOL_REPLAY_LOCK)
+    except BROKER_ERRORS:
+        logger.warning("could not enqueue spool replay, the beat schedule will pick it up")
+
+
+def _options_from_spool(options):
+    options = dict(options)
+    if isinstance(options.get("eta"), str):
+        options["eta"] = parse_datetime(options["eta"])
+    return options
+
+
+def replay_spool(batch_size=500):
+    """
+    Re-publish spooled messages oldest first. Stops at the first broker error
+    so the remaining messages keep their order for the next run.
+    Returns the number of messages replayed.
+    """
+    replayed = 0
+    while True:
+        batch = list(SpooledTask.objects.order_by("id")[:batch_size])
+        if not batch:
+            return replayed
+
+        sent_ids = []
+        for item in batch:
+            task = current_app.tasks.get(item.task_name)
+            if task is None:
+                logger.error("dropping spooled message for unknown task %s", item.task_name)
+                sent_ids.append(item.id)
+                continue
+            try:
+                task.apply_async(item.args, item.kwargs, **_options_from_spool(item.options))
+            except BROKER_ERRORS as exc:
+                SpooledTask.objects.filter(pk=item.pk).update(attempts=item.attempts + 1, last_error=str(exc))
+                SpooledTask.objects.filter(id__in=sent_ids).delete()
+                logger.warning("spool replay stopped after %s message(s): %s", replayed, exc)
+                return replayed
+            sent_ids.append(item.id)
+            replayed += 1
+
+        SpooledTask.objects.filter(id__in=sent_ids).delete()
@@ -0,0 +1,199 @@
+"""
+Server-sent events for task, comment, membership and availability changes.
+
+Events are published after commit to pub/sub channels (project_management/pubsub.py):
+    project:<id>            everything about one project
+    projects                the same events again, for HR and Admin who see every project
+    employee:<id>           membership changes of that employee (the stream resubscribes)
+    availability            every availability change, for HR, Admin and PMs
+    availability:dept:<id>  availability changes within one department
+
+Each connection subscribes to the channels its employee may see, following
+the same role rules as ProjectViewSet.get_queryset. One open /api/events/
+connection replaces polling the task and project endpoints.
+
+EventSource cannot send an Authorization header. Browsers first POST to
+/api/events/ticket/ with their access token and open the stream with the
+returned ?ticket=. A ticket only opens one stream, once, within
+REALTIME_TICKET_SECONDS, so the URLs that end up in access logs carry no
+reusable credential.
+"""
+import json
+import secrets
+import time
+import uuid
+from collections import deque
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from employee.models import Employee
+from project_management import pubsub
+from .dashboard import visible_projects
+
+TASK_STATUS = "task.status"
+COMMENT_CREATED = "comment.created"
+MEMBERS_CHANGED = "project.members"
+AVAILABILITY_CHANGED = "employee.availability"
+
+ALL_PROJECTS = "projects"
+ALL_AVAILABILITY = "availability"
+# HR, Admin and PMs see the whole company's availability (as on the dashboard)
+COMPANY_WIDE_ROLES = (Employee.HR, Employee.ADMIN, Employee.PROJECT_MANAGER)
+TICKET_KEY = "events-ticket:{}"
+
+
+def project_channel(project_id):
+    return f"project:{project_id}"
+
+
+def employee_channel(employee_id):
+    return f"employee:{employee_id}"
+
+
+def department_channel(department_id):
+    return f"availability:dept:{department_id}"
+
+
+def channels_for(employee):
+    channels = {employee_channel(employee.pk)}
+    if employee.role in (Employee.HR, Employee.ADMIN):
+        channels.add(ALL_PROJECTS)
+    else:
+        channels.update(project_channel(pk) for pk in visible_projects(employee).values_list("pk", flat=True))
+    if employee.role in COMPANY_WIDE_ROLES:
+        channels.add(ALL_AVAILABILITY)
+    elif employee.department_id:
+        channels.add(department_channel(employee.department_id))
+    return channels
+
+
+def publish_event(channels, event_type, **data):
+    """Queue the event for publishing once the current transaction commits."""
+    event = {"id": uuid.uuid4().hex, "type": event_type, **data}
+    channels = list(channels)
+    transaction.on_commit(lambda: pubsub.publish(channels, event))
+    return event
+
+
+def publish_project_event(project_id, event_type, **data):
+    return publish_event([project_channel(project_id), ALL_PROJECTS], event_type, project=project_id, **data)
+
+
+def task_status_changed(task):
+    changes = getattr(task, "saved_changes", None) or {}
+    if "status" not in changes:
+        return
+    publish_project_event(
+        task.project_id, TASK_STATUS, task=task.pk, title=task.title,
+        previous=changes["status"], status=task.status, assigned_to=task.assigned_to_id,
+    )
+
+
+def comment_created(comment):
+    task = comment.task
+    publish_project_event(
+        task.project_id, COMMENT_CREATED, task=task.pk, comment=comment.pk, author=comment.author_id,
+        description=comment.description[:200],
+    )
+
+
+def members_changed(project_id, added=(), removed=()):
+    added, removed = sorted(added), sorted(removed)
+    event = publish_project_event(project_id, MEMBERS_CHANGED, added=added, removed=removed)
+    affected = [employee_channel(pk) for pk in added + removed]
+    if affected:
+        # the affected employees' streams resubscribe; same id, so nobody sees it twice
+        transaction.on_commit(lambda: pubsub.publish(affected, event))
+
+
+def availability_changed(schedule):
+    changes = getattr(schedule, "saved_changes", None) or {}
+    employee = schedule.employee
+    if "availability" not in changes or employee is None:
+        return
+    channels = [ALL_AVAILABILITY]
+    if employee.department_id:
+        channels.append(department_channel(employee.department_id))
+    publish_event(
+        channels, AVAILABILITY_CHANGED, employee=employee.pk, department=employee.department_id,
+        previous=changes["availability"], availability=schedule.availability,
+    )
+
+
+def issue_ticket(employee):
+    """A single-use ticket that opens one event stream for `employee` within REALTIME_TICKET_SECONDS."""
+    ticket = secrets.token_urlsafe(24)
+    cache.set(TICKET_KEY.format(ticket), employee.pk, settings.REALTIME_TICKET_SECONDS)
+    return ticket
+
+
+def redeem_ticket(ticket):
+    """
+    Employee the ticket was issued to. Only the first caller adds the ticket's
+    "used" marker (an atomic add in Redis), so a ticket works once.
+    """
+    key = TICKET_KEY.format(ticket)
+    employee_id = cache.get(key) if ticket else None
+    if employee_id is None or not cache.add(f"{key}:used", True, settings.REALTIME_TICKET_SECONDS):
+        raise AuthenticationFailed("Stream ticket not valid, expired or already used.")
+    cache.delete(key)
+    return Employee.objects.select_related("department").filter(pk=employee_id, user__is_active=True).first()
+
+
+def authenticate(request):
+    """
+    Employee for the JWT in the Authorization header, or for the ?ticket= from
+    issue_ticket() since browsers' EventSource cannot send headers. Access
+    tokens are not accepted in the query string. Raises InvalidToken/AuthenticationFailed.
+    """
+    auth = JWTAuthentication()
+    header = auth.get_header(request)
+    if header is None:
+        return redeem_ticket(request.GET.get("ticket", ""))
+    user = auth.get_user(auth.get_validated_token(auth.get_raw_token(header)))
+    return Employee.objects.select_related("department").filter(user=user).first()
+
+
+def format_event(event_type, message, event_id=None):
+    lines = [f"event: {event_type}"]
+    if event_id:
+        lines.append(f"id: {event_id}")
+    lines.extend(f"data: {line}" for line in message.splitlines())
+    return "\n".join(lines) + "\n\n"
+
+
+async def event_stream(employee, backend=None, heartbeat=None, max_seconds=None):
+    """
+    Async iterator of SSE frames for `employee`. Sends a keep-alive comment
+    every `heartbeat` seconds and ends after `max_seconds`; EventSource then
+    reconnects, which also renews the token check and the subscriptions.
+    """
+    backend = backend or pubsub.get_backend()
+    heartbeat = heartbeat or settings.REALTIME_HEARTBEAT_SECONDS
+    max_seconds = max_seconds or settings.REALTIME_MAX_STREAM_SECONDS
+    own_channel = employee_channel(employee.pk)
+    subscription = await backend.subscribe(await sync_to_async(channels_for)(employee))
+    deadline = time.monotonic() + max_seconds
+    seen = deque(maxlen=256)
+    try:
+        yield f"retry: {heartbeat * 1000}\n\n"
+        while time.monotonic() < deadline:
+            item = await subscription.get(timeout=min(heartbeat, max(deadline - time.monotonic(), 0.01)))
+            if item is None:
+                yield ": keep-alive\n\n"
+                continue
+            channel, message = item
+            event = json.loads(message)
+            if channel == own_channel and event.get("type") == MEMBERS_CHANGED:
+                await subscription.update(await sync_to_async(channels_for)(employee))
+            if event.get("id") in seen:
+                continue
+            seen.append(event.get("id"))
+            yield format_event(event.get("type", "message"), message, event.get("id"))
+    finally:
+        await subscription.close()
@@ -0,0 +1,301 @@
+"""
+Task dependency graph and critical path schedule per project.
+
+Every task is a node whose duration runs from its start_date to its due_date
+(DEFAULT_DURATION when it has no due date, zero once completed or cancelled).
+Edges are finish-to-start TaskDependency rows. In topological order, the
+forward pass gives each task its earliest start and finish. The backward pass
+from the project finish gives the latest start and finish. Tasks without slack
+form the critical path.
+
+The computed schedule is cached under the project's schedule_version, so
+reading it never touches the task table while nothing changed. When a task's
+status or due date changes, or an edge is added or removed, the version is
+bumped. After commit, the previous version's schedule is patched: the forward
+pass re-runs only for the changed task and its descendants. The backward pass
+re-runs for them and their ancestors, or for every task when the project
+finish moved. New and deleted tasks only bump the version, and the next read
+rebuilds the schedule with two queries.
+"""
+import logging
+from collections import deque
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from .models import Project, TaskDependency, Tasks
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DURATION = timedelta(days=1).total_seconds()
+DONE_STATUSES = ("completed", "cancelled")
+# float noise allowed when comparing slack to zero, in seconds
+EPSILON = 1e-6
+
+
+class DependencyError(ValueError):
+    """The dependency cannot be added (other project, itself, duplicate, or it would close a cycle)."""
+
+
+def schedule_cache_key(project_id, version):
+    return f"schedule:{project_id}:{version}"
+
+
+def _timestamp(value):
+    return value.timestamp() if value is not None else None
+
+
+def _node(status, start_date, due_date):
+    """[start, duration, due] in epoch seconds."""
+    start, due = _timestamp(start_date), _timestamp(due_date)
+    if status in DONE_STATUSES:
+        duration = 0.0
+    elif due is None:
+        duration = DEFAULT_DURATION
+    else:
+        duration = max(due - start, 0.0)
+    return [start, duration, due]
+
+
+def _edges(project_id):
+    return TaskDependency.objects.filter(successor__project_id=project_id).values_list("predecessor_id", "successor_id")
+
+
+def _reachable(starts, neighbours):
+    """Ids reachable from any of `starts` (included) following `neighbours`."""
+    seen = set(starts)
+    queue = deque(seen)
+    while queue:
+        for next_id in neighbours.get(queue.popleft(), ()):
+            if next_id not in seen:
+                seen.add(next_id)
+                queue.append(next_id)
+    return seen
+
+
+def topological_order(ids, preds, succs):
+    """Kahn's algorithm; raises DependencyError when the edges contain a cycle."""
+    remaining = {task_id: len(preds.get(task_id, ())) for task_id in ids}
+    queue = deque(sorted(task_id for task_id, count in remaining.items() if count == 0))
+    order = []
+    while queue:
+        task_id = queue.popleft()
+        order.append(task_id)
+        for succ in succs.get(task_id, ()):
+            remaining[succ] -= 1
+            if remaining[succ] == 0:
+                queue.append(succ)
+    if len(order) != len(remaining):
+        raise DependencyError("The task dependencies contain a cycle.")
+    return order
+
+
+def would_create_cycle(predecessor_id, successor_id, edges):
+    """True when `predecessor` is already reachable from `successor` through `edges`."""
+    succs = {}
+    for pred, succ in edges:
+        succs.setdefault(pred, []).append(succ)
+    return predecessor_id in _reachable([successor_id], succs)
+
+
+def _bump_version(project_id):
+    Project.objects.filter(pk=project_id).update(schedule_version=F("schedule_version") + 1)
+    return Project.objects.values_list("schedule_version", flat=True).get(pk=project_id)
+
+
+def add_dependency(predecessor, successor, created_by=None):
+    """
+    Create the edge predecessor -> successor. The project row is locked while
+    checking, so two concurrent requests cannot each add half of a cycle.
+    """
+    if predecessor.project_id != successor.project_id:
+        raise DependencyError("Both tasks must belong to the same project.")
+    if predecessor.pk == successor.pk:
+        raise DependencyError("A task cannot depend on itself.")
+    with transaction.atomic():
+        Project.objects.select_for_update().filter(pk=predecessor.project_id).exists()
+        edges = list(_edges(predecessor.project_id))
+        if (predecessor.pk, successor.pk) in edges:
+            raise DependencyError("This dependency already exists.")
+        if would_create_cycle(predecessor.pk, successor.pk, edges):
+            raise DependencyError("This dependency would create a cycle.")
+        return TaskDependency.objects.create(predecessor=predecessor, successor=successor, created_by=created_by)
+
+
+def _forward(state, order):
+    nodes, preds, es, ef = state["nodes"], state["preds"], state["es"], state["ef"]
+    for task_id in order:
+        start, duration, _ = nodes[task_id]
+        earliest = max([start] + [ef[pred] for pred in preds.get(task_id, ())])
+        es[task_id] = earliest
+        ef[task_id] = earliest + duration
+
+
+def _backward(state, order):
+    nodes, succs, ls, lf = state["nodes"], state["succs"], state["ls"], state["lf"]
+    finish = state["finish"]
+    for task_id in reversed(order):
+        latest = min([finish] + [ls[succ] for succ in succs.get(task_id, ())])
+        lf[task_id] = latest
+        ls[task_id] = latest - nodes[task_id][1]
+
+
+def _finish(state):
+    return max(state["ef"].values(), default=None)
+
+
+def build_schedule(project_id, version):
+    """Full computation: one query for the tasks, one for the edges."""
+    nodes = {
+        task_id: _node(status, start_date, due_date)
+        for task_id, status, start_date, due_date in Tasks.objects.filter(project_id=project_id)
+        .values_list("id", "status", "start_date", "due_date")
+    }
+    preds, succs = {}, {}
+    for pred, succ in _edges(project_id):
+        preds.setdefault(succ, []).append(pred)
+        succs.setdefault(pred, []).append(succ)
+
+    state = {
+        "version": version, "nodes": nodes, "preds": preds, "succs": succs,
+        "order": topological_order(nodes, preds, succs),
+        "es": {}, "ef": {}, "ls": {}, "lf": {},
+    }
+    _forward(state, state["order"])
+    state["finish"] = _finish(state)
+    _backward(state, state["order"])
+    return state
+
+
+def propagate(state, changed_ids):
+    """Recompute `state` in place after the nodes in `changed_ids` (or their incoming edges) changed."""
+    affected = _reachable(changed_ids, state["succs"])
+    _forward(state, [task_id for task_id in state["order"] if task_id in affected])
+
+    finish = _finish(state)
+    if finish != state["finish"]:
+        state["finish"] = finish
+        _backward(state, state["order"])
+        return
+    upstream = _reachable(affected, state["preds"])
+    _backward(state, [task_id for task_id in state["order"] if task_id in upstream])
+
+
+def get_schedule(project):
+    """Cached schedule state of `project`, built on a miss (by one caller at a time)."""
+    return cache.get_or_set(
+        schedule_cache_key(project.pk, project.schedule_version),
+        lambda: build_schedule(project.pk, project.schedule_version),
+        settings.SCHEDULE_CACHE_SECONDS,
+    )
+
+
+def _datetime(timestamp):
+    return datetime.fromtimestamp(timestamp, tz=dt_timezone.utc) if timestamp is not None else None
+
+
+def schedule_summary(state):
+    """API representation: per-task dates and slack, plus the critical path in topological order."""
+    tasks, critical_path = [], []
+    for task_id in state["order"]:
+        _, duration, due = state["nodes"][task_id]
+        slack = state["ls"][task_id] - state["es"][task_id]
+        critical = slack <= EPSILON
+        if critical:
+            critical_path.append(task_id)
+        tasks.append({
+            "id": task_id,
+            "predecessors": state["preds"].get(task_id, []),
+            "earliest_start": _datetime(state["es"][task_id]),
+            "earliest_finish": _datetime(state["ef"][task_id]),
+            "latest_start": _datetime(state["ls"][task_id]),
+            "latest_finish": _datetime(state["lf"][task_id]),
+            "duration_hours": round(duration / 3600, 2),
+            "slack_hours": round(max(slack, 0.0) / 3600, 2),
+            "critical": critical,
+            "late": due is not None and state["ef"][task_id] > due + EPSILON,
+        })
+    return {
+        "version": state["version"],
+        "finish": _datetime(state["finish"]),
+        "critical_path": critical_path,
+        "tasks": tasks,
+    }
+
+
+def _patch_cached(project_id, version, update):
+    """Derive the schedule for `version` from the cached one for version - 1, if it is there."""
+    state = cache.get(schedule_cache_key(project_id, version - 1))
+    if state is None:
+        return
+    try:
+        if update(state) is False:
+            return
+    except DependencyError:
+        logger.warning("dependency cycle in project %s, schedule left to rebuild", project_id)
+        return
+    state["version"] = version
+    cache.add(schedule_cache_key(project_id, version), state, settings.SCHEDULE_CACHE_SECONDS)
+
+
+def task_changed(task, created):
+    """post_save hook: bump the version and patch the cached schedule when dates or status moved."""
+    if created:
+        _bump_version(task.project_id)
+        return
+    changes = getattr(task, "saved_changes", None) or {}
+    if "project" in changes:
+        _bump_version(changes["project"])
+        _bump_version(task.project_id)
+        return
+    if "status" not in changes and "due_date" not in changes:
+        return
+
+    project_id, task_id = task.project_id, task.pk
+    version = _bump_version(project_id)
+
+    def update(state):
+        row = Tasks.objects.filter(pk=task_id).values_list("status", "start_date", "due_date").first()
+        if row is None or task_id not in state["nodes"]:
+            return False
+        state["nodes"][task_id] = _node(*row)
+        propagate(state, [task_id])
+
+    transaction.on_commit(lambda: _patch_cached(project_id, version, update))
+
+
+def task_removed(task):
+    """post_delete hook: the next read rebuilds the schedule."""
+    Project.objects.filter(pk=task.project_id).update(schedule_version=F("schedule_version") + 1)
+
+
+def dependency_changed(dependency, added):
+    """post_save / post_delete hook for TaskDependency."""
+    pair = Tasks.objects.filter(pk__in=(dependency.predecessor_id, dependency.successor_id))
+    project_id = pair.values_list("project_id", flat=True).first()
+    if project_id is None:
+        # both tasks are being deleted, task_removed() already bumped the version
+        return
+    version = _bump_version(project_id)
+    pred, succ = dependency.predecessor_id, dependency.successor_id
+
+    def update(state):
+        if pred not in state["nodes"] or succ not in state["nodes"]:
+            return False
+        preds = state["preds"].setdefault(succ, [])
+        succs = state["succs"].setdefault(pred, [])
+        if added:
+            preds.append(pred)
+            succs.append(succ)
+        elif pred in preds:
+            preds.remove(pred)
+            succs.remove(succ)
+        state["order"] = topological_order(state["nodes"], state["preds"], state["succs"])
+        # the predecessor's latest finish depends on the edge too
+        propagate(state, [succ, pred])
+
+    transaction.on_commit(lambda: _patch_cached(project_id, version, update))
+
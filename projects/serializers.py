@@ -3,6 +3,8 @@ from rest_framework import serializers
 from .models import *
 from employee.serializers import *
 from employee.models import Employee
+from .workload import DEFAULT_HORIZON_DAYS, MAX_HORIZON_DAYS
+from .scheduling import DependencyError, add_dependency
 # from employee.models import Employee
 
 # class EmployeeSerializer(serializers.ModelSerializer):
@@ -15,6 +17,11 @@ class ProjectDocumentSerializer(serializers.ModelSerializer):
         model = ProjectDocuments
         fields = ['id', 'file', 'description', 'uploaded_at']
 
+class ProjectStatsSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ProjectStats
+        exclude = ['project']
+
 class ProjectSerializer(serializers.ModelSerializer):
     # Override 'manager' to accept ID on input, return object on output
     manager = serializers.PrimaryKeyRelatedField(queryset=Employee.objects.all(),write_only=True )
@@ -39,6 +46,7 @@ class ProjectSerializer(serializers.ModelSerializer):
     end_date =  serializers.DateTimeField(required=True)
 
     documents = ProjectDocumentSerializer(read_only=True, many=True)
+    stats = ProjectStatsSerializer(read_only=True)
 
     def validate_end_date(self, value):
         if value and value < timezone.now():
@@ -51,10 +59,18 @@ class ProjectSerializer(serializers.ModelSerializer):
             'manager', 'manager_details',
             'team_lead', 'team_lead_details',
             'members', 'members_details',
-            'documents',
+            'documents', 'stats',
             'start_date', 'end_date', 'is_active'
         ]
 
+class WorkloadPlanTaskSerializer(serializers.Serializer):
+    priority = serializers.ChoiceField(choices=Tasks.PRIORITY_CHOICES, default="medium")
+    due_date = serializers.DateTimeField(required=False, allow_null=True)
+
+class WorkloadPlanSerializer(serializers.Serializer):
+    tasks = WorkloadPlanTaskSerializer(many=True, allow_empty=False, max_length=500)
+    horizon_days = serializers.IntegerField(min_value=1, max_value=MAX_HORIZON_DAYS, default=DEFAULT_HORIZON_DAYS)
+
 class ProjectMemberUpdateSerializer(serializers.ModelSerializer):
     members = serializers.PrimaryKeyRelatedField(queryset=Employee.objects.all(), many=True)
 
@@ -139,6 +155,40 @@ class TaskSerializer(serializers.ModelSerializer):
         return super().update(instance, validated_data)
 
 
+class TaskDependencySerializer(serializers.ModelSerializer):
+    """predecessor must finish before successor starts"""
+    predecessor = serializers.PrimaryKeyRelatedField(queryset=Tasks.objects.all())
+    successor = serializers.PrimaryKeyRelatedField(queryset=Tasks.objects.all())
+    created_by = serializers.ReadOnlyField(source="created_by.user.username")
+
+    class Meta:
+        model = TaskDependency
+        fields = ['id', 'predecessor', 'successor', 'created_by', 'created_at']
+        # uniqueness and cycles are checked by add_dependency under a lock
+        validators = []
+
+    def create(self, validated_data):
+        try:
+            return add_dependency(
+                validated_data['predecessor'], validated_data['successor'], validated_data.get('created_by')
+            )
+        except DependencyError as exc:
+            raise serializers.ValidationError({"non_field_errors": [str(exc)]})
+
+
+class ActivityEventSerializer(serializers.ModelSerializer):
+    actor_name = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ActivityEvent
+        fields = ['id', 'created_at', 'verb', 'actor', 'actor_name', 'project', 'employee', 'target_type', 'target_id', 'data']
+
+    def get_actor_name(self, obj):
+        if obj.actor is None or obj.actor.user is None:
+            return None
+        return obj.actor.user.get_full_name() or obj.actor.user.username
+
+
 class ProjectEmployeeNestedSerializer(serializers.ModelSerializer):
     user = serializers.SerializerMethodField()  # Only show name and email
 
@@ -1,9 +1,99 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
-from .models import Tasks
-from .tasks import send_task_created_email
+from .models import Project, ProjectStats, TaskComment, TaskDependency, Tasks
+from .tasks import schedule_due_reminders, send_task_created_email
+from .publisher import publish
+from employee import directory
+from . import realtime, scheduling, stats
 
 @receiver(post_save, sender=Tasks)
 def send_email_on_task_creation(sender, instance, created, **kwargs):
     if created:
-        send_task_created_email.delay(instance.id)
+        publish(send_task_created_email, instance.id)
+
+@receiver(post_save, sender=Project)
+def create_project_stats(sender, instance, created, **kwargs):
+    if created:
+        ProjectStats.objects.get_or_create(project=instance)
+
+"""(re)schedule due date reminders for tasks saved with a new due date, from the API, admin or the ORM"""
+@receiver(post_save, sender=Tasks)
+def schedule_reminders_on_due_date_change(sender, instance, created, **kwargs):
+    if instance.due_date and created or not created and instance.has_changed("due_date"):
+        schedule_due_reminders(instance)
+
+"""keep ProjectStats in step with task creation, status/due date/project changes and deletion"""
+@receiver(post_save, sender=Tasks)
+def update_project_stats_on_save(sender, instance, created, **kwargs):
+    stats.task_saved(instance, created)
+
+@receiver(post_delete, sender=Tasks)
+def update_project_stats_on_delete(sender, instance, **kwargs):
+    stats.task_deleted(instance)
+
+"""keep the cached critical path schedule in step with task dates, statuses and dependencies"""
+@receiver(post_save, sender=Tasks)
+def update_schedule_on_task_save(sender, instance, created, **kwargs):
+    scheduling.task_changed(instance, created)
+
+@receiver(post_delete, sender=Tasks)
+def update_schedule_on_task_delete(sender, instance, **kwargs):
+    scheduling.task_removed(instance)
+
+@receiver(post_save, sender=TaskDependency)
+def update_schedule_on_dependency_save(sender, instance, created, **kwargs):
+    if created:
+        scheduling.dependency_changed(instance, added=True)
+
+@receiver(post_delete, sender=TaskDependency)
+def update_schedule_on_dependency_delete(sender, instance, **kwargs):
+    scheduling.dependency_changed(instance, added=False)
+
+"""push task status changes, new comments and membership changes to the connected event streams"""
+@receiver(post_save, sender=Tasks)
+def broadcast_task_status(sender, instance, created, **kwargs):
+    if not created:
+        realtime.task_status_changed(instance)
+
+@receiver(post_save, sender=TaskComment)
+def broadcast_comment(sender, instance, created, **kwargs):
+    if created:
+        realtime.comment_created(instance)
+
+@receiver(m2m_changed, sender=Project.members.through)
+def broadcast_membership(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "pre_clear":
+        # pk_set is not given for clear(), remember who is about to be removed
+        if reverse:
+            instance._cleared_ids = set(instance.assigned_to.values_list("pk", flat=True))
+        else:
+            instance._cleared_ids = set(instance.members.values_list("pk", flat=True))
+        return
+    if action == "post_clear":
+        pk_set = getattr(instance, "_cleared_ids", set())
+    elif action not in ("post_add", "post_remove") or not pk_set:
+        return
+    removed = action != "post_add"
+    if reverse:
+        # employee.assigned_to.add(project, ...): pk_set holds project ids
+        for project_id in pk_set:
+            realtime.members_changed(project_id, removed=[instance.pk] if removed else [], added=[] if removed else [instance.pk])
+    else:
+        realtime.members_changed(instance.pk, removed=pk_set if removed else (), added=() if removed else pk_set)
+
+"""the department directory lists each employee's departments through their projects,
+so only a move to another department or a delete makes it stale"""
+@receiver([post_save, post_delete], sender=Project)
+def refresh_department_directory(sender, instance, signal, created=False, **kwargs):
+    if signal is post_delete or not created and instance.has_changed("department"):
+        directory.invalidate()
+
+@receiver(m2m_changed, sender=Project.members.through)
+def refresh_member_departments(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "post_clear":
+        # collected by broadcast_membership on pre_clear
+        pk_set = getattr(instance, "_cleared_ids", set())
+    elif action not in ("post_add", "post_remove"):
+        return
+    if pk_set:
+        directory.membership_changed([instance.pk] if reverse else pk_set)
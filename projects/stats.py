@@ -0,0 +1,194 @@
+"""
+Incremental maintenance of ProjectStats.
+
+Every task save or delete turns into a single UPDATE on the project's stats
+row. The UPDATE adds the difference between the task's old and new
+contribution (its status column, total, overdue) and recomputes
+percent_complete in the same statement. Project lists read the row instead of
+counting tasks.
+
+"overdue" is time dependent: a task becomes overdue without being written.
+The overdue ETA reminder calls note_task_overdue() when the due date passes,
+and reconcile_project_stats() recounts everything periodically. That also
+covers queryset.update() calls, which bypass the signals. Because a task can
+be past its due date without being counted yet, Tasks.overdue_counted records
+whether it is in the counter, and saves and deletes only take out what was
+counted. Decrements are clamped at 0 as a last guard against drift.
+"""
+import logging
+
+from django.db.models import Case, Count, F, FloatField, Q, Value, When
+from django.db.models.functions import Cast, Greatest
+from django.db.models.lookups import GreaterThan
+from django.utils import timezone
+
+from .models import Project, ProjectStats, Tasks
+
+logger = logging.getLogger(__name__)
+
+STATUS_COLUMNS = ("todo", "in_progress", "review", "completed", "rejected", "cancelled")
+COUNT_COLUMNS = ("total",) + STATUS_COLUMNS + ("overdue",)
+# a task past its due date counts as overdue while it is still being worked on
+OVERDUE_STATUSES = ("todo", "in_progress", "rejected")
+
+
+def is_overdue(status, due_date, now=None):
+    return status in OVERDUE_STATUSES and due_date is not None and due_date < (now or timezone.now())
+
+
+def contribution(status, overdue_counted):
+    counts = {"total": 1, "overdue": int(overdue_counted)}
+    if status in STATUS_COLUMNS:
+        counts[status] = 1
+    return counts
+
+
+def _percent_complete(completed, active):
+    return Case(
+        When(GreaterThan(active, 0), then=Cast(completed, FloatField()) * 100.0 / active),
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+
+
+def apply_delta(project_id, delta):
+    """
+    Add `delta` ({column: +/-n}) to the project's counters in one UPDATE.
+    Returns the number of rows updated (0 when the project has no stats row).
+    """
+    delta = {column: change for column, change in delta.items() if change}
+    if not delta:
+        return 0
+
+    def new(column):
+        change = delta.get(column, 0)
+        # the counters are unsigned: a decrement never takes them below 0
+        return Greatest(F(column) + change, Value(0)) if change < 0 else F(column) + change
+
+    updates = {column: new(column) for column in delta}
+    updates["percent_complete"] = _percent_complete(new("completed"), new("total") - new("cancelled"))
+    updates["updated_at"] = timezone.now()
+    return ProjectStats.objects.filter(project_id=project_id).update(**updates)
+
+
+def _diff(old, new):
+    return {column: new.get(column, 0) - old.get(column, 0) for column in set(old) | set(new)}
+
+
+def _negate(counts):
+    return {column: -count for column, count in counts.items()}
+
+
+def _mark_overdue(task, overdue):
+    """
+    Set the task's overdue_counted flag to `overdue` and return what it was.
+    The flag only changes with a conditional UPDATE, so a reminder that
+    counted the task meanwhile is not counted twice.
+    """
+    if task.overdue_counted == overdue:
+        return overdue
+    changed = Tasks.objects.filter(pk=task.pk, overdue_counted=not overdue).update(overdue_counted=overdue)
+    task.overdue_counted = overdue
+    return not overdue if changed else overdue
+
+
+def task_saved(task, created):
+    """post_save hook: move the task's contribution from its old state to the new one."""
+    if created:
+        old_project_id, old_status = task.project_id, None
+    else:
+        changes = getattr(task, "saved_changes", None)
+        if not changes:
+            return
+        old_project_id = changes.get("project", task.project_id)
+        old_status = changes.get("status", task.status)
+    was_counted = _mark_overdue(task, is_overdue(task.status, task.due_date))
+    new = contribution(task.status, task.overdue_counted)
+    old = {} if created else contribution(old_status, was_counted)
+
+    if old_project_id != task.project_id:
+        apply_delta(old_project_id, _negate(old))
+        old = {}
+
+    delta = _diff(old, new)
+    if any(delta.values()) and not apply_delta(task.project_id, delta):
+        # project created before stats existed, or its row was removed
+        rebuild_project_stats([task.project_id])
+
+
+def task_deleted(task):
+    """post_delete hook: take the task's contribution out of its project."""
+    apply_delta(task.project_id, _negate(contribution(task.status, task.overdue_counted)))
+
+
+def note_task_overdue(task):
+    """
+    Count a task that just passed its due date, unless task_saved() or a
+    reconcile already counted it.
+    """
+    if not is_overdue(task.status, task.due_date):
+        return 0
+    if not Tasks.objects.filter(pk=task.pk, overdue_counted=False).update(overdue_counted=True):
+        return 0
+    task.overdue_counted = True
+    return apply_delta(task.project_id, {"overdue": 1})
+
+
+def _mark_all_overdue(project_ids=None):
+    """Bring every task's overdue_counted flag in line with its status and due date."""
+    tasks = Tasks.objects.all()
+    if project_ids is not None:
+        tasks = tasks.filter(project_id__in=project_ids)
+    overdue = Q(status__in=OVERDUE_STATUSES, due_date__lt=timezone.now())
+    tasks.filter(overdue, overdue_counted=False).update(overdue_counted=True)
+    tasks.filter(~overdue, overdue_counted=True).update(overdue_counted=False)
+
+
+def _aggregate(project_ids=None):
+    queryset = Project.objects.all()
+    if project_ids is not None:
+        queryset = queryset.filter(pk__in=project_ids)
+    annotations = {"total": Count("tasks")}
+    for status in STATUS_COLUMNS:
+        annotations[status] = Count("tasks", filter=Q(tasks__status=status))
+    annotations["overdue"] = Count("tasks", filter=Q(tasks__overdue_counted=True))
+    return {row.pop("pk"): row for row in queryset.values("pk").annotate(**annotations)}
+
+
+def _percent(counts):
+    active = counts["total"] - counts["cancelled"]
+    return counts["completed"] * 100.0 / active if active > 0 else 0.0
+
+
+def _drifted(stats, counts):
+    if any(getattr(stats, column) != counts[column] for column in COUNT_COLUMNS):
+        return True
+    return abs(stats.percent_complete - counts["percent_complete"]) > 1e-6
+
+
+def rebuild_project_stats(project_ids=None):
+    """
+    Recount stats from the task table (all projects when project_ids is None)
+    and write only the rows that drifted. Returns the number of rows fixed.
+    """
+    _mark_all_overdue(project_ids)
+    actual = _aggregate(project_ids)
+    existing = ProjectStats.objects.filter(project_id__in=actual.keys()).in_bulk()
+
+    to_create, to_update = [], []
+    for project_id, counts in actual.items():
+        counts["percent_complete"] = _percent(counts)
+        stats = existing.get(project_id)
+        if stats is None:
+            to_create.append(ProjectStats(project_id=project_id, **counts))
+        elif _drifted(stats, counts):
+            for column, value in counts.items():
+                setattr(stats, column, value)
+            stats.updated_at = timezone.now()
+            to_update.append(stats)
+
+    ProjectStats.objects.bulk_create(to_create, ignore_conflicts=True)
+    ProjectStats.objects.bulk_update(to_update, list(COUNT_COLUMNS) + ["percent_complete", "updated_at"], batch_size=500)
+    if to_create or to_update:
+        logger.info("project stats: %s created, %s corrected", len(to_create), len(to_update))
+    return len(to_create) + len(to_update)
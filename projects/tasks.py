@@ -1,18 +1,37 @@
+import logging
+import uuid
+from datetime import timedelta
+from functools import lru_cache
 from celery import shared_task
-from django.core.mail import send_mail
+from django.core.mail import send_mail, send_mass_mail
+from django.db import transaction
+from django.db.models import Prefetch
+from django.template.loader import get_template
 from django.utils import timezone
 from .models import Tasks, Project
+from .publisher import publish_with_options, replay_spool
+from .stats import note_task_overdue, rebuild_project_stats
+from .activity import ensure_partitions
 from employee.models import Employee
 from django.conf import settings
 from employee.models import EmployeeSchedule
+from django.contrib.auth import get_user_model
+from project_management.db_router import primary_reads, reads_from_replica
+from project_management.locks import get_lock_backend, single_instance
 
-@shared_task
+User = get_user_model()
+
+logger = logging.getLogger(__name__)
+
+PROJECT_CREATED_TEMPLATE = "projects/emails/project_created.txt"
+
+@shared_task(ignore_result=True)
 def send_task_created_email(task_id):
     """
     Send email notification when a task is created.
     """
     try:
-        task = Tasks.objects.get(id=task_id)
+        task = Tasks.objects.select_related('assigned_to__user', 'project').get(id=task_id)
         if task.assigned_to and task.assigned_to.user.email:
             subject = f"New Task Assigned: {task.title}"
             message = f"Hi {task.assigned_to.user.first_name},\n\n" \
@@ -25,69 +44,208 @@ def send_task_created_email(task_id):
             print(f"⚠️ Task {task.title} has no assigned employee with an email.")
     except Tasks.DoesNotExist:
         print(f"Task with ID {task_id} not found.")
-@shared_task
+REMINDER_LEAD_TIME = timedelta(hours=24)
+REMINDER_STATUSES = ("todo", "in_progress", "rejected")
+
+
+def reminder_horizon():
+    return timedelta(seconds=settings.REMINDER_SCHEDULE_HORIZON_SECONDS)
+
+
+def schedule_due_reminders(task):
+    """
+    Schedule the "due in 24h" and "overdue now" reminders for a task,
+    replacing any reminders scheduled for an earlier due_date. Called from
+    post_save whenever a task gets or changes its due date.
+
+    Every call stores a fresh reminder_token on the task; a reminder only
+    fires when the token it was scheduled with is still the current one, so
+    changing or clearing due_date cancels the old reminders without having
+    to revoke them.
+
+    Only reminders firing within the horizon are published now; the others
+    are published by schedule_upcoming_reminders once they come within it.
+    Redis redelivers unacknowledged ETA messages after the broker's
+    visibility timeout, so an ETA weeks ahead would pile up a copy every hour.
+    """
+    token = uuid.uuid4().hex if task.due_date else ""
+    Tasks.objects.filter(pk=task.pk).update(reminder_token=token)
+    task.reminder_token = token
+    if not token:
+        return
+
+    task_id, due_date = task.pk, task.due_date
+    transaction.on_commit(lambda: _publish_reminders(task_id, token, due_date, timezone.now()))
+
+
+def _publish_reminders(task_id, token, due_date, now, lookback=timedelta(0)):
+    """
+    Publish the task's reminders that fire before now + horizon and not
+    earlier than now - lookback. Returns how many were published; a reminder
+    already published for this token is not published again.
+    """
+    published = 0
+    until = now + reminder_horizon()
+    for kind, reminder, eta in (
+        ("due-soon", send_due_soon_reminder, due_date - REMINDER_LEAD_TIME),
+        ("overdue", send_overdue_reminder, due_date),
+    ):
+        if not now - lookback < eta < until:
+            continue
+        marker = f"reminder-queued:{kind}:{task_id}:{token}"
+        if get_lock_backend().acquire(marker, int(reminder_horizon().total_seconds() * 2000)) is None:
+            continue
+        publish_with_options(reminder, (task_id, token), eta=eta)
+        published += 1
+    return published
+
+
+def _claim_reminder(kind, task_id, token):
+    """
+    Load the task if the reminder is still current and not sent yet.
+    Redis redelivers ETA messages that outlive the visibility timeout, so the
+    first delivery takes a marker and later copies are dropped.
+    """
+    task = Tasks.objects.select_related('assigned_to__user', 'project').filter(
+        pk=task_id, reminder_token=token, status__in=REMINDER_STATUSES
+    ).first()
+    if task is None:
+        return None
+    marker = f"reminder:{kind}:{task_id}:{token}"
+    if get_lock_backend().acquire(marker, int(REMINDER_LEAD_TIME.total_seconds() * 2000)) is None:
+        return None
+    return task
+
+
+def _has_recipient(task):
+    return bool(task.assigned_to and task.assigned_to.user and task.assigned_to.user.email)
+
+
+@shared_task(ignore_result=True)
+def send_due_soon_reminder(task_id, token):
+    task = _claim_reminder("due-soon", task_id, token)
+    if task is None or not _has_recipient(task):
+        return
+    subject = f"Task Due Soon: {task.title}"
+    message = f"Hi {task.assigned_to.user.first_name},\n\n" \
+              f"The task assigned to you is due within 24 hours: {task.title}.\n" \
+              f"Project: {task.project.name}\n" \
+              f"Deadline: {task.due_date}\n\nBest,\nProject Management System"
+    send_mail(subject, message, 'no-reply@projectsystem.com', [task.assigned_to.user.email])
+    print(f"Due soon reminder sent for task {task.title} to {task.assigned_to.user.email}")
+
+
+@shared_task(ignore_result=True)
+def send_overdue_reminder(task_id, token):
+    task = _claim_reminder("overdue", task_id, token)
+    if task is None:
+        return
+    note_task_overdue(task)
+    if not _has_recipient(task):
+        return
+    subject = f"Task Overdue: {task.title}"
+    message = f"Hi {task.assigned_to.user.first_name},\n\n" \
+              f"The task assigned to you is now overdue: {task.title}.\n" \
+              f"Project: {task.project.name}\n" \
+              f"Original Deadline: {task.due_date}\n\nPlease take immediate action!\n\nBest,\nProject Management System"
+    send_mail(subject, message, 'no-reply@projectsystem.com', [task.assigned_to.user.email])
+    print(f"⚠️ Overdue reminder sent for task {task.title} to {task.assigned_to.user.email}")
+
+
+@shared_task(ignore_result=True)
 def send_project_created_email(project_id):
     """
     Send email notification to PM/TL/HR when a project is created.
     Includes detailed info: department, manager, team lead, members, start/end dates.
+
+    Everything the email needs is loaded up front (project + members in one
+    prefetch plan, HR/Admin addresses in one query), the body is rendered once
+    and all messages go out over a single SMTP connection, so the query count
+    does not grow with the number of members or recipients.
     """
     try:
-        project = Project.objects.get(id=project_id)
-        recipients = []
-
-        # Project Manager
-        if project.manager and project.manager.user.email:
-            recipients.append(project.manager.user.email)
-        # Team Lead
-        if project.team_lead and project.team_lead.user.email:
-            recipients.append(project.team_lead.user.email)
-        # HR/Admin
-        hr_members = Employee.objects.filter(role__in=[Employee.HR, Employee.ADMIN])
-        recipients += [emp.user.email for emp in hr_members if emp.user.email]
-
-        # Remove duplicates
-        recipients = list(set(recipients))
-
-        # Gather project info
-        manager_name = project.manager.user.get_full_name() if project.manager else "N/A"
-        team_lead_name = project.team_lead.user.get_full_name() if project.team_lead else "N/A"
-        team_members = [member.user.get_full_name() for member in project.members.all()]
-        department_name = project.department.name if project.department else "N/A"
-        start_date = project.start_date.strftime("%d %b %Y %H:%M")
-        end_date = project.end_date.strftime("%d %b %Y %H:%M") if project.end_date else "Not set"
-
-        for email in recipients:
-            subject = f"New Project Assigned: {project.name}"
-            message = f"""
-Hi,
-
-A new project has been created: {project.name}
-
-Description: {project.description or 'No description provided'}
-
-Department: {department_name}
-Project Manager: {manager_name}
-Team Lead: {team_lead_name}
-Team Members: {', '.join(team_members) if team_members else 'No members assigned'}
-
-Start Date: {start_date}
-End Date: {end_date}
-
-Please check your responsibilities.
-
-Best regards,
-Project Management System
-"""
-            send_mail(subject, message, 'no-reply@projectsystem.com', [email])
-            print(f"Email sent for project {project.name} to {email}")
-
+        project = project_notification_queryset().get(id=project_id)
     except Project.DoesNotExist:
         print(f"Project with ID {project_id} not found.")
+        return
+
+    recipients = project_notification_recipients(project)
+    if not recipients:
+        print(f"⚠️ Project {project.name} has no recipients with an email.")
+        return
+
+    subject = f"New Project Assigned: {project.name}"
+    message = render_project_created_message(project)
+    datatuple = [(subject, message, 'no-reply@projectsystem.com', [email]) for email in recipients]
+    sent = send_mass_mail(datatuple, fail_silently=False)
+    print(f"Email sent for project {project.name} to {sent} recipient(s)")
+
+
+def project_notification_queryset():
+    """
+    Project queryset with every relation used by the project emails joined or
+    prefetched, so rendering never falls back to lazy per-object loads.
+    """
+    return Project.objects.select_related(
+        'department', 'manager__user', 'team_lead__user'
+    ).prefetch_related(
+        Prefetch('members', queryset=Employee.objects.select_related('user').order_by('id'))
+    )
+
+
+def project_notification_recipients(project):
+    """
+    PM, team lead and every HR/Admin address, de-duplicated in a stable order.
+    HR/Admin emails are read straight from the user table in one query.
+    """
+    recipients = []
+    for employee in (project.manager, project.team_lead):
+        if employee and employee.user and employee.user.email:
+            recipients.append(employee.user.email)
+
+    recipients += User.objects.filter(
+        employee_profile__role__in=[Employee.HR, Employee.ADMIN]
+    ).exclude(email='').order_by('id').values_list('email', flat=True)
+
+    return list(dict.fromkeys(recipients))
+
+
+@lru_cache(maxsize=None)
+def _compiled_template(template_name):
+    return get_template(template_name)
+
+
+def render_project_created_message(project):
+    def full_name(employee):
+        return employee.user.get_full_name() if employee and employee.user else "N/A"
+
+    team_members = [member.user.get_full_name() for member in project.members.all() if member.user]
+    return _compiled_template(PROJECT_CREATED_TEMPLATE).render({
+        "project_name": project.name,
+        "description": project.description or 'No description provided',
+        "department_name": project.department.name if project.department else "N/A",
+        "manager_name": full_name(project.manager),
+        "team_lead_name": full_name(project.team_lead),
+        "team_members": ', '.join(team_members) if team_members else 'No members assigned',
+        "start_date": project.start_date.strftime("%d %b %Y %H:%M"),
+        "end_date": project.end_date.strftime("%d %b %Y %H:%M") if project.end_date else "Not set",
+    })
+
+OVERDUE_CHECK_LOCK = "check-overdue-tasks"
+AVAILABILITY_SWEEP_LOCK = "update-employee-availability"
+SPOOL_REPLAY_LOCK = "replay-spooled-tasks"
+STATS_RECONCILE_LOCK = "reconcile-project-stats"
+ACTIVITY_PARTITIONS_LOCK = "create-activity-partitions"
+REMINDER_SCHEDULE_LOCK = "schedule-upcoming-reminders"
+
 
 @shared_task
+@single_instance(OVERDUE_CHECK_LOCK, ttl=30 * 60)
 def check_overdue_tasks():
     """
-    Periodically check and mark tasks as overdue and notify the assigned employee.
+    Check and mark tasks as overdue and notify the assigned employee.
+    Run on demand via trigger_overdue_check; routine reminders are ETA tasks
+    scheduled per task (see schedule_due_reminders).
     """
     now = timezone.now()
     overdue_tasks = Tasks.objects.filter(due_date__lt=now, status__in=["pending", "in_progress"])
@@ -115,7 +273,7 @@ def check_overdue_tasks():
 #         [recipient_email],
 #         fail_silently=False,
 #     )
-@shared_task
+@shared_task(ignore_result=True)
 def send_assignment_email(subject, message, recipient_email):
     send_mail(
         subject,
@@ -126,10 +284,65 @@ def send_assignment_email(subject, message, recipient_email):
     )
 
 @shared_task
-def update_all_employee_availability():
-    schedules = EmployeeSchedule.objects.filter(
-        employee__isnull=False
-    ).select_related('employee__department')
-    
-    for schedule in schedules:
-        schedule.update_availability()
\ No newline at end of file
+@single_instance(AVAILABILITY_SWEEP_LOCK, ttl=30 * 60)
+@reads_from_replica
+def update_all_employee_availability(batch_size=500):
+    # only the list comes from the replica: each availability is recomputed from
+    # primary reads, so a leave approved just before the sweep is not overwritten
+    schedule_ids = list(EmployeeSchedule.objects.filter(employee__isnull=False).values_list('pk', flat=True))
+    for start in range(0, len(schedule_ids), batch_size):
+        with primary_reads():
+            schedules = EmployeeSchedule.objects.filter(
+                pk__in=schedule_ids[start:start + batch_size]
+            ).select_related('employee__department')
+            for schedule in schedules:
+                schedule.update_availability()
+
+
+@shared_task(ignore_result=True)
+@single_instance(SPOOL_REPLAY_LOCK, ttl=10 * 60)
+def replay_spooled_tasks():
+    """
+    Publish messages spooled while the broker was unavailable.
+    """
+    replayed = replay_spool()
+    if replayed:
+        logger.info("Replayed %s spooled task(s)", replayed)
+
+
+@shared_task(ignore_result=True)
+@single_instance(STATS_RECONCILE_LOCK, ttl=30 * 60)
+def reconcile_project_stats():
+    """
+    Recount ProjectStats from the task table and fix drifted rows: tasks that
+    became overdue without a reminder, and writes that bypassed the signals.
+    """
+    fixed = rebuild_project_stats()
+    logger.info("Project stats reconciled, %s row(s) corrected", fixed)
+
+
+@shared_task(ignore_result=True)
+@single_instance(ACTIVITY_PARTITIONS_LOCK, ttl=10 * 60)
+def create_activity_partitions():
+    """Keep monthly activity log partitions a few months ahead (PostgreSQL only)."""
+    created = ensure_partitions()
+    logger.info("Activity partitions created: %s", ", ".join(created) or "none")
+
+
+@shared_task(ignore_result=True)
+@single_instance(REMINDER_SCHEDULE_LOCK, ttl=10 * 60)
+def schedule_upcoming_reminders():
+    """
+    Publish the due date reminders that now fall within the horizon (see
+    schedule_due_reminders). Runs several times per horizon, and looks one
+    horizon back so reminders missed while beat was down still go out.
+    """
+    now = timezone.now()
+    horizon = reminder_horizon()
+    upcoming = Tasks.objects.filter(
+        status__in=REMINDER_STATUSES,
+        due_date__gt=now - horizon,
+        due_date__lt=now + horizon + REMINDER_LEAD_TIME,
+    ).exclude(reminder_token="").values_list("pk", "reminder_token", "due_date")
+    published = sum(_publish_reminders(pk, token, due_date, now, lookback=horizon) for pk, token, due_date in upcoming)
+    logger.info("%s due date reminder(s) published", published)
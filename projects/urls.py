@@ -10,6 +10,7 @@ router.register(r'projects', ProjectViewSet, basename='project')
 # Nested router for tasks under projects
 projects_router = routers.NestedDefaultRouter(router, r'projects', lookup='project')
 projects_router.register(r'tasks', TaskViewSet, basename='project-tasks')
+projects_router.register(r'dependencies', TaskDependencyViewSet, basename='task-dependencies')
 projects_router.register(r'comments', TaskCommentViewSet, basename = "task-comments")
 projects_router.register(r'folders', FolderViewSet, basename='folder')
 projects_router.register(r'list', ListViewSet, basename='list')
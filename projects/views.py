@@ -5,7 +5,7 @@ from rest_framework.response import Response
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from .models import * 
 from .serializers import *
-from django.db.models import Min, Q, BooleanField, ExpressionWrapper, Count
+from django.db.models import Min, Q, BooleanField, ExpressionWrapper, Count, F, OuterRef, Subquery
 from employee.models import * 
 from django.core.exceptions import PermissionDenied
 from employee.permissions import *
@@ -17,17 +17,40 @@ from .permissions import *
 from django.db.models import Min
 from employee.permissions import *
 from .tasks import *
-from .tasks import send_task_created_email
-
-class ProjectViewSet(viewsets.ModelViewSet):
+from .tasks import send_task_created_email, OVERDUE_CHECK_LOCK
+from project_management.locks import enqueue_once
+from .publisher import publish
+from project_management.streaming import StreamingExportMixin
+from rest_framework.views import APIView
+from .dashboard import aget_dashboard, get_dashboard
+from .workload import DEFAULT_HORIZON_DAYS, MAX_HORIZON_DAYS, plan_assignments, rank_assignees
+from .dashboard import visible_projects
+from .scheduling import get_schedule, schedule_summary
+from . import activity
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken
+from .realtime import authenticate, event_stream, issue_ticket
+from project_management.async_views import async_list, prepare_view, render
+
+class ProjectViewSet(StreamingExportMixin, viewsets.ModelViewSet):
     serializer_class = ProjectSerializer
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated, IsAssignedProjectOrHigher]
     http_method_names = ['get', 'post', 'put', 'patch', 'delete']
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name', 'description']
-    ordering_fields = ['name', 'priority', 'earliest_deadline']
+    ordering_fields = ['name', 'priority', 'earliest_deadline', 'percent_complete']
     ordering = ['name']
+    export_filename = "projects"
+    export_fields = (
+        'id', 'name', 'department__name', 'manager__user__email', 'team_lead__user__email',
+        'start_date', 'end_date', 'earliest_due_date', 'is_overdue', 'percent_complete', 'is_active',
+    )
 
     def get_queryset(self):
         """
@@ -39,8 +62,14 @@ class ProjectViewSet(viewsets.ModelViewSet):
 
         today = timezone.now().date()
 
-        queryset = Project.objects.annotate(
-        earliest_due_date=Min('tasks__due_date')  #use 'tasks' because of related_name="tasks"
+        # no aggregate over the tasks join: the list needs no GROUP BY, and
+        # ?ordering=-percent_complete can walk the index on the stats rollup
+        earliest_due_dates = Tasks.objects.filter(
+            project=OuterRef('pk'), due_date__isnull=False,
+        ).order_by('due_date').values('due_date')[:1]
+        queryset = Project.objects.select_related('stats').annotate(
+        earliest_due_date=Subquery(earliest_due_dates),
+        percent_complete=F('stats__percent_complete'),
         ).annotate(
             is_overdue=ExpressionWrapper(
                 Q(earliest_due_date__lt=today),
@@ -60,6 +89,11 @@ class ProjectViewSet(viewsets.ModelViewSet):
         else:
             return Project.objects.none()
 
+        if 'percent_complete' in self.request.query_params.get('ordering', ''):
+            # projects get their stats row when created (and from reconcile_project_stats):
+            # an inner join lets the database read projects in percent_complete index order
+            queryset = queryset.filter(stats__isnull=False)
+
         # Role-based ordering
         if role == Employee.EMPLOYEE:
             queryset = queryset.order_by('earliest_due_date')
@@ -87,7 +121,7 @@ class ProjectViewSet(viewsets.ModelViewSet):
         # Send email asynchronously
         subject = f"New Project Created: {project.name}"
         message = f"Hello {employee.user.first_name}, your project '{project.name}' has been created successfully."
-        send_assignment_email.delay(subject, message, employee.user.email)
+        publish(send_assignment_email, subject, message, employee.user.email)
 
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
@@ -113,7 +147,13 @@ class ProjectViewSet(viewsets.ModelViewSet):
             return Response(
                 {"error": "One or more invalid employee IDs."},
                 status=status.HTTP_400_BAD_REQUEST)
+        previous_ids = set(project.members.values_list('id', flat=True))
         project.members.set(employees)
+        actor = getattr(request.user, "employee_profile", None)
+        for member_id in sorted({emp.id for emp in employees} - previous_ids):
+            activity.record(activity.MEMBER_ADDED, actor=actor, project=project, employee=member_id, target=project)
+        for member_id in sorted(previous_ids - {emp.id for emp in employees}):
+            activity.record(activity.MEMBER_REMOVED, actor=actor, project=project, employee=member_id, target=project)
 
         # Notify new members via email (async)
         for emp in employees:
@@ -125,13 +165,58 @@ class ProjectViewSet(viewsets.ModelViewSet):
                     f"Project Description: {project.description or 'No description'}\n\n"
                     "Best,\nProject Management System"
                 )
-                send_assignment_email.delay(subject, message, emp.user.email)
+                publish(send_assignment_email, subject, message, emp.user.email)
 
         return Response(
             {"message": "Members assigned successfully and notified via email."},
             status=status.HTTP_200_OK
         )
 
+    @action(detail=True, methods=['get'])
+    def workload(self, request, pk=None):
+        """
+        Project members ranked by workload relative to capacity, least loaded first.
+        ?horizon_days=14 sets the capacity window. Leads only.
+        """
+        if not has_role(request.user, Employee.HR, Employee.ADMIN, Employee.PROJECT_MANAGER, Employee.TEAM_LEAD):
+            return Response({"error": "Permission denied."}, status=status.HTTP_403_FORBIDDEN)
+        project = self.get_object()
+        try:
+            horizon_days = int(request.query_params.get("horizon_days", DEFAULT_HORIZON_DAYS))
+        except ValueError:
+            horizon_days = 0
+        if not 1 <= horizon_days <= MAX_HORIZON_DAYS:
+            return Response(
+                {"horizon_days": [f"Must be between 1 and {MAX_HORIZON_DAYS}."]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response({"horizon_days": horizon_days, "members": rank_assignees(project, horizon_days)})
+
+    @workload.mapping.post
+    def plan_workload(self, request, pk=None):
+        """
+        What-if: suggest assignees for a batch of new tasks.
+        Expects: {"tasks": [{"priority": "high", "due_date": "..."}], "horizon_days": 14}
+        """
+        if not has_role(request.user, Employee.HR, Employee.ADMIN, Employee.PROJECT_MANAGER, Employee.TEAM_LEAD):
+            return Response({"error": "Permission denied."}, status=status.HTTP_403_FORBIDDEN)
+        project = self.get_object()
+        serializer = WorkloadPlanSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        assignments, members = plan_assignments(
+            project, serializer.validated_data["tasks"], serializer.validated_data["horizon_days"]
+        )
+        return Response({"assignments": assignments, "members": members})
+
+    @action(detail=True, methods=['get'])
+    def schedule(self, request, pk=None):
+        """
+        Critical path schedule for Gantt views: earliest/latest start and finish,
+        slack per task and the critical path. Cached per project version.
+        """
+        project = self.get_object()
+        return Response(schedule_summary(get_schedule(project)))
+
     @action(detail=True, methods=['post'])
     def assign_manager(self, request, pk=None):
         """
@@ -172,7 +257,7 @@ class ProjectViewSet(viewsets.ModelViewSet):
                 f"Please log in to the system to view the full project details.\n\n"
                 f"Best Regards,\nProject Management System"
             )
-            send_assignment_email.delay(subject, message, manager.user.email)
+            publish(send_assignment_email, subject, message, manager.user.email)
 
         return Response(
             {"message": f"Manager '{manager.user.first_name}' assigned and notified via email."},
@@ -200,7 +285,7 @@ class ProjectViewSet(viewsets.ModelViewSet):
         serializer = ProjectDocumentSerializer(documents, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
-class TaskViewSet(viewsets.ModelViewSet):
+class TaskViewSet(StreamingExportMixin, viewsets.ModelViewSet):
     queryset = Tasks.objects.all()
     serializer_class = TaskSerializer
     authentication_classes = [JWTAuthentication]
@@ -210,6 +295,11 @@ class TaskViewSet(viewsets.ModelViewSet):
     ordering_fields = ['title', 'status', 'priority', 'due_date']
     ordering = ['title']
     filterset_fields = ['status', 'priority', 'assigned_to', 'project']
+    export_filename = "tasks"
+    export_fields = (
+        'id', 'project__name', 'title', 'status', 'priority', 'assigned_to__user__email',
+        'start_date', 'due_date', 'submitted_at', 'reviewed_by__user__email', 'is_active',
+    )
 
     def get_queryset(self):
         user = self.request.user
@@ -235,7 +325,7 @@ class TaskViewSet(viewsets.ModelViewSet):
         employee = getattr(self.request.user, "employee_profile", None)
         project = Project.objects.get(pk=self.kwargs.get("project_pk"))
         task = serializer.save(created_by=employee, project=project)
-        send_task_created_email.delay(task.id)
+        publish(send_task_created_email, task.id)
 
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
@@ -260,12 +350,17 @@ class TaskViewSet(viewsets.ModelViewSet):
                 status=400
             )
 
+        previous_status = task.status
         task.status = "review"
         task.submitted_at = timezone.now()
         task.submission_notes = request.data.get("submission_notes", "")
         if "submission_file" in request.FILES:
             task.submission_file = request.FILES["submission_file"]
         task.save()
+        activity.record(
+            activity.TASK_SUBMITTED, actor=employee, project=task.project_id, employee=task.assigned_to_id,
+            target=task, from_status=previous_status,
+        )
 
         return Response({"message": "Task submitted for review."}, status=200)
     @action(detail=True, methods=['post'])
@@ -286,6 +381,10 @@ class TaskViewSet(viewsets.ModelViewSet):
         if approval_note:
             task.submission_notes = approval_note
         task.save()
+        activity.record(
+            activity.TASK_APPROVED, actor=employee, project=task.project_id, employee=task.assigned_to_id,
+            target=task, from_status="review",
+        )
         return Response({"message": "Task approved and marked as completed."}, status=200)
 
 
@@ -304,8 +403,13 @@ class TaskViewSet(viewsets.ModelViewSet):
         if task.status not in ["todo", "in_progress"]:
             return Response({"detail": "Only tasks not yet submitted or in progress can be cancelled."}, status=400)
 
+        previous_status = task.status
         task.status = "cancelled"
         task.save(update_fields=["status"])
+        activity.record(
+            activity.TASK_CANCELLED, actor=employee, project=task.project_id, employee=task.assigned_to_id,
+            target=task, from_status=previous_status,
+        )
         return Response({"message": "Task cancelled successfully."}, status=200)
 
     @action(detail=True, methods=['patch'], url_path="reject")
@@ -322,13 +426,59 @@ class TaskViewSet(viewsets.ModelViewSet):
         task.status = "rejected"
         task.reviewed_by = employee
         task.save()
+        activity.record(
+            activity.TASK_REJECTED, actor=employee, project=task.project_id, employee=task.assigned_to_id,
+            target=task, from_status="review",
+        )
         return Response({"message": "Task rejected successfully."}, status=200)
 
     @action(detail=False, methods=['post'], permission_classes=[IsHROrAdminOrProjectManager])
     def trigger_overdue_check(self, request, **kwargs):
-        check_overdue_tasks.delay()
+        if not enqueue_once(check_overdue_tasks, OVERDUE_CHECK_LOCK):
+            return Response({"message": "Overdue check already queued"}, status=200)
         return Response({"message": "Overdue check triggered"}, status=200)
 
+"""
+finish-to-start dependencies between the tasks of a project;
+anyone who can see the project can list them, leads add and remove them
+"""
+class TaskDependencyViewSet(viewsets.ModelViewSet):
+    serializer_class = TaskDependencySerializer
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+    http_method_names = ['get', 'post', 'delete', 'head', 'options']
+
+    def get_queryset(self):
+        user = self.request.user
+        if getattr(self, 'swagger_fake_view', False) or not user.is_authenticated:
+            return TaskDependency.objects.none()
+        employee = getattr(user, "employee_profile", None)
+        if employee is None:
+            return TaskDependency.objects.none()
+        return TaskDependency.objects.filter(
+            successor__project_id=self.kwargs.get('project_pk'),
+            successor__project__in=visible_projects(employee),
+        ).order_by('id')
+
+    def check_lead(self):
+        if not has_role(self.request.user, Employee.HR, Employee.ADMIN, Employee.PROJECT_MANAGER, Employee.TEAM_LEAD):
+            raise PermissionDenied("Only leads can change task dependencies.")
+
+    def perform_create(self, serializer):
+        self.check_lead()
+        employee = self.request.user.employee_profile
+        project_id = self.kwargs.get('project_pk')
+        if not visible_projects(employee).filter(pk=project_id).exists():
+            raise PermissionDenied("You are not assigned to this project.")
+        if str(serializer.validated_data['successor'].project_id) != str(project_id):
+            raise serializers.ValidationError({"successor": "The task does not belong to this project."})
+        serializer.save(created_by=employee)
+
+    def perform_destroy(self, instance):
+        self.check_lead()
+        instance.delete()
+
+
 class TaskCommentViewSet(viewsets.ModelViewSet):
     serializer_class = TaskCommentSerializer
     permission_classes = [IsSelfOrTeamLeadOrHROrPMOrADMIN]
@@ -395,8 +545,13 @@ class FolderViewSet(viewsets.ModelViewSet):
         except Folder.DoesNotExist:
             return Response({"error": "Invalid folder"}, status=status.HTTP_400_BAD_REQUEST)
 
+        previous_folder_id = file.folder_id
         file.folder = new_folder
         file.save()
+        activity.record(
+            activity.FILE_MOVED, actor=getattr(request.user, "employee_profile", None),
+            project=new_folder.project_id, target=file, from_folder=previous_folder_id, to_folder=new_folder.id,
+        )
         return Response(self.get_serializer(file).data, status=status.HTTP_200_OK)
 
     """
@@ -450,10 +605,16 @@ class FolderViewSet(viewsets.ModelViewSet):
             if new_parent.path.startswith((folder.path + "/")) or new_parent.pk == folder.pk:
                 return Response({"detail": "Cannot move a folder into its own subtree."},
                                 status=status.HTTP_400_BAD_REQUEST)
+        previous_parent_id = folder.parent_id
         folder.parent = new_parent
         if "new_order" in request.data:
             folder.order = int(request.data['new_order'])
         folder.save()
+        activity.record(
+            activity.FOLDER_MOVED, actor=getattr(request.user, "employee_profile", None),
+            project=folder.project_id, target=folder,
+            from_parent=previous_parent_id, to_parent=folder.parent_id, order=folder.order,
+        )
         return Response(self.get_serializer(folder).data)
 
     """
@@ -520,4 +681,129 @@ class FolderFileViewSet(viewsets.ModelViewSet):
         folder_id = self.request.query_params.get("folder")
         if folder_id:
             qs = qs.filter(folder_id = folder_id)
-        return qs
\ No newline at end of file
+        return qs
+
+
+class DashboardView(APIView):
+    """
+    Role-aware summary for the logged-in employee in one request: open tasks,
+    nearest project deadlines, pending leave approvals and team availability.
+    Cached per user for a few seconds (DASHBOARD_CACHE_SECONDS).
+    """
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        data = get_dashboard(request.user)
+        if data is None:
+            return Response({"detail": "No employee profile found."}, status=status.HTTP_403_FORBIDDEN)
+        return Response(data)
+
+
+class ActivityFeedView(APIView):
+    """
+    Activity log, newest first, with cursor pagination (?cursor=, ?page_size=).
+    ?project=<id> for a project the user can see, otherwise ?employee=<id>
+    (leads only) or the user's own feed.
+    """
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        employee = getattr(request.user, "employee_profile", None)
+        if employee is None:
+            return Response({"detail": "No employee profile found."}, status=status.HTTP_403_FORBIDDEN)
+
+        project_id = request.query_params.get("project")
+        employee_id = request.query_params.get("employee")
+        for name, value in (("project", project_id), ("employee", employee_id)):
+            if value and not value.isdigit():
+                return Response({name: ["A valid integer is required."]}, status=status.HTTP_400_BAD_REQUEST)
+        if project_id:
+            if not visible_projects(employee).filter(pk=project_id).exists():
+                return Response({"detail": "Project not found."}, status=status.HTTP_404_NOT_FOUND)
+            events = ActivityEvent.objects.filter(project_id=project_id)
+        else:
+            if employee_id and str(employee_id) != str(employee.id) and not has_role(
+                request.user, Employee.HR, Employee.ADMIN, Employee.PROJECT_MANAGER, Employee.TEAM_LEAD
+            ):
+                return Response({"detail": "You can only view your own activity."}, status=status.HTTP_403_FORBIDDEN)
+            events = ActivityEvent.objects.filter(employee_id=employee_id or employee.id)
+
+        paginator = activity.ActivityCursorPagination()
+        page = paginator.paginate_queryset(events.select_related("actor__user"), request, view=self)
+        return paginator.get_paginated_response(ActivityEventSerializer(page, many=True).data)
+
+
+class EventTicketView(APIView):
+    """
+    A single-use ticket for opening the event stream from a browser, whose
+    EventSource cannot send the access token: GET /api/events/?ticket=<ticket>
+    within "expires_in" seconds.
+    """
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        employee = getattr(request.user, "employee_profile", None)
+        if employee is None:
+            return Response({"detail": "No employee profile found."}, status=status.HTTP_403_FORBIDDEN)
+        return Response(
+            {"ticket": issue_ticket(employee), "expires_in": settings.REALTIME_TICKET_SECONDS},
+            status=status.HTTP_201_CREATED,
+        )
+
+
+@require_GET
+async def events(request):
+    """
+    Server-sent event stream of the task status changes, new comments,
+    membership and availability changes the caller may see. Only served by
+    the ASGI application: under WSGI every open stream would hold a worker.
+    Pass the access token in the Authorization header, or a ticket from
+    EventTicketView as ?ticket= (EventSource cannot set headers).
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({"detail": "The event stream is only served over ASGI."}, status=501)
+    try:
+        employee = await sync_to_async(authenticate)(request)
+    except (InvalidToken, AuthenticationFailed):
+        return JsonResponse({"detail": "Given token not valid or missing."}, status=401)
+    if employee is None:
+        return JsonResponse({"detail": "No employee profile found."}, status=403)
+    response = StreamingHttpResponse(event_stream(employee), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+"""
+async twins of the hot read endpoints (project_management/async_views.py),
+same responses as the sync views, for serving under ASGI
+"""
+@require_GET
+async def async_project_list(request):
+    return await async_list(
+        ProjectViewSet, request,
+        select_related=("manager__user", "team_lead__user"), prefetch_related=("members__user", "documents"),
+    )
+
+
+@require_GET
+async def async_task_list(request, project_pk):
+    return await async_list(
+        TaskViewSet, request, select_related=("assigned_to__user", "created_by__user"), project_pk=project_pk,
+    )
+
+
+@require_GET
+async def async_dashboard(request):
+    view, drf_request, response = await prepare_view(DashboardView, request, action="get")
+    if response is not None:
+        return response
+    data = await aget_dashboard(drf_request.user)
+    if data is None:
+        response = Response({"detail": "No employee profile found."}, status=status.HTTP_403_FORBIDDEN)
+    else:
+        response = Response(data)
+    return await sync_to_async(render)(view, drf_request, response)
@@ -0,0 +1,158 @@
+"""
+Workload and capacity of a project's members, for picking assignees.
+
+load: open tasks assigned to the employee (in any project), each weighted by
+its priority and by how close its due date is. Computed for every member in a
+single aggregate query.
+capacity: department shift hours per day times the days in the horizon the
+employee is not on approved leave (one more query for the leaves).
+utilization = load * HOURS_PER_POINT / capacity; lower means more room.
+
+plan_assignments() answers "who should get these N new tasks": it keeps the
+members' loads and capacities side by side and assigns the heaviest task
+first, each time to the member whose utilization would end up lowest.
+"""
+from datetime import timedelta
+
+from django.db.models import Case, Count, FloatField, Q, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from employee.models import Department, Employee, Leave
+
+PRIORITY_WEIGHTS = {"low": 1, "medium": 2, "high": 3, "urgent": 5}
+DEFAULT_PRIORITY = "medium"
+"""(due within, multiplier): already overdue, due within 2 days, due within a week; later or no due date is 1"""
+URGENCY_MULTIPLIERS = ((timedelta(0), 2.0), (timedelta(days=2), 1.5), (timedelta(days=7), 1.2))
+OPEN_STATUSES = ("todo", "in_progress", "review", "rejected")
+HOURS_PER_POINT = 4
+DEFAULT_HORIZON_DAYS = 14
+MAX_HORIZON_DAYS = 90
+
+
+def task_weight(priority, due_date, now=None):
+    now = now or timezone.now()
+    weight = PRIORITY_WEIGHTS.get(priority, PRIORITY_WEIGHTS[DEFAULT_PRIORITY])
+    if due_date is not None:
+        for within, multiplier in URGENCY_MULTIPLIERS:
+            if due_date < now + within:
+                return weight * multiplier
+    return float(weight)
+
+
+def _weight_expression(now):
+    """task_weight() as SQL over the employee -> tasks join."""
+    whens = []
+    for priority, weight in PRIORITY_WEIGHTS.items():
+        for within, multiplier in URGENCY_MULTIPLIERS:
+            whens.append(When(tasks__priority=priority, tasks__due_date__lt=now + within, then=Value(weight * multiplier)))
+        whens.append(When(tasks__priority=priority, then=Value(float(weight))))
+    return Case(*whens, default=Value(float(PRIORITY_WEIGHTS[DEFAULT_PRIORITY])), output_field=FloatField())
+
+
+def _shift_hours(start, end):
+    return Department(working_start_time=start, working_end_time=end).get_shift_duration().total_seconds() / 3600
+
+
+def _leave_days(employee_ids, first_day, last_day):
+    """{employee_id: number of days in [first_day, last_day] covered by approved leave}"""
+    days = {}
+    leaves = Leave.objects.filter(
+        employee_id__in=employee_ids, status="APPROVED", start_date__lte=last_day, end_date__gte=first_day,
+    ).values_list("employee_id", "start_date", "end_date")
+    for employee_id, start, end in leaves:
+        covered = days.setdefault(employee_id, set())
+        day = max(start, first_day)
+        while day <= min(end, last_day):
+            covered.add(day)
+            day += timedelta(days=1)
+    return {employee_id: len(covered) for employee_id, covered in days.items()}
+
+
+def _utilization(load, capacity_hours):
+    if capacity_hours <= 0:
+        return None
+    return round(load * HOURS_PER_POINT / capacity_hours, 4)
+
+
+def member_workload(project, horizon_days=DEFAULT_HORIZON_DAYS, now=None):
+    """Load and capacity of every active project member, in two queries."""
+    now = now or timezone.now()
+    open_tasks = Q(tasks__status__in=OPEN_STATUSES)
+    members = list(
+        project.members.filter(status=Employee.STATUS_ACTIVE)
+        .annotate(
+            open_tasks=Count("tasks", filter=open_tasks),
+            load=Coalesce(Sum(_weight_expression(now), filter=open_tasks), Value(0.0), output_field=FloatField()),
+        )
+        .values(
+            "id", "user__first_name", "user__last_name", "role",
+            "department__working_start_time", "department__working_end_time",
+            "open_tasks", "load",
+        )
+        .order_by("id")
+    )
+
+    today = timezone.localtime(now).date()
+    leave_days = _leave_days([member["id"] for member in members], today, today + timedelta(days=horizon_days - 1))
+
+    workload = []
+    for member in members:
+        shift = _shift_hours(member["department__working_start_time"], member["department__working_end_time"])
+        on_leave = leave_days.get(member["id"], 0)
+        capacity = shift * (horizon_days - on_leave)
+        workload.append({
+            "employee_id": member["id"],
+            "name": f"{member['user__first_name'] or ''} {member['user__last_name'] or ''}".strip(),
+            "role": member["role"],
+            "open_tasks": member["open_tasks"],
+            "load": round(member["load"], 2),
+            "shift_hours": round(shift, 2),
+            "leave_days": on_leave,
+            "capacity_hours": round(capacity, 2),
+            "utilization": _utilization(member["load"], capacity),
+        })
+    return workload
+
+
+def _rank_key(entry):
+    # members without capacity (no shift, on leave the whole horizon) go last
+    utilization = entry["utilization"]
+    return (utilization is None, utilization or 0, entry["open_tasks"], entry["employee_id"])
+
+
+def rank_assignees(project, horizon_days=DEFAULT_HORIZON_DAYS, now=None):
+    return sorted(member_workload(project, horizon_days, now), key=_rank_key)
+
+
+def plan_assignments(project, tasks, horizon_days=DEFAULT_HORIZON_DAYS, now=None):
+    """
+    Suggest an assignee for each hypothetical task ({"priority", "due_date"}).
+    Returns (assignments in input order, projected workload of the members).
+    """
+    now = now or timezone.now()
+    workload = member_workload(project, horizon_days, now)
+    ids = [entry["employee_id"] for entry in workload]
+    loads = [entry["load"] for entry in workload]
+    capacities = [entry["capacity_hours"] for entry in workload]
+    available = [index for index, capacity in enumerate(capacities) if capacity > 0]
+
+    weights = [task_weight(task.get("priority"), task.get("due_date"), now) for task in tasks]
+    assignments = [None] * len(tasks)
+    for task_index in sorted(range(len(tasks)), key=lambda i: -weights[i]):
+        if not available:
+            break
+        weight = weights[task_index]
+        best = min(available, key=lambda i: ((loads[i] + weight) * HOURS_PER_POINT / capacities[i], ids[i]))
+        loads[best] += weight
+        assignments[task_index] = {
+            "task": task_index,
+            "employee_id": ids[best],
+            "weight": round(weight, 2),
+            "utilization_after": _utilization(loads[best], capacities[best]),
+        }
+
+    for entry, load in zip(workload, loads):
+        entry["load"] = round(load, 2)
+        entry["utilization"] = _utilization(load, entry["capacity_hours"])
+    return assignments, sorted(workload, key=_rank_key)